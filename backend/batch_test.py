@@ -3,9 +3,12 @@ import sys
 import os
 import time
 import json
+import logging
 import pandas as pd
 from tqdm import tqdm
 import argparse
+import multiprocessing
+import numpy as np
 from concurrent.futures import ProcessPoolExecutor
 
 # --- Path Setup ---
@@ -15,29 +18,78 @@ base_path = os.path.abspath(
 sys.path.insert(0, base_path)
 
 try:
-    from q_learning import QLearningAgent
+    from q_learning import QLearningAgent, DEFAULT_Q_TABLE
+    from src.agent.shared_q_table import SharedQTable
 except ImportError:
     print("❌ Error: Could not import QLearningAgent from q_learning_agent.py")
     sys.exit(1)
 
+# --- Seeding ---
+def child_seeds(seed, count):
+    """
+    Spawn `count` independent per-run SeedSequences from one root seed (fresh entropy when None).
+    Returns (root entropy, children): passing the entropy back as `seed` reproduces every run.
+    """
+    root = np.random.SeedSequence(seed)
+    return root.entropy, root.spawn(count)
+
+def resolve_seed(seed=None):
+    """The root seed itself, or fresh entropy when it is None (record it to repeat the batch)."""
+    return np.random.SeedSequence(seed).entropy
+
 # --- Single Run Function for Parallel Execution ---
-def single_run(alpha, gamma, episodes, time_steps):
+def single_run(alpha, gamma, episodes, time_steps, seed=None):
     """Executes a single independent training run without loading/saving Q-table."""
     agent = QLearningAgent(
         alpha=alpha,
         gamma=gamma,
         episodes=episodes,
-        time_steps_per_episode=time_steps
+        time_steps_per_episode=time_steps,
+        rng=seed
     )
     # Train without loading or saving Q-table
     agent.train()
     env_metrics = agent.env.get_metrics()
-    avg_reward = sum(agent.get_learning_curve()) / len(agent.get_learning_curve())
     return {
-        "avg_reward": avg_reward,
+        "avg_reward": agent.stats.mean("reward"),
+        **env_metrics
+    }
+
+# --- Shared Q-Table Run (parallel continuous mode) ---
+_shared_lock = None
+
+def _init_shared_worker(lock):
+    """Pool initializer: hands every worker the lock that guards new-state inserts."""
+    global _shared_lock
+    _shared_lock = lock
+
+def shared_run(shared_path, alpha, gamma, episodes, time_steps, seed=None):
+    """Executes one training run that reads and updates the shared memory-mapped Q-table."""
+    q_table = SharedQTable(shared_path, mode="r+", lock=_shared_lock)
+    agent = QLearningAgent(
+        alpha=alpha,
+        gamma=gamma,
+        episodes=episodes,
+        time_steps_per_episode=time_steps,
+        q_table=q_table,
+        rng=seed
+    )
+    agent.train()
+    q_table.flush()
+    env_metrics = agent.env.get_metrics()
+    return {
+        "avg_reward": agent.stats.mean("reward"),
         **env_metrics
     }
 
+def open_shared_q_table(shared_path, num_bins=5):
+    """Opens the shared Q-table, creating it from the consolidated table on first use."""
+    if os.path.exists(os.path.join(shared_path, "keys.npy")):
+        return SharedQTable(shared_path, mode="r+")
+    seed_agent = QLearningAgent(num_bins=num_bins)
+    seed_agent.load_q_table()
+    return SharedQTable.create(shared_path, num_bins=num_bins, initial=seed_agent.q_table)
+
 # --- Batch Execution Function ---
 def run_batch_simulations(
     num_runs: int,
@@ -45,25 +97,59 @@ def run_batch_simulations(
     time_steps: int,
     alpha: float,
     gamma: float,
-    independent_runs: bool = False
+    independent_runs: bool = False,
+    shared_q_table: str = None,
+    max_workers: int = None,
+    on_run=None,
+    seed: int = None
 ):
     """
     Runs multiple training sessions, either independently or sequentially.
+    With `shared_q_table` (a directory), continuous runs execute in parallel and all update
+    one memory-mapped Q-table; it is exported to the consolidated .npz when the batch ends.
+    `on_run(result)` is called as each run's result is collected; returning False stops the batch
+    (runs that have not started are cancelled).
+    Run i is seeded with the i-th child of `seed`, so a batch is reproducible regardless of
+    worker scheduling. (Shared-table runs still interleave their Q-table updates.) Pass the
+    seed explicitly (e.g. resolve_seed()) to know it when the caller did not choose one.
     Returns a list of dicts: one dict per run containing final env metrics and avg reward.
     """
     all_results = []
+    entropy, seeds = child_seeds(seed, num_runs)
+    logging.debug("🎲 Batch seed: %d", entropy)
 
-    if independent_runs:
+    if shared_q_table and not independent_runs:
+        # Parallel execution with one Q-table shared by every worker
+        table = open_shared_q_table(shared_q_table)
+        lock = multiprocessing.Lock()
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_shared_worker,
+                                 initargs=(lock,)) as executor:
+            futures = [
+                executor.submit(shared_run, shared_q_table, alpha, gamma, episodes, time_steps, run_seed)
+                for run_seed in seeds
+            ]
+            for i, future in enumerate(tqdm(futures, desc="Batch Simulations", unit="run")):
+                result = future.result()
+                result["run"] = i + 1
+                all_results.append(result)
+                if on_run is not None and on_run(result) is False:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    break
+        table.save(DEFAULT_Q_TABLE)
+    elif independent_runs:
         # Parallel execution for independent runs
-        with ProcessPoolExecutor() as executor:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
             futures = [
-                executor.submit(single_run, alpha, gamma, episodes, time_steps)
-                for _ in range(num_runs)
+                executor.submit(single_run, alpha, gamma, episodes, time_steps, run_seed)
+                for run_seed in seeds
             ]
             for i, future in enumerate(tqdm(futures, desc="Batch Simulations", unit="run")):
                 result = future.result()
                 result["run"] = i + 1
                 all_results.append(result)
+                if on_run is not None and on_run(result) is False:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    break
     else:
         # Sequential execution with Q-table continuity
         for run in tqdm(range(1, num_runs + 1), desc="Batch Simulations", unit="run"):
@@ -71,19 +157,21 @@ def run_batch_simulations(
                 alpha=alpha,
                 gamma=gamma,
                 episodes=episodes,
-                time_steps_per_episode=time_steps
+                time_steps_per_episode=time_steps,
+                rng=seeds[run - 1]
             )
             agent.load_q_table()  # Load previous Q-table if exists
             agent.train()
             agent.save_q_table()  # Save updated Q-table
             env_metrics = agent.env.get_metrics()
-            avg_reward = sum(agent.get_learning_curve()) / len(agent.get_learning_curve())
             result = {
                 "run": run,
-                "avg_reward": avg_reward,
+                "avg_reward": agent.stats.mean("reward"),
                 **env_metrics
             }
             all_results.append(result)
+            if on_run is not None and on_run(result) is False:
+                break
 
     return all_results
 
@@ -104,15 +192,30 @@ if __name__ == "__main__":
         "--independent_runs", action="store_true",
         help="Run each simulation independently without loading/saving Q-table"
     )
+    parser.add_argument(
+        "--shared_q_table", type=str, default=None,
+        help="Directory of a memory-mapped Q-table shared by parallel continuous runs"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Worker processes for parallel modes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="Root seed; each run gets its own child seed (default: fresh entropy, printed)"
+    )
     parser.add_argument(
         "--export_csv", type=str, default=None,
         help="If provided, writes per-run results to this CSV file"
     )
     args = parser.parse_args()
 
-    mode = "Independent" if args.independent_runs else "Continuous"
+    mode = "Independent" if args.independent_runs else (
+        "Shared" if args.shared_q_table else "Continuous")
+    seed = resolve_seed(args.seed)
     print(f"🔎 Batch test ({mode}): {args.runs} runs, {args.episodes} episodes, "
           f"{args.time_steps} steps/ep | α={args.alpha}, γ={args.gamma}")
+    print(f"🎲 Batch seed: {seed}")
     start = time.time()
 
     results = run_batch_simulations(
@@ -121,7 +224,10 @@ if __name__ == "__main__":
         time_steps=args.time_steps,
         alpha=args.alpha,
         gamma=args.gamma,
-        independent_runs=args.independent_runs
+        independent_runs=args.independent_runs,
+        shared_q_table=args.shared_q_table,
+        max_workers=args.workers,
+        seed=seed
     )
 
     duration = time.time() - start
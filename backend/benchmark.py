@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+
+import numpy as np
+
+from src.agent.q_learning import QLearningAgent
+
+# Cluster sizes as (hosts, VMs), at the 1:1.5 ratio of the default 12/18 cluster: denser
+# clusters leave no feasible migration, and the action/training benchmarks would time an early return
+SIZES = [(12, 18), (100, 150), (1000, 1500), (10000, 15000)]
+MIN_TIME = 0.2  # Seconds of repeated calls per measurement
+MAX_CALLS = 10000
+SCALING_SLACK = 0.5  # Allowed excess over the expected scaling exponent
+
+# --- Benchmark Definitions ---
+#
+# Each benchmark has a setup(agent) returning the callable to time, and the exponent it is
+# expected to scale with in the number of VMs (0 = O(1), 1 = linear). A measured exponent
+# well above that (e.g. 2 for an O(n^2) blowup) is flagged as a scaling regression.
+# Setups that time a decision check once that it takes the full path (raising RuntimeError if not).
+
+def _setup_get_metrics(agent):
+    return agent.env.get_metrics
+
+
+def _setup_get_state(agent):
+    return agent.env.get_state
+
+
+def _setup_simulate_rollback(agent):
+    env = agent.env
+    # Custom --sizes may be overcommitted, so make room on the emptiest host if needed
+    dst = env.hosts[int(np.argmax(env.host_free_cpu))]
+    vm = min((vm for vm in env.vms if vm.assigned_host not in (None, dst.id)), key=lambda v: v.cpu_req)
+    while not dst.can_host(vm) and dst.vms:
+        env.terminate_vm(dst.vms[0].id)
+    src_id = vm.assigned_host
+
+    def run():
+        env.simulate_migration(src_id, dst.id, vm)
+        env.rollback()
+    return run
+
+
+def _setup_initial_allocation(agent):
+    # An uncached reset() clears every placement and reruns _initial_allocation
+    return lambda: agent.env.reset(use_cache=False)
+
+
+def _setup_reset_cached(agent):
+    # run_benchmarks already reset once, so this restores the cached initial layout
+    return agent.env.reset
+
+
+def _setup_snapshot_restore(agent):
+    env = agent.env
+    return lambda: env.restore(env.snapshot())
+
+
+def _setup_get_action(epsilon):
+    def setup(agent):
+        agent.epsilon = epsilon
+        state = agent.get_state()
+        hosts_by_bin = agent.get_hosts_by_bins()
+        for action in agent.q_table.actions:
+            agent.q_table.set(state, action, float(sum(action)))
+        if agent.get_action(state, hosts_by_bin) is None:
+            raise RuntimeError(f"No feasible action in state {state}: the cluster is too full to benchmark")
+        return lambda: agent.get_action(state, hosts_by_bin)
+    return setup
+
+
+def _setup_train_episode(agent):
+    agent.episodes = 1
+    agent.train()
+    if agent.stats.last("migrations") == 0:
+        raise RuntimeError("A training episode made no migrations: the cluster is too full to benchmark")
+
+    def run():
+        agent.train()
+    return run
+
+
+def _fill_q_table(agent):
+    """Give the agent one Q-table state per VM so table I/O scales with the cluster size."""
+    num_states = len(agent.env.vms)
+    for i in range(num_states):
+        state = (i % 1000, i // 1000, 0, 0, 0)[:agent.num_bins]
+        agent.q_table.set(state, agent.q_table.actions[i % len(agent.q_table.actions)], float(i))
+
+
+def _setup_save_q_table(agent):
+    _fill_q_table(agent)
+    path = os.path.join(tempfile.mkdtemp(), "q_table.npz")
+    return lambda: agent.save_q_table(path)
+
+
+def _setup_load_q_table(agent):
+    _fill_q_table(agent)
+    path = os.path.join(tempfile.mkdtemp(), "q_table.npz")
+    agent.save_q_table(path)
+    return lambda: agent.load_q_table(path)
+
+
+BENCHMARKS = {
+    "get_metrics": (_setup_get_metrics, 0),
+    "get_state": (_setup_get_state, 1),
+    "simulate_rollback": (_setup_simulate_rollback, 0),
+    "initial_allocation": (_setup_initial_allocation, 1),
+    "reset_cached": (_setup_reset_cached, 1),
+    "snapshot_restore": (_setup_snapshot_restore, 1),
+    "get_action_explore": (_setup_get_action(1.0), 1),
+    "get_action_exploit": (_setup_get_action(0.0), 0),
+    "train_episode": (_setup_train_episode, 1),
+    "save_q_table": (_setup_save_q_table, 1),
+    "load_q_table": (_setup_load_q_table, 1),
+}
+
+# --- Measurement ---
+
+def measure(fn):
+    """Call `fn` repeatedly for about MIN_TIME seconds; returns (mean, min, calls) in seconds."""
+    times = []
+    total = 0.0
+    while total < MIN_TIME and len(times) < MAX_CALLS:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+    return total / len(times), min(times), len(times)
+
+
+def run_benchmarks(names, sizes, seed=0):
+    """Run each named benchmark at every size on a fresh seeded agent; returns result dicts."""
+    results = []
+    for num_hosts, num_vms in sizes:
+        for name in names:
+            setup, _ = BENCHMARKS[name]
+            agent = QLearningAgent(num_hosts=num_hosts, num_vms=num_vms, rng=seed)
+            agent.env.reset()
+            mean, best, calls = measure(setup(agent))
+            results.append({"bench": name, "hosts": num_hosts, "vms": num_vms, "mean": mean, "min": best, "calls": calls})
+            print(f"  {name:<20} {num_hosts:>6}/{num_vms:<7} mean {mean * 1e6:12.1f} µs   min {best * 1e6:12.1f} µs   ({calls} calls)")
+    return results
+
+# --- Regression Checks ---
+
+def scaling_flags(results):
+    """Flag benchmarks whose time grows faster between sizes than their expected complexity."""
+    flags = []
+    by_bench = {}
+    for r in results:
+        by_bench.setdefault(r["bench"], []).append(r)
+    for name, rows in by_bench.items():
+        expected = BENCHMARKS[name][1]
+        rows.sort(key=lambda r: r["vms"])
+        for small, large in zip(rows, rows[1:]):
+            exponent = math.log(large["min"] / small["min"]) / math.log(large["vms"] / small["vms"])
+            if exponent > expected + SCALING_SLACK:
+                flags.append(
+                    f"{name}: {small['vms']} -> {large['vms']} VMs scales as n^{exponent:.2f} (expected n^{expected})"
+                )
+    return flags
+
+
+def compare_flags(results, baseline, threshold):
+    """Flag benchmarks more than `threshold` (a fraction) slower than in a baseline results file."""
+    old = {(r["bench"], r["hosts"], r["vms"]): r for r in baseline["results"]}
+    flags = []
+    for r in results:
+        prev = old.get((r["bench"], r["hosts"], r["vms"]))
+        if prev is not None and r["min"] > prev["min"] * (1 + threshold):
+            flags.append(
+                f"{r['bench']} at {r['hosts']}/{r['vms']}: {prev['min'] * 1e6:.1f} -> {r['min'] * 1e6:.1f} µs "
+                f"(+{(r['min'] / prev['min'] - 1) * 100:.0f}% vs {baseline.get('commit', 'baseline')})"
+            )
+    return flags
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark simulator and agent hot paths")
+    parser.add_argument("--bench", nargs="+", default=list(BENCHMARKS), choices=list(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument(
+        "--sizes", nargs="+", default=None,
+        help="Cluster sizes as HOSTSxVMS (default: 12x18 100x150 1000x1500 10000x15000)"
+    )
+    parser.add_argument("--quick", action="store_true", help="Only the two smallest default sizes")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated clusters")
+    parser.add_argument("--output", type=str, default=None, help="Results JSON (default: benchmarks/<commit>.json)")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Slowdown vs baseline that counts as a regression")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    if args.sizes:
+        sizes = [tuple(int(v) for v in size.lower().split("x")) for size in args.sizes]
+    else:
+        sizes = SIZES[:2] if args.quick else SIZES
+
+    commit = current_commit()
+    print(f"⏱️ Benchmarking {len(args.bench)} benchmarks at {len(sizes)} sizes (commit {commit or 'unknown'})")
+    results = run_benchmarks(args.bench, sizes, args.seed)
+
+    report = {
+        "commit": commit,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    output = args.output or os.path.join("benchmarks", f"{commit or 'results'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📁 Results written to {output}")
+
+    flags = scaling_flags(results)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            flags += compare_flags(results, json.load(f), args.threshold)
+    if flags:
+        print("\n⚠️ Possible regressions:")
+        for flag in flags:
+            print(f"  - {flag}")
+        sys.exit(1)
+    print("\n✅ No regressions detected")
@@ -4,51 +4,39 @@ class BestFitAgent:
     Chooses the host that leaves the least remaining resources after placing the VM.
     """
 
-    def __init__(self, env):
+    def __init__(self, env, time_steps=50):
         """
         Initialize the BestFitAgent with the environment.
         :param env: CloudEnvironment instance.
+        :param time_steps: Number of simulation steps per run.
         """
         self.env = env
+        self.time_steps = time_steps
 
     def place_vm(self, vm):
         """
-        Places the VM on the host that results in the least amount of remaining resource wastage.
+        Places the VM on the host that results in the least amount of remaining resource wastage
+        (free CPU + free memory after placement). Uses the environment's capacity index,
+        O(sqrt(hosts)) per placement.
         :param vm: The VM object to be placed.
         :return: Host ID if placed, else None.
         """
-        best_host_id = None
-        best_fit_score = float("inf")  # Lower is better
-
-        for host_id, host in enumerate(self.env.hosts):
-            if host.can_host(vm):
-                # Calculate resource wastage (lower is better)
-                cpu_gap = host.cpu_remaining() - vm.cpu
-                mem_gap = host.mem_remaining() - vm.memory
-                fit_score = cpu_gap + mem_gap
-
-                if fit_score < best_fit_score:
-                    best_fit_score = fit_score
-                    best_host_id = host_id
-
-        if best_host_id is not None:
-            self.env.allocate_vm_to_host(vm, best_host_id)
-
-        return best_host_id
+        return self.env.place_vm(vm, strategy="best_fit")
 
     def run(self):
         """
         Run the Best-Fit algorithm across the entire simulation.
         :return: Dictionary of final metrics.
         """
-        self.env.reset()
+        self.env.reset(strategy="best_fit")
 
-        for t in range(self.env.time_steps):
-            vms_to_place = self.env.get_incoming_vms()
+        for t in range(self.time_steps):
+            vms_to_place = self.env.get_unplaced_vms()
 
             for vm in vms_to_place:
                 self.place_vm(vm)
 
-            self.env.step()
+            self.env.update_vm_workloads()
+            self.env.tick_idle_counters()
 
         return self.env.get_metrics()
@@ -0,0 +1,163 @@
+import numpy as np
+
+# --- Episode Statistics ---
+
+STAT_FIELDS = ("reward", "energy_wh", "migrations", "sla_violations")
+
+
+class EpisodeStats:
+    """
+    Per-episode training results in a fixed memory budget, whatever the number of episodes.
+
+    Each push updates, in O(1) and for every field:
+      - running mean/variance (Welford), min, max and the last value
+      - a rolling mean over the last `window` episodes (a ring buffer with a running sum)
+      - a decimated history of at most `capacity` rows: every episode is kept until the buffer
+        fills up, then every other row is dropped and only every 2nd (4th, ...) episode is
+        recorded from there on. The history is always evenly spaced over the whole run, and
+        exact as long as the run has at most `capacity` episodes.
+    """
+
+    def __init__(self, window=50, capacity=10000, fields=STAT_FIELDS):
+        if capacity < 2 or capacity % 2:
+            raise ValueError("capacity must be an even number of at least 2")
+        self.fields = tuple(fields)
+        self._col = {field: i for i, field in enumerate(self.fields)}
+        self.window = window
+        self.capacity = capacity
+        num_fields = len(self.fields)
+
+        self.count = 0
+        self.last_episode = 0
+        self._mean = np.zeros(num_fields)
+        self._m2 = np.zeros(num_fields)
+        self._min = np.zeros(num_fields)
+        self._max = np.zeros(num_fields)
+        self._last = np.zeros(num_fields)
+
+        self._ring = np.zeros((window, num_fields))
+        self._ring_sum = np.zeros(num_fields)
+
+        self.stride = 1  # Episodes between history rows
+        self._stored = 0
+        self._episodes = np.zeros(capacity, dtype=np.int64)
+        self._history = np.zeros((capacity, num_fields))
+
+    def __len__(self):
+        return self.count
+
+    def push(self, episode, **values):
+        """Record one episode; fields not given count as 0."""
+        row = np.array([float(values.get(field, 0.0)) for field in self.fields])
+        self.count += 1
+        self.last_episode = episode
+        n = self.count
+
+        delta = row - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (row - self._mean)
+        if n == 1:
+            self._min[:] = row
+            self._max[:] = row
+        else:
+            np.minimum(self._min, row, out=self._min)
+            np.maximum(self._max, row, out=self._max)
+        self._last = row
+
+        slot = (n - 1) % self.window
+        self._ring_sum += row - self._ring[slot]
+        self._ring[slot] = row
+        if slot == self.window - 1:
+            self._ring_sum = self._ring.sum(axis=0)  # Re-sum once per lap so rounding errors cannot build up
+
+        if n % self.stride == 0:
+            if self._stored == self.capacity:
+                self._decimate()
+            if n % self.stride == 0:
+                self._episodes[self._stored] = episode
+                self._history[self._stored] = row
+                self._stored += 1
+
+    def _decimate(self):
+        """Keep every other history row (those on a multiple of the doubled stride)."""
+        half = self.capacity // 2
+        self._episodes[:half] = self._episodes[1::2]
+        self._history[:half] = self._history[1::2]
+        self._stored = half
+        self.stride *= 2
+
+    # --- Queries (all O(1) except history) ---
+
+    def mean(self, field="reward"):
+        return float(self._mean[self._col[field]])
+
+    def std(self, field="reward"):
+        return float(np.sqrt(self._m2[self._col[field]] / self.count)) if self.count else 0.0
+
+    def min(self, field="reward"):
+        return float(self._min[self._col[field]])
+
+    def max(self, field="reward"):
+        return float(self._max[self._col[field]])
+
+    def last(self, field="reward"):
+        return float(self._last[self._col[field]])
+
+    def rolling_mean(self, field="reward"):
+        """Mean over the last `window` episodes (fewer at the start of a run)."""
+        size = min(self.count, self.window)
+        return float(self._ring_sum[self._col[field]] / size) if size else 0.0
+
+    def summary(self):
+        """All aggregates as a JSON-ready dict: {"episodes": n, field: {mean, std, min, max, last, rolling_mean}}."""
+        result = {"episodes": self.count, "window": self.window}
+        for field in self.fields:
+            result[field] = {
+                "mean": self.mean(field),
+                "std": self.std(field),
+                "min": self.min(field),
+                "max": self.max(field),
+                "last": self.last(field),
+                "rolling_mean": self.rolling_mean(field),
+            }
+        return result
+
+    def history(self, field="reward"):
+        """(episode numbers, values) of the recorded history, as array copies."""
+        return self._episodes[:self._stored].copy(), self._history[:self._stored, self._col[field]].copy()
+
+    # --- Serialization ---
+
+    def state(self):
+        """Complete state as plain lists and numbers (JSON-ready); see from_state()."""
+        return {
+            "fields": list(self.fields),
+            "window": self.window,
+            "capacity": self.capacity,
+            "count": self.count,
+            "last_episode": self.last_episode,
+            "stride": self.stride,
+            "mean": self._mean.tolist(),
+            "m2": self._m2.tolist(),
+            "min": self._min.tolist(),
+            "max": self._max.tolist(),
+            "last": self._last.tolist(),
+            "ring": self._ring.tolist(),
+            "episodes": self._episodes[:self._stored].tolist(),
+            "history": self._history[:self._stored].tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls(state["window"], state["capacity"], state["fields"])
+        stats.count = state["count"]
+        stats.last_episode = state["last_episode"]
+        stats.stride = state["stride"]
+        for name in ("mean", "m2", "min", "max", "last"):
+            setattr(stats, f"_{name}", np.array(state[name], dtype=np.float64).reshape(len(stats.fields)))
+        stats._ring = np.array(state["ring"], dtype=np.float64).reshape(stats.window, len(stats.fields))
+        stats._ring_sum = stats._ring.sum(axis=0)
+        stats._stored = len(state["episodes"])
+        stats._episodes[:stats._stored] = state["episodes"]
+        stats._history[:stats._stored] = np.array(state["history"], dtype=np.float64).reshape(stats._stored, len(stats.fields))
+        return stats
@@ -0,0 +1,187 @@
+import os
+import time
+import logging
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# --- Policy Evaluation ---
+#
+# Runs frozen policies (no exploration, no Q-updates) over a fixed set of scenarios, so
+# policies can be compared on exactly the same clusters and workloads. Policy specs:
+#   first_fit | best_fit | worst_fit   place VMs with that strategy and never migrate
+#   greedy[:path]                      greedy actions of a Q-table (.npz, legacy .json or shared dir)
+#   linear:path                        greedy actions of a LinearQFunction (.npz)
+# Learned policies start from a first-fit placement, as in training, and make at most one
+# migration per step, chosen the way train() chooses them.
+
+BASELINES = ("first_fit", "best_fit", "worst_fit")
+METRICS = ("energy_wh", "active_hosts", "migrations", "failed_migrations", "sla_violations", "avg_cpu_utilization")
+
+
+def make_scenarios(count, seed=None, hosts=12, vms=18, steps=50, drift=False, traces=None, **trace_args):
+    """
+    Scenario dicts for evaluate_policies: `count` generated clusters seeded from `seed`
+    (with `drift`, VM demands change every step), plus one scenario per trace path, on
+    `hosts` hosts. `trace_args` (cpu_scale, mem_scale, step_seconds, power_model) apply to traces.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(count + len(traces or ()))
+    scenarios = []
+    for i in range(count):
+        scenarios.append({"id": f"s{i:03d}", "seed": int(seeds[i].generate_state(1)[0]), "hosts": hosts,
+                          "vms": vms, "steps": steps, "drift": drift})
+    for i, path in enumerate(traces or (), start=count):
+        scenarios.append({"id": os.path.basename(os.path.normpath(path)), "seed": int(seeds[i].generate_state(1)[0]),
+                          "hosts": hosts, "vms": 0, "steps": steps, "trace": path, **trace_args})
+    return scenarios
+
+
+_TABLES = {}  # Policy spec -> loaded table, cached per worker process
+
+
+def _policy_table(spec):
+    if spec not in _TABLES:
+        kind, _, path = spec.partition(":")
+        if kind == "greedy":
+            from src.agent.q_learning import QLearningAgent, DEFAULT_Q_TABLE
+            path = path or DEFAULT_Q_TABLE
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No Q-table at {path}")
+            loader = QLearningAgent(num_hosts=0, num_vms=0)
+            loader.load_q_table(path)
+            _TABLES[spec] = loader.q_table
+        elif kind == "linear":
+            from src.agent.linear_agent import LinearQFunction
+            _TABLES[spec] = LinearQFunction.load(path)
+        else:
+            raise ValueError(f"Unknown policy: {spec}")
+    return _TABLES[spec]
+
+
+def _frozen_agent(spec, env, seed):
+    """An agent acting greedily on `env` with the policy's table (its own env is never used)."""
+    from src.agent.q_learning import QLearningAgent
+    from src.agent.linear_agent import LinearQAgent
+
+    table = _policy_table(spec)
+    agent_cls = LinearQAgent if spec.startswith("linear") else QLearningAgent
+    agent = agent_cls(num_hosts=0, num_vms=0, num_bins=table.num_bins, q_table=table, rng=seed)
+    agent.env = env
+    agent.epsilon = 0.0
+    return agent
+
+
+def run_episode(spec, scenario):
+    """Run one policy over one scenario and return its metrics (means over steps, totals for energy and migrations)."""
+    from src.env.cloud_env import CloudEnvironment
+    from src.env.workload import TraceReplayer, open_trace
+
+    strategy = spec if spec in BASELINES else "first_fit"
+    start = time.perf_counter()
+    env = CloudEnvironment(num_hosts=scenario["hosts"], num_vms=scenario["vms"], rng=scenario["seed"],
+                           power_model=scenario.get("power_model"), step_seconds=scenario.get("step_seconds", 300.0))
+    env.reset(strategy)
+    if scenario.get("trace"):
+        env.workload = TraceReplayer(open_trace(scenario["trace"]), scenario.get("cpu_scale", 1.0),
+                                     scenario.get("mem_scale", 1.0))
+    agent = None if spec in BASELINES else _frozen_agent(spec, env, scenario["seed"])
+
+    totals = dict.fromkeys(("active_hosts", "sla_violations", "avg_cpu_utilization"), 0.0)
+    migrations = failed = steps = 0
+    while steps < scenario["steps"]:
+        if env.workload is not None:
+            if not env.workload.apply(env):
+                break
+        elif scenario.get("drift"):
+            env.update_vm_workloads()
+        for vm in env.get_unplaced_vms():
+            env.place_vm(vm, strategy)
+
+        if agent is not None:
+            hosts_by_bin = agent.get_hosts_by_bins()
+            action = agent.get_action(agent.get_state(), hosts_by_bin)
+            move = agent.select_migration(hosts_by_bin, action) if action is not None else None
+            if move is not None:
+                if env.migrate_vm(*move):
+                    migrations += 1
+                else:
+                    failed += 1
+
+        env.tick_idle_counters()
+        steps += 1
+        metrics = env.get_metrics()
+        for key in totals:
+            totals[key] += metrics[key]
+
+    return {
+        "policy": spec,
+        "scenario": scenario["id"],
+        "energy_wh": env.energy_wh,
+        **{key: value / max(steps, 1) for key, value in totals.items()},
+        "migrations": migrations,
+        "failed_migrations": failed,
+        "steps": steps,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _run_task(task):
+    return run_episode(*task)
+
+
+def evaluate_policies(policies, scenarios, max_workers=None):
+    """
+    Run every policy on every scenario, in parallel over a process pool (max_workers=1 runs
+    inline). Returns a DataFrame with one row per (policy, scenario).
+    """
+    for spec in policies:
+        if spec not in BASELINES:
+            _policy_table(spec)  # Fail fast on a bad spec or missing file
+    tasks = list(itertools.product(policies, scenarios))
+    if max_workers == 1:
+        rows = [_run_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(_run_task, tasks, chunksize=max(1, len(tasks) // (4 * (os.cpu_count() or 1)))))
+    return pd.DataFrame(rows)
+
+
+def compare(results):
+    """Side-by-side mean of every metric per policy (columns in the order policies were given)."""
+    order = list(dict.fromkeys(results["policy"]))
+    return results.groupby("policy")[list(METRICS)].mean().T[order]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Compare frozen policies on the same seeded scenarios or traces")
+    parser.add_argument("policies", nargs="*", default=["first_fit", "best_fit", "greedy"],
+                        help="Policy specs: first_fit, best_fit, worst_fit, greedy[:q_table.npz], linear:weights.npz")
+    parser.add_argument("--scenarios", type=int, default=32, help="Number of generated scenarios")
+    parser.add_argument("--hosts", type=int, default=12, help="Number of hosts")
+    parser.add_argument("--vms", type=int, default=18, help="Number of VMs (generated scenarios)")
+    parser.add_argument("--steps", type=int, default=50, help="Steps per scenario")
+    parser.add_argument("--drift", action="store_true", help="Random demand drift every step")
+    parser.add_argument("--traces", nargs="*", default=None, help="Also evaluate on these workload traces")
+    parser.add_argument("--cpu_scale", type=float, default=1.0, help="Multiplier turning trace CPU values into demands")
+    parser.add_argument("--mem_scale", type=float, default=1.0, help="Multiplier turning trace memory values into demands")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the scenario set")
+    parser.add_argument("--export_csv", type=str, default=None, help="Write per-scenario results to this CSV file")
+    args = parser.parse_args()
+
+    scenarios = make_scenarios(args.scenarios, args.seed, args.hosts, args.vms, args.steps, args.drift,
+                               args.traces, cpu_scale=args.cpu_scale, mem_scale=args.mem_scale)
+    print(f"🔎 Evaluating {len(args.policies)} policies on {len(scenarios)} scenarios")
+    start = time.time()
+    results = evaluate_policies(args.policies, scenarios, args.workers)
+
+    print(f"\n✅ Evaluation completed in {time.time() - start:.2f} seconds")
+    print("\n--- Mean per Scenario ---")
+    print(compare(results).to_string())
+    if args.export_csv:
+        results.to_csv(args.export_csv, index=False)
+        print(f"\n📁 Per-scenario results written to {args.export_csv}")
@@ -1,38 +1,41 @@
 class FirstFitAgent:
     """
     A simple First-Fit VM placement strategy.
-    Iterates over hosts and places the VM in the first one that has enough resources.
+    Places each VM on the first host that has enough resources.
     """
 
-    def __init__(self, env):
+    def __init__(self, env, time_steps=50):
         """
         Initialize the FirstFitAgent with the environment.
         :param env: CloudEnvironment object with hosts and VMs.
+        :param time_steps: Number of simulation steps per run.
         """
         self.env = env
+        self.time_steps = time_steps
 
     def place_vm(self, vm):
         """
         Attempts to place a VM on the first host that can accommodate it.
+        Uses the environment's capacity index (a segment tree search, O(log hosts) per descent).
         :param vm: VM object to be placed.
         :return: Host ID if placement is successful, else None.
         """
-        for host_id, host in enumerate(self.env.hosts):
-            if host.can_host(vm):
-                self.env.allocate_vm_to_host(vm, host_id)
-                return host_id
-        return None  # No suitable host found
+        return self.env.place_vm(vm, strategy="first_fit")
 
     def run(self):
-        
-        self.env.reset()
+        """
+        Run the First-Fit algorithm across the entire simulation.
+        :return: Dictionary of final metrics.
+        """
+        self.env.reset(strategy="first_fit")
 
-        for t in range(self.env.time_steps):
-            vms_to_place = self.env.get_incoming_vms()
+        for t in range(self.time_steps):
+            vms_to_place = self.env.get_unplaced_vms()
 
             for vm in vms_to_place:
                 self.place_vm(vm)
 
-            self.env.step()
+            self.env.update_vm_workloads()
+            self.env.tick_idle_counters()
 
         return self.env.get_metrics()
@@ -0,0 +1,174 @@
+import math
+import time
+import pstats
+import logging
+import argparse
+import cProfile
+from collections import deque
+
+# --- Training Instrumentation ---
+
+PHASES = ("reset", "state", "action", "explore_scoring", "candidates", "metrics", "migration", "reward", "q_update", "logging")
+
+
+class Instrumentation:
+    """
+    Opt-in phase timers and counters for QLearningAgent.train.
+
+    The training loop calls `lap(phase, start)` at phase boundaries only when instrumentation
+    is attached (agent.instrumentation is None otherwise), so a disabled run pays one
+    `if` per boundary and nothing else.
+
+    Totals accumulate over the agent's lifetime; `end_episode` also keeps a per-episode
+    breakdown for the last `history` episodes.
+    """
+
+    def __init__(self, history=1000):
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.counters = {"episodes": 0, "steps": 0, "migrations": 0, "failed_migrations": 0, "explore": 0, "exploit": 0}
+        self.episodes = deque(maxlen=history)
+        self._episode_seconds = dict.fromkeys(PHASES, 0.0)
+        self._episode_counters = {"steps": 0, "migrations": 0}
+        self.explored = False  # Whether the last get_action call explored
+        self._started = time.perf_counter()
+
+    def lap(self, phase, start):
+        """Charge the time since `start` to `phase`; returns now, the start of the next phase."""
+        now = time.perf_counter()
+        self._episode_seconds[phase] += now - start
+        return now
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+        if name in self._episode_counters:
+            self._episode_counters[name] += amount
+
+    def count_action(self, explored):
+        self.explored = explored
+        self.counters["explore" if explored else "exploit"] += 1
+
+    def end_episode(self, episode):
+        """Fold the episode's timings into the totals and record its breakdown."""
+        for phase, seconds in self._episode_seconds.items():
+            self.phase_seconds[phase] += seconds
+        self.counters["episodes"] += 1
+        self.episodes.append({"episode": episode, **self._episode_seconds, **self._episode_counters})
+        self._episode_seconds = dict.fromkeys(PHASES, 0.0)
+        self._episode_counters = {"steps": 0, "migrations": 0}
+
+    def summary(self):
+        """Totals, derived rates and the share of instrumented time per phase."""
+        timed = sum(self.phase_seconds.values())
+        return {
+            "phase_seconds": dict(self.phase_seconds),
+            "phase_share": {p: s / timed if timed else 0.0 for p, s in self.phase_seconds.items()},
+            "counters": dict(self.counters),
+            "steps_per_second": self.counters["steps"] / timed if timed else 0.0,
+            "migrations_per_second": self.counters["migrations"] / timed if timed else 0.0,
+            "wall_seconds": time.perf_counter() - self._started,
+        }
+
+# --- Prometheus Exposition ---
+
+def _escape(text, quotes=True):
+    text = str(text).replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quotes else text
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value):
+    """A sample value as the exposition format spells it (NaN, +Inf and -Inf included)."""
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def render_prometheus(samples, gauges=None, prefix="vm_consolidation"):
+    """
+    Render summaries in the Prometheus text format.
+    `samples` is a list of (labels dict, summary()) pairs, e.g. one per training job.
+    `gauges` adds plain gauges as {name: (help text, [(labels dict, value), ...])}.
+    """
+    metrics = {}
+
+    def add(name, kind, help_text, labels, value):
+        entry = metrics.setdefault(name, (kind, help_text, []))
+        entry[2].append(f"{prefix}_{name}{_labels(labels)} {_number(value)}")
+
+    for labels, summary in samples:
+        for phase, seconds in summary["phase_seconds"].items():
+            add("phase_seconds_total", "counter", "Training time spent per phase", {**labels, "phase": phase}, seconds)
+        for name, value in summary["counters"].items():
+            add(f"{name}_total", "counter", f"Training {name.replace('_', ' ')} so far", labels, value)
+        add("steps_per_second", "gauge", "Training steps per second of instrumented time", labels, summary["steps_per_second"])
+        add("migrations_per_second", "gauge", "Successful migrations per second of instrumented time", labels, summary["migrations_per_second"])
+    for name, (help_text, values) in (gauges or {}).items():
+        for labels, value in values:
+            add(name, "gauge", help_text, labels, value)
+
+    lines = []
+    for name, (kind, help_text, values) in metrics.items():
+        lines.append(f"# HELP {prefix}_{name} {_escape(help_text, quotes=False)}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        lines.extend(values)
+    return "".join(line + "\n" for line in lines)
+
+# --- Profiling ---
+
+def profile_episode(agent, filename=None):
+    """
+    Run one more training episode of `agent` under cProfile. With `filename`, the raw stats are
+    dumped there (open with pstats, snakeviz or gprof2dot). Returns the pstats.Stats.
+    """
+    done = agent.stats.count
+    planned = agent.episodes
+    agent.episodes = done + 1
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(agent.train, start_episode=done + 1)
+    finally:
+        agent.episodes = planned
+    if filename:
+        profiler.dump_stats(filename)
+    return pstats.Stats(profiler)
+
+
+if __name__ == "__main__":
+    from src.agent.q_learning import QLearningAgent
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
+    parser = argparse.ArgumentParser(description="Instrumented Q-learning training run")
+    parser.add_argument("--episodes", type=int, default=200, help="Episodes to train")
+    parser.add_argument("--time_steps", type=int, default=50, help="Time steps per episode")
+    parser.add_argument("--hosts", type=int, default=12, help="Number of hosts")
+    parser.add_argument("--vms", type=int, default=18, help="Number of VMs")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible run")
+    parser.add_argument("--profile", type=str, default=None, help="Also profile one extra episode and dump cProfile stats here")
+    args = parser.parse_args()
+
+    agent = QLearningAgent(episodes=args.episodes, time_steps_per_episode=args.time_steps,
+                           num_hosts=args.hosts, num_vms=args.vms, rng=args.seed)
+    instrumentation = agent.enable_instrumentation()
+    agent.train()
+
+    summary = instrumentation.summary()
+    print("\n--- Phase Breakdown ---")
+    for phase, seconds in sorted(summary["phase_seconds"].items(), key=lambda item: -item[1]):
+        print(f"{phase:<16} {seconds:9.3f} s  {summary['phase_share'][phase] * 100:5.1f}%")
+    print(f"\nsteps/s: {summary['steps_per_second']:.1f}   migrations/s: {summary['migrations_per_second']:.1f}")
+    print(f"counters: {summary['counters']}")
+
+    if args.profile:
+        stats = profile_episode(agent, args.profile)
+        print(f"\n📁 cProfile stats for one episode written to {args.profile}")
+        stats.sort_stats("cumulative").print_stats(15)
@@ -0,0 +1,204 @@
+import logging
+import argparse
+
+import numpy as np
+
+from src.agent.q_learning import QLearningAgent
+
+# --- Cluster Features ---
+
+IDLE_CAP = 10  # Idle steps at which a host counts as fully idle in the mean-idle feature
+FEATURE_NAMES = ("avg_cpu", "avg_mem", "active", "overloaded", "underloaded", "mem_overloaded",
+                 "idle", "mean_idle", "bias")
+
+
+def cluster_features(bins, cpu_util, mem_util, vm_count, idle_steps, num_bins,
+                     overload_threshold=0.8, underload_threshold=0.2):
+    """
+    Fixed-size feature vector of a cluster, whatever its number of hosts.
+    Host arrays may carry leading axes (e.g. (num_envs, num_hosts)); the result then has shape
+    (..., num_bins + len(FEATURE_NAMES)). The first num_bins entries are the share of hosts
+    in each utilization bin, followed by FEATURE_NAMES: fractions of hosts or averages over
+    active hosts (all in [0, 1]), and a constant bias last.
+    """
+    num_hosts = bins.shape[-1]
+    active = vm_count > 0
+    # Overcommitted hosts (utilization above 1) count as full
+    cpu = np.where(active, np.clip(cpu_util, 0.0, 1.0), 0.0)
+    mem = np.where(active, np.clip(mem_util, 0.0, 1.0), 0.0)
+    num_active = np.count_nonzero(active, axis=-1)
+    safe_active = np.maximum(num_active, 1)
+    histogram = np.stack([np.count_nonzero(bins == b, axis=-1) for b in range(num_bins)], axis=-1)
+    extra = np.stack([
+        cpu.sum(axis=-1) / safe_active,
+        mem.sum(axis=-1) / safe_active,
+        num_active,
+        np.count_nonzero(active & (cpu > overload_threshold), axis=-1),
+        np.count_nonzero(active & (cpu < underload_threshold), axis=-1),
+        np.count_nonzero(active & (mem > overload_threshold), axis=-1),
+        np.count_nonzero(idle_steps > 0, axis=-1),
+        np.minimum(idle_steps, IDLE_CAP).sum(axis=-1) / IDLE_CAP,
+    ], axis=-1).astype(np.float64)
+    extra[..., 2:] /= num_hosts
+    bias = np.ones(extra.shape[:-1] + (1,))
+    return np.concatenate([histogram / num_hosts, extra, bias], axis=-1)
+
+# --- Linear Q-Function ---
+
+class LinearQFunction:
+    """
+    Q(s, a) = weights[a] · features(s): one weight vector per (bin_from, bin_to) action.
+
+    A drop-in for QTable inside QLearningAgent (get/set/max_value/best_action/save/load), but
+    its size is fixed by num_bins, not by the number of states seen. States are feature
+    vectors from cluster_features. Only actions whose two bins hold hosts are considered.
+
+    set() takes a normalized semi-gradient step that moves Q(s, a) exactly to the given value
+    for that state, so the agent's step size `alpha` keeps its tabular meaning. update() takes
+    the same step for a batch, averaging the steps of each action.
+    """
+
+    def __init__(self, num_bins=5, weights=None):
+        self.num_bins = num_bins
+        self.actions = [(i, j) for i in range(num_bins) for j in range(num_bins) if i != j]
+        self.action_index = {action: col for col, action in enumerate(self.actions)}
+        self.num_features = num_bins + len(FEATURE_NAMES)
+        self.weights = np.zeros((len(self.actions), self.num_features)) if weights is None else weights
+        self._from = np.array([i for i, _ in self.actions])
+        self._to = np.array([j for _, j in self.actions])
+
+    def __len__(self):
+        """Number of parameters (constant; a QTable counts states instead)."""
+        return self.weights.size
+
+    def _valid(self, features):
+        """(..., num_actions) mask of actions whose source and target bins are occupied."""
+        occupied = features[..., :self.num_bins] > 0
+        return occupied[..., self._from] & occupied[..., self._to]
+
+    def q_values(self, features):
+        """Q-values of every action, shape (..., num_actions)."""
+        return features @ self.weights.T
+
+    def get(self, state, action):
+        return float(np.asarray(state) @ self.weights[self.action_index[action]])
+
+    def set(self, state, action, value):
+        features = np.asarray(state, dtype=np.float64)
+        col = self.action_index[action]
+        error = value - features @ self.weights[col]
+        self.weights[col] += error * features / (features @ features)
+
+    def max_values(self, features):
+        """Highest Q-value over valid actions per state, or 0.0 where none is valid."""
+        valid = self._valid(features)
+        best = np.where(valid, self.q_values(features), -np.inf).max(axis=-1)
+        return np.where(valid.any(axis=-1), best, 0.0)
+
+    def max_value(self, state):
+        return float(self.max_values(np.asarray(state, dtype=np.float64)))
+
+    def best_action(self, state):
+        """Valid action with the highest Q-value, or None when no action is valid."""
+        features = np.asarray(state, dtype=np.float64)
+        valid = self._valid(features)
+        if not valid.any():
+            return None
+        return self.actions[int(np.argmax(np.where(valid, self.q_values(features), -np.inf)))]
+
+    def update(self, features, cols, targets, step):
+        """Batched semi-gradient step of size `step` toward `targets` for (features[k], cols[k])."""
+        if not len(features):
+            return
+        errors = targets - np.einsum("ij,ij->i", features, self.weights[cols])
+        scaled = step * errors / np.einsum("ij,ij->i", features, features)
+        grad = np.zeros_like(self.weights)
+        np.add.at(grad, cols, scaled[:, None] * features)
+        counts = np.bincount(cols, minlength=len(self.actions))
+        self.weights += grad / np.maximum(counts, 1)[:, None]
+
+    def save(self, filename):
+        """Write the weights to an uncompressed .npz file."""
+        with open(filename, "wb") as f:
+            np.savez(f, num_bins=np.int64(self.num_bins), weights=self.weights)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            function = cls(int(data["num_bins"]), data["weights"].copy())
+        if function.weights.shape != (len(function.actions), function.num_features):
+            raise ValueError(f"{filename} does not hold weights for this feature set")
+        return function
+
+# --- Agent ---
+
+class LinearQAgent(QLearningAgent):
+    """
+    QLearningAgent with a linear Q-function over cluster features instead of a Q-table.
+
+    Same interface (train, train_vectorized, get_state, get_action, save/load), but get_state()
+    returns a feature vector and `q_table` holds a LinearQFunction, so memory stays constant as
+    the fleet grows and similar clusters share what was learned. train() updates online after
+    every step; train_vectorized() makes one batched semi-gradient update per tick across
+    all replicas.
+    """
+
+    def __init__(self, *args, num_bins=5, q_table=None, **kwargs):
+        super().__init__(*args, num_bins=num_bins, q_table=LinearQFunction(num_bins) if q_table is None else q_table, **kwargs)
+
+    def get_state(self):
+        """Returns the cluster's feature vector (see cluster_features)."""
+        env = self.env
+        return cluster_features(self.get_host_bins(), env.get_cpu_utilizations(), env.get_mem_utilizations(),
+                                env.host_vm_count, env.host_idle_steps, self.num_bins,
+                                env.overload_threshold, env.underload_threshold)
+
+    def _vector_states(self, venv, bins):
+        return cluster_features(bins, venv.get_cpu_utilizations(), venv.get_mem_utilizations(),
+                                venv.host_vm_count, venv.host_idle_steps, self.num_bins,
+                                venv.overload_threshold, venv.underload_threshold)
+
+    def _batch_q_update(self, states, bin_from, bin_to, rewards, next_states):
+        """One batched semi-gradient Q-learning update over a batch of transitions."""
+        q = self.q_table
+        cols = np.array([q.action_index[a] for a in zip(bin_from.tolist(), bin_to.tolist())], dtype=np.int64)
+        targets = rewards + self.gamma * q.max_values(next_states)
+        q.update(states, cols, targets, self.alpha)
+
+    def load_q_table(self, filename="linear_q_function.npz"):
+        """Loads the weights written by save_q_table."""
+        try:
+            self.q_table = LinearQFunction.load(filename)
+            logging.info("✅ Linear Q-function loaded (%d weights)", len(self.q_table))
+        except FileNotFoundError:
+            logging.warning("⚠️ No existing Q-function found; starting fresh.")
+
+    def save_q_table(self, filename="linear_q_function.npz"):
+        self.q_table.save(filename)
+        logging.info("📁 Linear Q-function saved (%d weights)", len(self.q_table))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a linear function-approximation agent")
+    parser.add_argument("--hosts", type=int, default=500, help="Number of hosts")
+    parser.add_argument("--vms", type=int, default=1500, help="Number of VMs")
+    parser.add_argument("--episodes", type=int, default=200, help="Episodes to train")
+    parser.add_argument("--time_steps", type=int, default=50, help="Time steps per episode")
+    parser.add_argument("--num_envs", type=int, default=8, help="Replicas for batched training (1: online train())")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible run")
+    parser.add_argument("--save", type=str, default=None, help="Write the learned weights to this .npz")
+    args = parser.parse_args()
+
+    agent = LinearQAgent(episodes=args.episodes, time_steps_per_episode=args.time_steps,
+                         num_hosts=args.hosts, num_vms=args.vms, rng=args.seed)
+    if args.num_envs > 1:
+        agent.train_vectorized(num_envs=args.num_envs)
+    else:
+        agent.train()
+    if args.save:
+        agent.save_q_table(args.save)
+
+    summary = agent.stats.summary()
+    print(f"\n--- {summary['episodes']} episodes on {args.hosts} hosts ---")
+    for field in agent.stats.fields:
+        print(f"{field:<16} mean {summary[field]['mean']:12.2f}   last {summary['window']}: {summary[field]['rolling_mean']:12.2f}")
@@ -0,0 +1,168 @@
+import time
+import logging
+import argparse
+
+import numpy as np
+
+# --- Consolidation Planner ---
+
+def _host_bins(env, num_bins):
+    """Utilization bin of every host, as in QLearningAgent.get_host_bins."""
+    util = np.where(env.host_vm_count > 0, env.get_cpu_utilizations(), 0.0)
+    return np.minimum((util * num_bins).astype(np.int64), num_bins - 1)
+
+
+def _pick_destination(env, vm_idx, src, blocked, policy, overload_threshold):
+    """
+    Destination host for one VM being drained off `src`, or None.
+    Eligible hosts are online, already active, not being drained, and stay at or below
+    `overload_threshold` CPU utilization after the move. With a policy, the target bin is
+    its best recorded action out of the source's bin for the current state; among the
+    eligible hosts of that bin (or of all bins, as the heuristic fallback) the best fit wins,
+    i.e. the host left with the least free CPU.
+    """
+    cpu, mem = env.vm_cpu[vm_idx], env.vm_mem[vm_idx]
+    free_after = env.host_free_cpu - cpu
+    eligible = (
+        (env.host_vm_count > 0)
+        & env.host_online
+        & ~blocked
+        & (free_after >= 0)
+        & (env.host_free_mem >= mem)
+        & (env.host_total_cpu - free_after <= overload_threshold * env.host_total_cpu)
+    )
+    if not eligible.any():
+        return None
+    if policy is not None:
+        bins = _host_bins(env, policy.num_bins)
+        state = tuple(np.bincount(bins, minlength=policy.num_bins).tolist())
+        for bin_from, bin_to in policy.actions_for(state):
+            if bin_from != bins[src]:
+                continue
+            in_bin = eligible & (bins == bin_to)
+            if in_bin.any():
+                return int(np.argmin(np.where(in_bin, free_after, np.inf)))
+    return int(np.argmin(np.where(eligible, free_after, np.inf)))
+
+
+def plan_consolidation(env, policy=None, drain_below=None, max_migrations=None, max_migrated_mem=None,
+                       time_budget=None, apply=False):
+    """
+    Build an ordered migration plan that drains underloaded hosts so they can be shut down.
+
+    Hosts below `drain_below` CPU utilization (default: env.underload_threshold) are drained
+    least loaded first, moving their largest VMs first. Planning runs on a fork of the
+    environment with its simulate_migration/rollback undo log, so every decision sees exact
+    incremental metrics and `env` itself is never touched mid-plan (an exception or a cutoff
+    cannot leave it half-migrated). A host is only part of the plan if all of its VMs find a
+    destination; otherwise its moves are rolled back and it stays up.
+
+    Limits (None = unlimited): `max_migrations`, `max_migrated_mem` (sum of moved VM memory)
+    and `time_budget` (seconds of planning). When a limit is hit, the plan stops after the
+    last fully drained host and `stopped_by` names the limit.
+
+    `policy` is a GreedyPolicy (src/agent/policy.py) choosing target bins; without one, or
+    for states it has not seen, best-fit placement is used. With `apply`, the finished plan is
+    then executed on `env` with checked migrations.
+    """
+    start = time.perf_counter()
+    deadline = None if time_budget is None else start + time_budget
+    threshold = env.underload_threshold if drain_below is None else drain_below
+    before = env.get_metrics()
+    target = env
+    env = target.fork(rng=0)  # Fixed seed: spawning a child stream would advance the caller's RNG
+
+    util = env.get_cpu_utilizations()
+    candidates = np.flatnonzero((env.host_vm_count > 0) & (util < threshold))
+    candidates = candidates[np.argsort(util[candidates], kind="stable")]
+    blocked = np.zeros(len(env.hosts), dtype=bool)
+    blocked[candidates] = True  # Never move VMs onto hosts that are queued for draining
+
+    migrations = []
+    drained = []
+    migrated_mem = 0.0
+    stopped_by = None
+
+    for src in candidates.tolist():
+        vm_idx = sorted(env._host_slots[src], key=lambda i: (-env.vm_cpu[i], i))
+        host_mem = float(env.vm_mem[vm_idx].sum())
+        if max_migrations is not None and len(migrations) + len(vm_idx) > max_migrations:
+            stopped_by = "max_migrations"
+            break
+        if max_migrated_mem is not None and migrated_mem + host_mem > max_migrated_mem:
+            stopped_by = "max_migrated_mem"
+            break
+
+        moves = []
+        for idx in vm_idx:
+            if deadline is not None and time.perf_counter() > deadline:
+                stopped_by = "time_budget"
+                break
+            dst = _pick_destination(env, idx, src, blocked, policy, env.overload_threshold)
+            if dst is None:
+                break
+            vm = env._vm_views[idx]
+            env.simulate_migration(src, dst, vm)
+            moves.append({"vm": vm.id, "src": src, "dst": dst,
+                          "cpu": float(env.vm_cpu[idx]), "mem": float(env.vm_mem[idx])})
+
+        if len(moves) < len(vm_idx):
+            for _ in moves:
+                env.rollback()
+            if stopped_by is not None:
+                break
+            blocked[src] = False  # Stays up, so it can take VMs from the remaining hosts
+            continue
+        migrations.extend(moves)
+        drained.append(src)
+        migrated_mem += host_mem
+
+    after = env.get_metrics()
+    if apply:
+        for move in migrations:
+            if not target.migrate_vm(target.get_vm(move["vm"]), target.hosts[move["dst"]]):
+                raise RuntimeError(f"Planned migration of VM {move['vm']} to host {move['dst']} failed")
+
+    elapsed = time.perf_counter() - start
+    logging.info("🗺️ Plan: %d migrations drain %d hosts (%.1f ms)", len(migrations), len(drained), elapsed * 1000)
+    return {
+        "migrations": migrations,
+        "drained_hosts": drained,
+        "migrated_mem": migrated_mem,
+        "before": before,
+        "after": after,
+        "stopped_by": stopped_by,
+        "planning_seconds": elapsed,
+    }
+
+
+if __name__ == "__main__":
+    from src.env.cloud_env import CloudEnvironment
+    from src.agent.q_table import QTable
+    from src.agent.policy import GreedyPolicy
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
+    parser = argparse.ArgumentParser(description="Plan a consolidation that drains underloaded hosts")
+    parser.add_argument("--hosts", type=int, default=1000, help="Number of hosts")
+    parser.add_argument("--vms", type=int, default=1500, help="Number of VMs")
+    parser.add_argument("--strategy", default="worst_fit", choices=["first_fit", "best_fit", "worst_fit"],
+                        help="Initial placement (worst_fit spreads VMs, leaving hosts to drain)")
+    parser.add_argument("--drain_below", type=float, default=0.4,
+                        help="Drain hosts below this CPU utilization (the environment's underload threshold is 0.2)")
+    parser.add_argument("--max_migrations", type=int, default=None, help="Migration limit")
+    parser.add_argument("--max_migrated_mem", type=float, default=None, help="Limit on total migrated memory")
+    parser.add_argument("--time_budget", type=float, default=None, help="Planning budget in seconds")
+    parser.add_argument("--q_table", type=str, default=None, help="Q-table (.npz) whose greedy policy picks target bins")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the generated cluster")
+    args = parser.parse_args()
+
+    env = CloudEnvironment(num_hosts=args.hosts, num_vms=args.vms, rng=args.seed)
+    env.reset(args.strategy)
+    policy = GreedyPolicy.from_q_table(QTable.load(args.q_table)) if args.q_table else None
+    plan = plan_consolidation(env, policy, args.drain_below, args.max_migrations, args.max_migrated_mem, args.time_budget)
+
+    print(f"\n--- Plan ({plan['planning_seconds'] * 1000:.1f} ms) ---")
+    print(f"migrations: {len(plan['migrations'])}   drained hosts: {len(plan['drained_hosts'])}   "
+          f"migrated mem: {plan['migrated_mem']:.0f}   stopped by: {plan['stopped_by'] or '-'}")
+    for key in plan["before"]:
+        print(f"{key:<24} {plan['before'][key]:>12.2f} -> {plan['after'][key]:.2f}")
@@ -0,0 +1,181 @@
+import time
+import logging
+
+import numpy as np
+
+from src.agent.shared_q_table import SharedQTable, EMPTY
+
+# --- Greedy Policy ---
+
+class GreedyPolicy:
+    """
+    Frozen greedy policy for serving: a state -> ranked actions lookup precomputed from a Q-table.
+
+    Built once (from_q_table); a lookup is then a single dict access with no Q-values touched.
+    Each state keeps its recorded actions ordered by Q-value, so when the argmax action has no
+    feasible migration in a snapshot the next best one is tried. Unseen states get no action.
+    """
+
+    def __init__(self, num_bins, ranked, built_at=None):
+        self.num_bins = num_bins
+        self.ranked = ranked
+        self.built_at = built_at or time.time()
+
+    def __len__(self):
+        return len(self.ranked)
+
+    @classmethod
+    def from_q_table(cls, table):
+        """Precompute the ranked actions of every state in a QTable or SharedQTable."""
+        if isinstance(table, SharedQTable):
+            slots = np.flatnonzero(table.keys[:, 0] != EMPTY)
+            states, values, visited = table.keys[slots], table.values[slots], table.visited[slots]
+        else:
+            n = len(table)
+            states, values, visited = table.states[:n], table.values[:n], table.visited[:n]
+        masked = np.where(visited, values, -np.inf)
+        order = np.argsort(-masked, axis=1, kind="stable")
+        counts = visited.sum(axis=1)
+        actions = table.actions
+        ranked = {}
+        for state, row, count in zip(states.tolist(), order.tolist(), counts.tolist()):
+            if count:
+                ranked[tuple(state)] = tuple(actions[c] for c in row[:count])
+        logging.info("🧭 Greedy policy built for %d states", len(ranked))
+        return cls(table.num_bins, ranked)
+
+    def actions_for(self, state):
+        """Recorded actions for a state, best first (empty for unseen states)."""
+        return self.ranked.get(state, ())
+
+    def recommend(self, snapshot, max_migrations=1):
+        """
+        Recommend up to `max_migrations` migrations for a cluster snapshot:
+          {"hosts": [{"id", "total_cpu", "total_mem", "cpu_util", "mem_util"}, ...],
+           "vms":   [{"id", "host", "cpu", "mem"}, ...]}          (optional)
+        Utilizations are fractions of capacity (or pass "cpu_used"/"mem_used" instead); memory is
+        only checked when hosts give a "total_mem".
+        Candidates mirror training: the busiest host of the source bin gives up its smallest VM
+        to the least loaded host of the target bin that fits it. Each migration is applied to
+        a working copy before the next lookup. Without "vms", only hosts can be named, so at
+        most one migration (with "vm": None) is returned.
+        """
+        if max_migrations < 1:
+            raise ValueError("max_migrations must be at least 1")
+        cluster = _Cluster(snapshot)
+        if not cluster.has_vms:
+            max_migrations = min(max_migrations, 1)
+        migrations = []
+        states = []
+        for _ in range(max_migrations):
+            bins = cluster.bins(self.num_bins)
+            state = tuple(np.bincount(bins, minlength=self.num_bins).tolist())
+            states.append(list(state))
+            move = None
+            for action in self.actions_for(state):
+                move = cluster.select(bins, *action)
+                if move is not None:
+                    break
+            if move is None:
+                break
+            src, vm, dst = move
+            cluster.apply(src, vm, dst)
+            migrations.append({
+                "src": cluster.host_ids[src],
+                "vm": None if vm is None else cluster.vm_ids[vm],
+                "dst": cluster.host_ids[dst],
+                "action": list(action),
+            })
+        result = {"state": states[0], "migrations": migrations}
+        if not migrations:
+            result["reason"] = "unseen_state" if not self.actions_for(tuple(states[0])) else "no_feasible_migration"
+        return result
+
+    def recommend_batch(self, snapshots, max_migrations=1):
+        """recommend() for many snapshots; a malformed snapshot yields {"error": ...} in its slot."""
+        results = []
+        for snapshot in snapshots:
+            try:
+                results.append(self.recommend(snapshot, snapshot.get("max_migrations", max_migrations)))
+            except (KeyError, TypeError, ValueError) as e:
+                results.append({"error": f"Invalid snapshot: {e}"})
+        return results
+
+# --- Snapshot Arrays ---
+
+class _Cluster:
+    """Array view of a posted cluster snapshot that migrations can be applied to."""
+
+    def __init__(self, snapshot):
+        hosts = snapshot["hosts"]
+        if not hosts:
+            raise ValueError("snapshot has no hosts")
+        self.host_ids = [h["id"] for h in hosts]
+        self.cpu_cap = np.array([float(h["total_cpu"]) for h in hosts])
+        self.mem_cap = np.array([float(h.get("total_mem", np.inf)) for h in hosts])
+        self.cpu_used = np.array([_used(h, "cpu", cap) for h, cap in zip(hosts, self.cpu_cap)])
+        self.mem_used = np.array([_used(h, "mem", cap) for h, cap in zip(hosts, self.mem_cap)])
+        if (self.cpu_cap <= 0).any():
+            raise ValueError("total_cpu must be positive")
+
+        vms = snapshot.get("vms")
+        self.has_vms = vms is not None
+        self.vm_ids = []
+        self.host_vms = [[] for _ in hosts]
+        if self.has_vms:
+            index = {host_id: i for i, host_id in enumerate(self.host_ids)}
+            self.vm_ids = [vm["id"] for vm in vms]
+            self.vm_cpu = np.array([float(vm["cpu"]) for vm in vms])
+            self.vm_mem = np.array([float(vm.get("mem", 0.0)) for vm in vms])
+            for i, vm in enumerate(vms):
+                if vm.get("host") is not None:
+                    self.host_vms[index[vm["host"]]].append(i)
+            self.vm_count = np.array([len(v) for v in self.host_vms])
+        else:
+            self.vm_count = (self.cpu_used > 0).astype(np.int64)
+        self.moved = set()
+
+    def bins(self, num_bins):
+        """Utilization bin of every host, as in QLearningAgent.get_host_bins."""
+        util = np.where(self.vm_count > 0, self.cpu_used / self.cpu_cap, 0.0)
+        return np.minimum((util * num_bins).astype(np.int64), num_bins - 1)
+
+    def select(self, bins, bin_from, bin_to):
+        """(src, vm, dst) indices for an action, or None when it has no feasible migration."""
+        util = self.cpu_used / self.cpu_cap
+        src_mask = (bins == bin_from) & (self.vm_count > 0)
+        if not src_mask.any():
+            return None
+        src = int(np.argmax(np.where(src_mask, util, -np.inf)))
+        if self.has_vms:
+            movable = [v for v in self.host_vms[src] if v not in self.moved]
+            if not movable:
+                return None
+            vm = min(movable, key=lambda v: self.vm_cpu[v])
+            cpu, mem = self.vm_cpu[vm], self.vm_mem[vm]
+        else:
+            vm, cpu, mem = None, 0.0, 0.0
+        fits = (bins == bin_to) & (self.cpu_used + cpu <= self.cpu_cap) & (self.mem_used + mem <= self.mem_cap)
+        fits[src] = False
+        if not fits.any():
+            return None
+        dst = int(np.argmin(np.where(fits, util, np.inf)))
+        return src, vm, dst
+
+    def apply(self, src, vm, dst):
+        if vm is None:
+            return
+        self.host_vms[src].remove(vm)
+        self.host_vms[dst].append(vm)
+        self.vm_count[src] -= 1
+        self.vm_count[dst] += 1
+        for used, amount in ((self.cpu_used, self.vm_cpu[vm]), (self.mem_used, self.vm_mem[vm])):
+            used[src] -= amount
+            used[dst] += amount
+        self.moved.add(vm)
+
+
+def _used(host, resource, capacity):
+    if f"{resource}_used" in host or not np.isfinite(capacity):
+        return float(host.get(f"{resource}_used", 0.0))
+    return float(host.get(f"{resource}_util", 0.0)) * capacity
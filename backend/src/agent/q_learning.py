@@ -1,11 +1,21 @@
-import random
+import os
 import json
 import logging
 import math
-from collections import defaultdict
+import time
+
+import numpy as np
 
 # Assuming src.env.cloud_env is correctly set up
 from src.env.cloud_env import CloudEnvironment
+from src.env.vector_env import VectorCloudEnvironment
+from src.agent.q_table import QTable
+from src.agent.shared_q_table import SharedQTable
+from src.agent.instrumentation import Instrumentation
+from src.agent.episode_stats import EpisodeStats
+from src.agent.replay import ReplayBuffer
+
+DEFAULT_Q_TABLE = "q_table_consolidated.npz"
 
 # Logging setup
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
@@ -18,7 +28,11 @@ class QLearningAgent:
                  gamma=0.9,
                  episodes=2000,
                  time_steps_per_episode=50,
-                 num_bins=5):
+                 num_bins=5,
+                 num_hosts=12,
+                 num_vms=18,
+                 q_table=None,
+                 rng=None):
         # Learning rate parameters
         self.initial_alpha = alpha
         self.alpha = alpha
@@ -40,84 +54,140 @@ class QLearningAgent:
         # State representation parameters
         self.num_bins = num_bins  # Number of utilization bins (e.g., 0-20%, 20-40%, etc.)
 
-        self.q_table = defaultdict(lambda: defaultdict(float))
-        self.env = CloudEnvironment()
-        self.episode_rewards = []
+        # Any table with the QTable interface works, e.g. a SharedQTable for parallel training
+        self.q_table = q_table if q_table is not None else QTable(num_bins)
+
+        # One seed (or Generator) drives everything: the agent's exploration and, through a
+        # child stream, the environment. Same seed -> bit-identical training run.
+        self.rng = np.random.default_rng(rng)
+        self.env = CloudEnvironment(num_hosts=num_hosts, num_vms=num_vms, rng=self.rng.spawn(1)[0])
+        # Per-episode reward, energy, migrations and SLA violations in bounded memory
+        self.stats = EpisodeStats()
+
+        # Phase timers for train(); None keeps the training loop free of any timing calls
+        self.instrumentation = None
+
+        # Experience replay (see enable_replay); None keeps the one immediate update per step
+        self.replay = None
+        self.replay_batch_size = 32
+        self.replay_updates = 1
+
+    def enable_instrumentation(self, history=1000):
+        """Attach phase timers and counters to train(); returns the Instrumentation (kept if already enabled)."""
+        if self.instrumentation is None:
+            self.instrumentation = Instrumentation(history)
+        return self.instrumentation
 
-    def load_q_table(self, filename="q_table_consolidated.json"):
-        """Loads the Q-table from a JSON file."""
+    def disable_instrumentation(self):
+        """Detach the timers; returns the final Instrumentation (or None)."""
+        instrumentation, self.instrumentation = self.instrumentation, None
+        return instrumentation
+
+    def enable_replay(self, capacity=100000, batch_size=32, updates_per_step=1, prioritized=False):
+        """
+        Learn from a replay buffer: every transition is stored, and each environment step (or
+        vectorized tick) is followed by `updates_per_step` minibatch updates of `batch_size`
+        sampled transitions instead of the single immediate update. Returns the ReplayBuffer.
+        """
+        if not hasattr(self.q_table, "row"):
+            raise ValueError("Experience replay needs a Q-table with state rows")
+        self.replay = ReplayBuffer(capacity, prioritized=prioritized, rng=self.rng.spawn(1)[0])
+        self.replay_batch_size = batch_size
+        self.replay_updates = updates_per_step
+        return self.replay
+
+    def disable_replay(self):
+        """Go back to immediate updates; returns the buffer (or None)."""
+        replay, self.replay = self.replay, None
+        return replay
+
+    def load_q_table(self, filename=DEFAULT_Q_TABLE):
+        """
+        Loads the Q-table from a binary .npz file.
+        Legacy .json tables are still read (and used as a fallback when the .npz is missing);
+        convert them once with `python -m src.agent.q_table <json> <npz>`.
+        A directory is opened as a read-only SharedQTable, mapped without copying (for serving).
+        """
+        legacy = os.path.splitext(filename)[0] + ".json"
         try:
-            with open(filename, "r") as f:
-                data = json.load(f)
-                self.q_table = defaultdict(lambda: defaultdict(float))
-                for state_str, actions in data.items():
-                    state = eval(state_str)
-                    self.q_table[state] = defaultdict(
-                        float, {eval(act): val for act, val in actions.items()}
-                    )
-                logging.info("✅ Q-table loaded with %d states", len(self.q_table))
+            if os.path.isdir(filename):
+                self.q_table = SharedQTable(filename, mode="r")
+            elif filename.endswith(".json"):
+                self.q_table = QTable.from_json(filename)
+            elif not os.path.exists(filename) and os.path.exists(legacy):
+                logging.info("ℹ️ %s not found; reading legacy %s", filename, legacy)
+                self.q_table = QTable.from_json(legacy)
+            else:
+                self.q_table = QTable.load(filename)
+            logging.info("✅ Q-table loaded with %d states", len(self.q_table))
         except (FileNotFoundError, json.JSONDecodeError):
             logging.warning("⚠️ No existing Q-table found; starting fresh.")
 
-    def save_q_table(self, filename="q_table_consolidated.json"):
-        """Saves the Q-table to a JSON file."""
-        string_q = {
-            str(state): {str(act): val for act, val in actions.items()}
-            for state, actions in self.q_table.items()
-        }
-        with open(filename, "w") as f:
-            json.dump(string_q, f, indent=2)
+    def save_q_table(self, filename=DEFAULT_Q_TABLE):
+        """Saves the Q-table to a binary .npz file."""
+        self.q_table.save(filename)
         logging.info("📁 Q-table saved with %d states", len(self.q_table))
 
     def get_hosts_by_bins(self):
         """Groups hosts into utilization bins based on CPU utilization."""
-        bin_edges = [i / self.num_bins for i in range(self.num_bins + 1)]
-        hosts_by_bin = [[] for _ in range(self.num_bins)]
-        for host in self.env.hosts:
-            util = host.get_cpu_utilization() if host.vms else 0.0
-            bin_idx = min(int(util * self.num_bins), self.num_bins - 1)
-            hosts_by_bin[bin_idx].append(host)
-        return hosts_by_bin
+        bin_idx = self.get_host_bins()
+        return [[self.env.hosts[i] for i in np.flatnonzero(bin_idx == b)] for b in range(self.num_bins)]
+
+    def get_host_bins(self):
+        """Returns the utilization bin index of every host as an array."""
+        util = np.where(self.env.host_vm_count > 0, self.env.get_cpu_utilizations(), 0.0)
+        return np.minimum((util * self.num_bins).astype(np.int64), self.num_bins - 1)
 
     def get_state(self):
         """Returns the state as a tuple of host counts in each utilization bin."""
-        hosts_by_bin = self.get_hosts_by_bins()
-        return tuple(len(bin_hosts) for bin_hosts in hosts_by_bin)
+        counts = np.bincount(self.get_host_bins(), minlength=self.num_bins)
+        return tuple(counts.tolist())
+
+    def _choice(self, items):
+        """Uniform pick from a non-empty list using the agent's RNG."""
+        return items[self.rng.integers(len(items))]
 
     def get_action(self, state, hosts_by_bin):
         """Chooses an action (bin_from, bin_to) using epsilon-greedy policy with heuristic-guided exploration."""
-        if random.random() < self.epsilon:
+        explore = self.rng.random() < self.epsilon
+        if self.instrumentation is not None:
+            self.instrumentation.count_action(explore)
+        if explore:
             # Exploration: Score (bin_from, bin_to) pairs based on immediate reward
-            scored_actions = []
+            candidates = []
             for bin_from in range(self.num_bins):
                 for bin_to in range(self.num_bins):
                     if bin_from == bin_to or not hosts_by_bin[bin_from] or not hosts_by_bin[bin_to]:
                         continue
                     # Sample one migration
-                    src = random.choice(hosts_by_bin[bin_from])
-                    vm = min(src.vms, key=lambda v: v.cpu_req, default=None) if src.vms else None
+                    src = self._choice(hosts_by_bin[bin_from])
+                    vm = self._smallest_vm(src)
                     if not vm:
                         continue
                     dst_candidates = [h for h in hosts_by_bin[bin_to] if h.can_host(vm)]
                     if not dst_candidates:
                         continue
-                    dst = random.choice(dst_candidates)
-                    before = self.env.get_metrics()
-                    success = self.env.simulate_migration(src.id, dst.id, vm)
-                    after = self.env.get_metrics()
-                    reward = self.calculate_reward(before, after, not success)
-                    self.env.rollback()
-                    scored_actions.append(((bin_from, bin_to), reward))
-            if not scored_actions:
+                    dst = self._choice(dst_candidates)
+                    candidates.append(((bin_from, bin_to), src.id, dst.id, vm))
+            if not candidates:
                 return None
+            # Predict every candidate's outcome in one side-effect-free batch
+            before = self.env.get_metrics()
+            deltas = self.env.evaluate_migrations(
+                [c[1] for c in candidates], [c[2] for c in candidates], [c[3] for c in candidates]
+            )
+            after = {key: before[key] + deltas[key] for key in before}
+            rewards = self.calculate_rewards(before, after, ~deltas['feasible'])
+            scored_actions = [(c[0], reward) for c, reward in zip(candidates, rewards.tolist())]
             # Select randomly among top-5 actions
             scored_actions.sort(key=lambda x: x[1], reverse=True)
             top_actions = scored_actions[:min(5, len(scored_actions))]
-            return random.choice(top_actions)[0]
+            return self._choice(top_actions)[0]
         else:
             # Exploitation: Choose action with highest Q-value
-            if state in self.q_table and self.q_table[state]:
-                return max(self.q_table[state], key=self.q_table[state].get)
+            best = self.q_table.best_action(state)
+            if best is not None:
+                return best
             # Fallback: Random valid action
             valid_pairs = [
                 (bin_from, bin_to)
@@ -125,7 +195,30 @@ class QLearningAgent:
                 for bin_to in range(self.num_bins)
                 if bin_from != bin_to and hosts_by_bin[bin_from] and hosts_by_bin[bin_to]
             ]
-            return random.choice(valid_pairs) if valid_pairs else None
+            return self._choice(valid_pairs) if valid_pairs else None
+
+    def select_migration(self, hosts_by_bin, action):
+        """
+        The migration an action (bin_from, bin_to) stands for: the busiest host of bin_from gives
+        its smallest VM to the least loaded host of bin_to that fits it. Returns (vm, dst) or None.
+        """
+        bin_from, bin_to = action
+        src_candidates = [h for h in hosts_by_bin[bin_from] if self.env.host_vm_count[h.id]]
+        if not src_candidates:
+            return None
+        src = max(src_candidates, key=lambda h: h.get_cpu_utilization())
+        vm = self._smallest_vm(src)
+        if not vm:
+            return None
+        dst_candidates = [h for h in hosts_by_bin[bin_to] if h.can_host(vm)]
+        if not dst_candidates:
+            return None
+        return vm, min(dst_candidates, key=lambda h: h.get_cpu_utilization())
+
+    @staticmethod
+    def _smallest_vm(host):
+        """The host's smallest-CPU VM (ties go to the lowest VM slot, as in the vectorized env), or None."""
+        return min(host.vms, key=lambda v: (v.cpu_req, v._idx), default=None)
 
     def calculate_reward(self, before, after, failed):
         """
@@ -137,25 +230,35 @@ class QLearningAgent:
         """
         if failed:
             return -50
+        return float(self.calculate_rewards(before, after, False))
+
+    def calculate_rewards(self, before, after, failed, idle_hosts=None):
+        """
+        Vectorized form of calculate_reward: metric values and `failed` may be arrays
+        (one entry per candidate or per environment replica).
+        `idle_hosts` is the number of hosts idle for more than 5 steps (default: from self.env).
+        """
+        if idle_hosts is None:
+            idle_hosts = np.count_nonzero(self.env.host_idle_steps > 5)
 
-        power_before = before['total_power_consumption']
-        power_after = after['total_power_consumption']
-        power_saved_pct = ((power_before - power_after) / max(power_before, 1)) * 100
+        power_before = np.asarray(before['total_power_consumption'], dtype=np.float64)
+        power_after = np.asarray(after['total_power_consumption'], dtype=np.float64)
+        power_saved_pct = ((power_before - power_after) / np.maximum(power_before, 1)) * 100
 
-        shutdown_bonus = 1000 * max(0, before['active_hosts'] - after['active_hosts'])
+        shutdown_bonus = 1000 * np.maximum(0, np.asarray(before['active_hosts']) - after['active_hosts'])
 
         migration_cost = 1 + getattr(before, 'last_vm_cpu_req', 1) * 0.5
 
-        sla_penalty = -100 * after['sla_violations']
+        sla_penalty = -100 * np.asarray(after['sla_violations'])
 
-        idle_penalty = sum(20 for h in self.env.hosts if getattr(h, "idle_steps", 0) > 5)
+        idle_penalty = 20 * np.asarray(idle_hosts)
 
-        active_host_penalty = -20 * after['active_hosts']
+        active_host_penalty = -20 * np.asarray(after['active_hosts'])
 
         util = after.get('cpu_utilization', 0)
         util_bonus = -abs(util - 0.75) * 50
 
-        return (
+        reward = (
             power_saved_pct
             + shutdown_bonus
             - migration_cost
@@ -164,47 +267,104 @@ class QLearningAgent:
             + active_host_penalty
             + util_bonus
         )
+        return np.where(failed, -50.0, reward)
+
+    def _finish_episode(self, ep, total_reward, on_episode, energy_wh=0.0, migrations=0, sla_violations=0):
+        """Record an episode's results and publish its event. Returns False if the hook asked to stop."""
+        self.stats.push(ep, reward=total_reward, energy_wh=energy_wh, migrations=migrations, sla_violations=sla_violations)
+
+        if ep % 50 == 0:
+            avg = self.stats.rolling_mean("reward")
+            logging.info(f"📊 Episode {ep}: Avg Reward (last {min(self.stats.count, self.stats.window)}) = {avg:.2f}, ε = {self.epsilon:.3f}")
+
+        if on_episode is None:
+            return True
+        event = {
+            "episode": ep,
+            "reward": float(total_reward),
+            "epsilon": self.epsilon,
+            "alpha": self.alpha,
+            "q_states": len(self.q_table),
+            "energy_wh": float(energy_wh),
+            "migrations": int(migrations),
+            "sla_violations": int(sla_violations),
+        }
+        return on_episode(event) is not False
 
-    def train(self):
-        """Trains the Q-learning agent with decay scheduling and scalable state-action handling."""
-        for ep in range(1, self.episodes + 1):
+    def train(self, on_episode=None, start_episode=1):
+        """
+        Trains the Q-learning agent with decay scheduling and scalable state-action handling.
+        `on_episode(event)` is called after every episode with a dict holding the episode number,
+        its total reward, the current epsilon/alpha, the Q-table size, and the episode's energy in Wh,
+        migrations and SLA violations; returning False stops training.
+        `start_episode` continues an interrupted schedule (e.g. stats.count + 1) up to `self.episodes`.
+        With instrumentation enabled, each phase of the loop is timed (see enable_instrumentation).
+        """
+        instr = self.instrumentation
+        t = 0.0
+        for ep in range(start_episode, self.episodes + 1):
+            if instr:
+                t = time.perf_counter()
             self.env.reset()
             state = self.get_state()
             total_reward = 0
+            migrations = 0
+            if instr:
+                t = instr.lap("reset", t)
 
             for _ in range(self.time_steps):
+                # A step that bails out with `continue` charges its candidate search to the next "state" lap
                 hosts_by_bin = self.get_hosts_by_bins()
+                if instr:
+                    t = instr.lap("state", t)
                 action = self.get_action(state, hosts_by_bin)
+                if instr:
+                    t = instr.lap("explore_scoring" if instr.explored else "action", t)
+                    instr.count("steps")
                 if action is None:
                     break
 
-                bin_from, bin_to = action
-                src_candidates = [h for h in hosts_by_bin[bin_from] if h.vms]
-                if not src_candidates:
-                    continue
-                src = max(src_candidates, key=lambda h: h.get_cpu_utilization())
-                vm = min(src.vms, key=lambda v: v.cpu_req, default=None)
-                if not vm:
+                move = self.select_migration(hosts_by_bin, action)
+                if move is None:
                     continue
-                dst_candidates = [h for h in hosts_by_bin[bin_to] if h.can_host(vm)]
-                if not dst_candidates:
-                    continue
-                dst = min(dst_candidates, key=lambda h: h.get_cpu_utilization())
+                vm, dst = move
+                if instr:
+                    t = instr.lap("candidates", t)
 
                 before = self.env.get_metrics()
                 before['last_vm_cpu_req'] = vm.cpu_req
+                if instr:
+                    t = instr.lap("metrics", t)
                 migrated = self.env.migrate_vm(vm, dst)
+                migrations += migrated
+                if instr:
+                    t = instr.lap("migration", t)
+                    instr.count("migrations" if migrated else "failed_migrations")
                 after = self.env.get_metrics()
+                if instr:
+                    t = instr.lap("metrics", t)
 
                 reward = self.calculate_reward(before, after, not migrated)
                 total_reward += reward
+                if instr:
+                    t = instr.lap("reward", t)
 
                 self.env.tick_idle_counters()
                 next_state = self.get_state()
-
-                old_q = self.q_table[state][action]
-                future_q = max(self.q_table[next_state].values()) if self.q_table[next_state] else 0.0
-                self.q_table[state][action] = old_q + self.alpha * (reward + self.gamma * future_q - old_q)
+                if instr:
+                    t = instr.lap("state", t)
+
+                if self.replay is None:
+                    old_q = self.q_table.get(state, action)
+                    future_q = self.q_table.max_value(next_state)
+                    self.q_table.set(state, action, old_q + self.alpha * (reward + self.gamma * future_q - old_q))
+                else:
+                    q = self.q_table
+                    self.replay.add(q.row(state, create=True), q.action_index[action], reward, q.row(next_state, create=True))
+                    for _ in range(self.replay_updates):
+                        self.replay_update()
+                if instr:
+                    t = instr.lap("q_update", t)
 
                 state = next_state
 
@@ -213,15 +373,194 @@ class QLearningAgent:
             self.epsilon = self.min_epsilon + \
                 (self.max_epsilon - self.min_epsilon) * math.exp(-self.decay_rate * ep)
 
-            self.episode_rewards.append(total_reward)
+            keep_going = self._finish_episode(ep, total_reward, on_episode, self.env.energy_wh, migrations,
+                                              len(self.env._unplaced))
+            if instr:
+                instr.lap("logging", t)
+                instr.end_episode(ep)
+            if not keep_going:
+                logging.info("⏹️ Training stopped after episode %d", ep)
+                break
+
+    def train_vectorized(self, num_envs=8, seed=None, on_episode=None):
+        """
+        Trains on `num_envs` independent cluster replicas stepped in lockstep: the agent's own
+        cluster (as reset() leaves it) and num_envs - 1 generated ones of the same size.
+        Each round runs one episode per replica: bin computation, candidate selection,
+        migration and metric deltas are batched array operations across replicas, and the
+        Q-table gets one batched update over all transitions of a tick. Runs
+        ceil(episodes / num_envs) rounds, so the total episode count matches train().
+        `on_episode` behaves as in train(). Randomness comes from `seed` if given, else the agent's RNG.
+        """
+        rng = np.random.default_rng(seed) if seed is not None else self.rng
+        venv = VectorCloudEnvironment(num_envs, rng=rng.spawn(1)[0], base_env=self.env)
+        rounds = math.ceil(self.episodes / num_envs)
+        ep = 0
+        stopped = False
+
+        for _ in range(rounds):
+            venv.reset()
+            bins = venv.get_host_bins(self.num_bins)
+            states = self._vector_states(venv, bins)
+            total_rewards = np.zeros(num_envs)
+            migrations = np.zeros(num_envs, dtype=np.int64)
+            running = np.ones(num_envs, dtype=bool)
+
+            for _ in range(self.time_steps):
+                bin_from, bin_to = self._select_actions_vectorized(venv, states, bins, rng)
+                running &= bin_from >= 0
+                if not running.any():
+                    break
+
+                src, vm, dst, valid = venv.select_migrations(bin_from, bin_to, self.num_bins, bins)
+                valid &= running
+                before = venv.get_metrics()
+                migrated = venv.migrate(src, vm, dst, valid)
+                migrations += migrated
+                after = venv.get_metrics()
+
+                rewards = self.calculate_rewards(before, after, valid & ~migrated, venv.idle_host_counts())
+                total_rewards += np.where(valid, rewards, 0.0)
+
+                venv.tick_idle_counters(mask=valid)
+                bins = venv.get_host_bins(self.num_bins)
+                next_states = self._vector_states(venv, bins)
+
+                if self.replay is None:
+                    self._batch_q_update(states[valid], bin_from[valid], bin_to[valid], rewards[valid], next_states[valid])
+                else:
+                    self._store_transitions(states[valid], bin_from[valid], bin_to[valid], rewards[valid], next_states[valid])
+                    for _ in range(self.replay_updates):
+                        self.replay_update()
+                states = next_states
+
+            final = venv.get_metrics()
+            for total_reward, energy_wh, moved, sla in zip(total_rewards.tolist(), final["energy_wh"].tolist(),
+                                                           migrations.tolist(), final["sla_violations"].tolist()):
+                if ep == self.episodes:
+                    break
+                ep += 1
+                if not self._finish_episode(ep, total_reward, on_episode, energy_wh, moved, sla):
+                    stopped = True
+                    break
+
+            # Decay alpha and epsilon once per round, at the last episode it covered
+            self.alpha = max(0.01, self.initial_alpha / (1 + self.alpha_decay * ep))
+            self.epsilon = self.min_epsilon + \
+                (self.max_epsilon - self.min_epsilon) * math.exp(-self.decay_rate * ep)
+            if stopped:
+                logging.info("⏹️ Training stopped after episode %d", ep)
+                break
+
+    def _vector_states(self, venv, bins):
+        """Each replica's agent state as one row of an array (here: host counts per bin)."""
+        return venv.get_states(self.num_bins, bins)
 
-            if ep % 50 == 0:
-                avg = sum(self.episode_rewards[-50:]) / 50
-                logging.info(f"📊 Episode {ep}: Avg Reward (last 50) = {avg:.2f}, ε = {self.epsilon:.3f}")
+    def _select_actions_vectorized(self, venv, states, bins, rng):
+        """
+        Epsilon-greedy action per replica, mirroring get_action.
+        Exploring replicas score every (bin_from, bin_to) pair by its predicted immediate reward
+        and pick randomly among the top 5. Returns (bin_from, bin_to) arrays, -1 where no action exists.
+        """
+        num_envs = venv.num_envs
+        pairs = [(i, j) for i in range(self.num_bins) for j in range(self.num_bins) if i != j]
+        occupied = states[:, :self.num_bins] > 0  # Leading columns are per-bin host counts (or shares)
+        bin_from = np.full(num_envs, -1, dtype=np.int64)
+        bin_to = np.full(num_envs, -1, dtype=np.int64)
+        explore = rng.random(num_envs) < self.epsilon
+
+        if explore.any():
+            # Score every usable (replica, pair) request in one batch
+            pair_idx = np.repeat(np.arange(len(pairs)), num_envs)
+            rows = np.tile(np.arange(num_envs), len(pairs))
+            pair_from = np.array([i for i, _ in pairs])[pair_idx]
+            pair_to = np.array([j for _, j in pairs])[pair_idx]
+            usable = explore[rows] & occupied[rows, pair_from] & occupied[rows, pair_to]
+            rows, pair_idx, pair_from, pair_to = rows[usable], pair_idx[usable], pair_from[usable], pair_to[usable]
+
+            src, vm, dst, valid = venv.select_migrations(pair_from, pair_to, self.num_bins, bins, rng=rng, rows=rows)
+            before, after = venv.evaluate(src, vm, dst, valid, rows=rows)
+            rewards = self.calculate_rewards(before, after, False, venv.idle_host_counts()[rows])
+            scores = np.full((num_envs, len(pairs)), -np.inf)
+            scores[rows, pair_idx] = np.where(valid, rewards, -np.inf)
+
+            num_scored = np.count_nonzero(np.isfinite(scores), axis=1)
+            order = np.argsort(-scores, axis=1)
+            pick = (rng.random(num_envs) * np.minimum(num_scored, 5)).astype(np.int64)
+            chosen = order[np.arange(num_envs), pick]
+            has = explore & (num_scored > 0)
+            bin_from[has] = [pairs[c][0] for c in chosen[has]]
+            bin_to[has] = [pairs[c][1] for c in chosen[has]]
+
+        for r in np.flatnonzero(~explore):
+            action = self.q_table.best_action(tuple(states[r].tolist()))
+            if action is None:
+                valid_pairs = [(i, j) for i, j in pairs if occupied[r, i] and occupied[r, j]]
+                action = valid_pairs[rng.integers(len(valid_pairs))] if valid_pairs else (-1, -1)
+            bin_from[r], bin_to[r] = action
+        return bin_from, bin_to
+
+    def _batch_q_update(self, states, bin_from, bin_to, rewards, next_states):
+        """One vectorized Q-learning update over a batch of transitions."""
+        if not len(states):
+            return
+        self._q_update_rows(*self._transition_rows(states, bin_from, bin_to, next_states), rewards)
+
+    def _transition_rows(self, states, bin_from, bin_to, next_states):
+        """Q-table rows (created as needed), action columns and next rows of a batch of transitions."""
+        q = self.q_table
+        rows = np.array([q.row(tuple(s), create=True) for s in states.tolist()], dtype=np.int64)
+        next_rows = np.array([q.row(tuple(s), create=True) for s in next_states.tolist()], dtype=np.int64)
+        cols = np.array([q.action_index[a] for a in zip(bin_from.tolist(), bin_to.tolist())], dtype=np.int64)
+        return rows, cols, next_rows
+
+    def _q_update_rows(self, rows, cols, next_rows, rewards, weights=None):
+        """
+        Vectorized Q-learning update of entries (rows[k], cols[k]); `weights` scales each step
+        (importance weights of prioritized replay). Returns the TD errors.
+        """
+        q = self.q_table
+        visited_next = q.visited[next_rows]
+        future_q = np.where(visited_next, q.values[next_rows], -np.inf).max(axis=1)
+        future_q = np.where(visited_next.any(axis=1), future_q, 0.0)
+
+        old_q = q.values[rows, cols]
+        td_errors = rewards + self.gamma * future_q - old_q
+        # Duplicate (row, col) pairs within a batch resolve to one of the updates
+        q.values[rows, cols] = old_q + self.alpha * (td_errors if weights is None else weights * td_errors)
+        q.visited[rows, cols] = True
+        return td_errors
+
+    def _store_transitions(self, states, bin_from, bin_to, rewards, next_states):
+        if len(states):
+            rows, cols, next_rows = self._transition_rows(states, bin_from, bin_to, next_states)
+            self.replay.add_batch(rows, cols, rewards, next_rows)
+
+    def replay_update(self):
+        """One minibatch update from the replay buffer (skipped until it holds a full batch)."""
+        if len(self.replay) < self.replay_batch_size:
+            return
+        slots, rows, cols, rewards, next_rows, weights = self.replay.sample(self.replay_batch_size)
+        self.replay.update_priorities(slots, self._q_update_rows(rows, cols, next_rows, rewards, weights))
+
+    def train_offline(self, updates):
+        """
+        Learn from the transitions already in the replay buffer (e.g. loaded with
+        ReplayBuffer.load) without stepping the environment: `updates` minibatch updates.
+        """
+        if self.replay is None:
+            raise ValueError("No replay buffer; call enable_replay() or assign agent.replay first")
+        for i in range(1, updates + 1):
+            self.replay_update()
+            if i % 1000 == 0:
+                logging.info(f"📊 Offline update {i}/{updates}: {len(self.q_table)} states")
 
     def get_learning_curve(self):
-        """Returns the total rewards per episode."""
-        return self.episode_rewards
+        """
+        Returns the total rewards per episode. Past stats.capacity episodes this is the decimated
+        history (see EpisodeStats); stats.history() gives the matching episode numbers.
+        """
+        return self.stats.history("reward")[1].tolist()
 
 if __name__ == "__main__":
     agent = QLearningAgent()
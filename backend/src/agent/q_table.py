@@ -0,0 +1,153 @@
+import ast
+import argparse
+import json
+import logging
+
+import numpy as np
+
+# --- Q-Table ---
+
+class QTable:
+    """
+    Compact array-backed Q-table for bin-count states and (bin_from, bin_to) actions.
+
+    Each state tuple maps to a row of a dense value matrix, and each action has a fixed
+    column. A parallel `visited` mask marks the entries that have been written, so
+    "no entry yet" stays distinct from a learned value of 0.0. Rows grow by doubling.
+    Saved as an uncompressed .npz, which loads as raw arrays with no parsing.
+    """
+
+    def __init__(self, num_bins=5, capacity=1024, dtype=np.float64):
+        self.num_bins = num_bins
+        self.actions = [(i, j) for i in range(num_bins) for j in range(num_bins) if i != j]
+        self.action_index = {action: col for col, action in enumerate(self.actions)}
+        self.dtype = np.dtype(dtype)
+        self._rows = {}
+        self.states = np.zeros((capacity, num_bins), dtype=np.int64)
+        self.values = np.zeros((capacity, len(self.actions)), dtype=self.dtype)
+        self.visited = np.zeros((capacity, len(self.actions)), dtype=bool)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, state):
+        return state in self._rows
+
+    def _grow(self):
+        capacity = 2 * len(self.states)
+        for name in ('states', 'values', 'visited'):
+            arr = getattr(self, name)
+            grown = np.zeros((capacity, arr.shape[1]), dtype=arr.dtype)
+            grown[:len(arr)] = arr
+            setattr(self, name, grown)
+
+    def row(self, state, create=False):
+        """Return the row index of a state, adding it when `create` is set (else None)."""
+        row = self._rows.get(state)
+        if row is None and create:
+            row = len(self._rows)
+            if row == len(self.states):
+                self._grow()
+            self.states[row] = state
+            self._rows[state] = row
+        return row
+
+    def get(self, state, action):
+        """Q(state, action), defaulting to 0.0."""
+        row = self._rows.get(state)
+        if row is None:
+            return 0.0
+        return float(self.values[row, self.action_index[action]])
+
+    def set(self, state, action, value):
+        """Write Q(state, action)."""
+        row = self.row(state, create=True)
+        col = self.action_index[action]
+        self.values[row, col] = value
+        self.visited[row, col] = True
+
+    def max_value(self, state):
+        """Highest Q-value recorded for a state, or 0.0 if it has none."""
+        row = self._rows.get(state)
+        if row is None or not self.visited[row].any():
+            return 0.0
+        return float(self.values[row][self.visited[row]].max())
+
+    def best_action(self, state):
+        """Recorded action with the highest Q-value for a state, or None."""
+        row = self._rows.get(state)
+        if row is None or not self.visited[row].any():
+            return None
+        masked = np.where(self.visited[row], self.values[row], -np.inf)
+        return self.actions[int(np.argmax(masked))]
+
+    def items(self):
+        """Yield (state, {action: value}) for every stored state."""
+        for state, row in self._rows.items():
+            cols = np.flatnonzero(self.visited[row])
+            yield state, {self.actions[c]: float(self.values[row, c]) for c in cols}
+
+    def to_dict(self):
+        """Return the table with stringified keys, in the legacy JSON layout."""
+        return {str(state): {str(act): val for act, val in actions.items()} for state, actions in self.items()}
+
+    # --- Persistence ---
+
+    def save(self, filename):
+        """Write the table to an uncompressed .npz file."""
+        n = len(self._rows)
+        with open(filename, "wb") as f:
+            np.savez(
+                f,
+                num_bins=np.int64(self.num_bins),
+                states=self.states[:n],
+                values=self.values[:n],
+                visited=self.visited[:n],
+            )
+
+    @classmethod
+    def load(cls, filename):
+        """Read a table written by `save`."""
+        with np.load(filename) as data:
+            states = data["states"]
+            table = cls(int(data["num_bins"]), capacity=max(len(states), 1), dtype=data["values"].dtype)
+            n = len(states)
+            table.states[:n] = states
+            table.values[:n] = data["values"]
+            table.visited[:n] = data["visited"]
+        table._rows = {tuple(state): row for row, state in enumerate(states.tolist())}
+        return table
+
+    @classmethod
+    def from_json(cls, filename):
+        """Read a legacy JSON table with stringified tuple keys (parsed safely, no eval)."""
+        with open(filename, "r") as f:
+            data = json.load(f)
+        parsed = [
+            (ast.literal_eval(state_str), {ast.literal_eval(act): val for act, val in actions.items()})
+            for state_str, actions in data.items()
+        ]
+        num_bins = len(parsed[0][0]) if parsed else 5
+        table = cls(num_bins, capacity=max(len(parsed), 1))
+        for state, actions in parsed:
+            table.row(state, create=True)
+            for action, value in actions.items():
+                table.set(state, action, value)
+        return table
+
+
+def convert_json_q_table(json_path, npz_path):
+    """One-time conversion of a legacy JSON Q-table to the binary format."""
+    table = QTable.from_json(json_path)
+    table.save(npz_path)
+    logging.info("🔁 Converted %s -> %s (%d states)", json_path, npz_path, len(table))
+    return table
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
+    parser = argparse.ArgumentParser(description="Convert a legacy JSON Q-table to .npz")
+    parser.add_argument("json_path", help="Existing JSON Q-table")
+    parser.add_argument("npz_path", help="Output .npz file")
+    args = parser.parse_args()
+    convert_json_q_table(args.json_path, args.npz_path)
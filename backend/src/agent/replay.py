@@ -0,0 +1,177 @@
+import logging
+import argparse
+
+import numpy as np
+
+from src.agent.shared_q_table import SharedQTable
+
+# --- Replay Buffer ---
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring buffer of (state, action, reward, next_state) transitions.
+
+    States are Q-table row indices and actions are column indices, all in preallocated NumPy
+    arrays, so adding and sampling never allocate per transition. Once full, the oldest
+    transitions are overwritten.
+
+    With `prioritized`, transitions are sampled with probability proportional to
+    priority ** alpha (priority = |TD error| + eps; new transitions get the current maximum),
+    and sample() returns importance weights (N * P) ** -beta, scaled so the largest is 1.
+    Sampling is a cumulative sum plus a binary search, O(capacity) per minibatch.
+    """
+
+    def __init__(self, capacity=100000, prioritized=False, alpha=0.6, beta=0.4, eps=1e-3, rng=None):
+        self.capacity = capacity
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.rng = np.random.default_rng(rng)
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float64)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.priorities = np.zeros(capacity, dtype=np.float64)
+        self._size = 0
+        self._next = 0  # Slot of the next write
+        self._max_priority = 1.0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, state, action, reward, next_state):
+        """Store one transition (Q-table row, action column, reward, next row)."""
+        i = self._next
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.priorities[i] = self._max_priority
+        self._next = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states):
+        """Store many transitions at once (arrays of equal length)."""
+        n = len(states)
+        if n > self.capacity:
+            states, actions, rewards, next_states = states[-self.capacity:], actions[-self.capacity:], \
+                rewards[-self.capacity:], next_states[-self.capacity:]
+            n = self.capacity
+        slots = (self._next + np.arange(n)) % self.capacity
+        self.states[slots] = states
+        self.actions[slots] = actions
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_states
+        self.priorities[slots] = self._max_priority
+        self._next = int((self._next + n) % self.capacity)
+        self._size = min(self._size + n, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Draw a minibatch (with replacement). Returns (slots, states, actions, rewards,
+        next_states, weights); weights are None for uniform sampling.
+        """
+        if self.prioritized:
+            scaled = self.priorities[:self._size] ** self.alpha
+            cumulative = np.cumsum(scaled)
+            total = cumulative[-1]
+            slots = np.searchsorted(cumulative, self.rng.random(batch_size) * total, side="right")
+            slots = np.minimum(slots, self._size - 1)
+            weights = (self._size * scaled[slots] / total) ** -self.beta
+            weights /= weights.max()
+        else:
+            slots = self.rng.integers(self._size, size=batch_size)
+            weights = None
+        return slots, self.states[slots], self.actions[slots], self.rewards[slots], self.next_states[slots], weights
+
+    def update_priorities(self, slots, td_errors):
+        """Set the priorities of sampled transitions from their new TD errors."""
+        if not self.prioritized:
+            return
+        priorities = np.abs(td_errors) + self.eps
+        self.priorities[slots] = priorities
+        self._max_priority = max(self._max_priority, float(priorities.max()))
+
+    # --- Persistence ---
+
+    def save(self, filename, q_table):
+        """
+        Write the transitions (oldest first) to an uncompressed .npz. Row indices only mean
+        something for `q_table`, so the state tuple of every referenced row is stored with them.
+        """
+        order = (self._next - self._size + np.arange(self._size)) % self.capacity
+        lookup = q_table.keys if isinstance(q_table, SharedQTable) else q_table.states
+        rows, inverse = np.unique(np.concatenate([self.states[order], self.next_states[order]]), return_inverse=True)
+        with open(filename, "wb") as f:
+            np.savez(
+                f,
+                state_keys=lookup[rows],
+                states=inverse[:self._size],
+                actions=self.actions[order],
+                rewards=self.rewards[order],
+                next_states=inverse[self._size:],
+                priorities=self.priorities[order],
+                num_bins=np.int64(q_table.num_bins),
+            )
+
+    @classmethod
+    def load(cls, filename, q_table, capacity=None, **kwargs):
+        """
+        Read transitions written by save(), mapping their states onto rows of `q_table`
+        (states it has not seen are added). Keeps the last `capacity` (default: all) transitions.
+        """
+        with np.load(filename) as data:
+            if int(data["num_bins"]) != q_table.num_bins:
+                raise ValueError(f"{filename} was recorded with num_bins={int(data['num_bins'])}")
+            rows = np.array([q_table.row(tuple(state), create=True) for state in data["state_keys"].tolist()],
+                            dtype=np.int64)
+            states, next_states = rows[data["states"]], rows[data["next_states"]]
+            actions, rewards, priorities = data["actions"], data["rewards"], data["priorities"]
+        buffer = cls(capacity or max(len(states), 1), **kwargs)
+        buffer.add_batch(states, actions, rewards, next_states)
+        n = len(buffer)
+        if n:
+            buffer.priorities[:n] = priorities[-n:]
+            buffer._max_priority = max(1.0, float(priorities[-n:].max()))
+        return buffer
+
+
+if __name__ == "__main__":
+    from src.agent.q_learning import QLearningAgent
+
+    parser = argparse.ArgumentParser(description="Train with experience replay, or offline from recorded transitions")
+    parser.add_argument("--episodes", type=int, default=200, help="Episodes to train (online)")
+    parser.add_argument("--time_steps", type=int, default=50, help="Time steps per episode")
+    parser.add_argument("--hosts", type=int, default=12, help="Number of hosts")
+    parser.add_argument("--vms", type=int, default=18, help="Number of VMs")
+    parser.add_argument("--capacity", type=int, default=100000, help="Replay buffer capacity")
+    parser.add_argument("--batch_size", type=int, default=32, help="Minibatch size")
+    parser.add_argument("--updates_per_step", type=int, default=4, help="Minibatch updates per environment step")
+    parser.add_argument("--prioritized", action="store_true", help="Prioritized instead of uniform sampling")
+    parser.add_argument("--offline", type=str, default=None, help="Train only from this recorded buffer (.npz)")
+    parser.add_argument("--updates", type=int, default=10000, help="Minibatch updates for --offline")
+    parser.add_argument("--save_buffer", type=str, default=None, help="Record the replay buffer to this .npz")
+    parser.add_argument("--save_q_table", type=str, default=None, help="Write the learned Q-table to this .npz")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible run")
+    args = parser.parse_args()
+
+    agent = QLearningAgent(episodes=args.episodes, time_steps_per_episode=args.time_steps,
+                           num_hosts=args.hosts, num_vms=args.vms, rng=args.seed)
+    agent.enable_replay(args.capacity, args.batch_size, args.updates_per_step, args.prioritized)
+    if args.offline:
+        agent.replay = ReplayBuffer.load(args.offline, agent.q_table, args.capacity, prioritized=args.prioritized,
+                                         rng=agent.replay.rng)
+        logging.info("📂 Loaded %d transitions", len(agent.replay))
+        agent.train_offline(args.updates)
+    else:
+        agent.train()
+        summary = agent.stats.summary()
+        print(f"\nEpisodes: {summary['episodes']}   mean reward: {summary['reward']['mean']:.2f}   "
+              f"last {summary['window']}: {summary['reward']['rolling_mean']:.2f}")
+    print(f"Q-table states: {len(agent.q_table)}   transitions in buffer: {len(agent.replay)}")
+    if args.save_buffer:
+        agent.replay.save(args.save_buffer, agent.q_table)
+        print(f"📁 Buffer written to {args.save_buffer}")
+    if args.save_q_table:
+        agent.save_q_table(args.save_q_table)
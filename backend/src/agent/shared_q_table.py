@@ -0,0 +1,171 @@
+import os
+import contextlib
+
+import numpy as np
+
+from src.agent.q_table import QTable
+
+EMPTY = -1
+
+# --- Shared Q-Table ---
+
+class SharedQTable:
+    """
+    Memory-mapped Q-table that several processes can read and update at once.
+
+    Layout (a directory of .npy files, mapped with np.memmap):
+      keys.npy     (capacity, num_bins) int64 - state tuple per slot, EMPTY in column 0 if free
+      values.npy   (capacity, num_actions)    - Q-values, same columns as QTable
+      visited.npy  (capacity, num_actions)    - which entries have been written
+      meta.npy     (1,) int64                 - number of stored states
+
+    States are placed by open addressing (linear probing on the tuple hash, which is
+    stable across processes for integer tuples). Slots never move once claimed.
+
+    Update policy:
+      - Claiming a slot for a new state takes `lock` (a multiprocessing.Lock shared by
+        the workers). New states are rare after the first few episodes.
+      - Q-value reads and writes are Hogwild-style and lock-free: concurrent updates to
+        the same entry may occasionally overwrite each other, which Q-learning tolerates
+        in exchange for scaling with cores.
+
+    Readers such as the Flask API open the directory with mode='r' and see the workers'
+    updates through the shared mapping without copying.
+    """
+
+    def __init__(self, path, mode="r+", lock=None):
+        self.path = path
+        self.lock = lock
+        self.read_only = mode == "r"
+        self.keys = np.load(os.path.join(path, "keys.npy"), mmap_mode=mode)
+        self.values = np.load(os.path.join(path, "values.npy"), mmap_mode=mode)
+        self.visited = np.load(os.path.join(path, "visited.npy"), mmap_mode=mode)
+        self._meta = np.load(os.path.join(path, "meta.npy"), mmap_mode=mode)
+        self.num_bins = self.keys.shape[1]
+        self.actions = [(i, j) for i in range(self.num_bins) for j in range(self.num_bins) if i != j]
+        self.action_index = {action: col for col, action in enumerate(self.actions)}
+        self._mask = len(self.keys) - 1
+        self._slots = {}  # Per-process cache; safe because slots never move
+
+    @classmethod
+    def create(cls, path, num_bins=5, capacity=1 << 16, dtype=np.float64, lock=None, initial=None):
+        """
+        Create a new shared table directory. `capacity` is rounded up to a power of two.
+        `initial` optionally seeds it from an in-memory QTable.
+        """
+        size = 1
+        while size < capacity:
+            size *= 2
+        num_actions = num_bins * (num_bins - 1)
+        os.makedirs(path, exist_ok=True)
+        open_memmap = np.lib.format.open_memmap
+        keys = open_memmap(os.path.join(path, "keys.npy"), mode="w+", dtype=np.int64, shape=(size, num_bins))
+        keys[:, 0] = EMPTY
+        open_memmap(os.path.join(path, "values.npy"), mode="w+", dtype=dtype, shape=(size, num_actions))
+        open_memmap(os.path.join(path, "visited.npy"), mode="w+", dtype=bool, shape=(size, num_actions))
+        open_memmap(os.path.join(path, "meta.npy"), mode="w+", dtype=np.int64, shape=(1,))
+        del keys
+        table = cls(path, mode="r+", lock=lock)
+        if initial is not None:
+            for state, actions in initial.items():
+                table.row(state, create=True)
+                for action, value in actions.items():
+                    table.set(state, action, value)
+        return table
+
+    def __len__(self):
+        return int(self._meta[0])
+
+    def __contains__(self, state):
+        return self.row(state) is not None
+
+    def _probe(self, state):
+        """Return (slot, found): the state's slot, or the first free slot on its probe path."""
+        slot = hash(state) & self._mask
+        for _ in range(len(self.keys)):
+            key = self.keys[slot]
+            if key[0] == EMPTY:
+                return slot, False
+            if tuple(key.tolist()) == state:
+                return slot, True
+            slot = (slot + 1) & self._mask
+        raise RuntimeError(f"Shared Q-table at {self.path} is full; recreate it with a larger capacity")
+
+    def row(self, state, create=False):
+        """Return the slot of a state, claiming one when `create` is set (else None)."""
+        slot = self._slots.get(state)
+        if slot is not None:
+            return slot
+        slot, found = self._probe(state)
+        if not found:
+            if not create:
+                return None
+            with self.lock if self.lock is not None else contextlib.nullcontext():
+                # Another process may have claimed it since the unlocked probe
+                slot, found = self._probe(state)
+                if not found:
+                    # Column 0 last, so lock-free readers never match a half-written key
+                    self.keys[slot, 1:] = state[1:]
+                    self.keys[slot, 0] = state[0]
+                    self._meta[0] += 1
+        self._slots[state] = slot
+        return slot
+
+    def get(self, state, action):
+        """Q(state, action), defaulting to 0.0."""
+        slot = self.row(state)
+        if slot is None:
+            return 0.0
+        return float(self.values[slot, self.action_index[action]])
+
+    def set(self, state, action, value):
+        """Write Q(state, action) without locking (Hogwild)."""
+        slot = self.row(state, create=True)
+        col = self.action_index[action]
+        self.values[slot, col] = value
+        self.visited[slot, col] = True
+
+    def max_value(self, state):
+        """Highest Q-value recorded for a state, or 0.0 if it has none."""
+        slot = self.row(state)
+        if slot is None or not self.visited[slot].any():
+            return 0.0
+        return float(self.values[slot][self.visited[slot]].max())
+
+    def best_action(self, state):
+        """Recorded action with the highest Q-value for a state, or None."""
+        slot = self.row(state)
+        if slot is None or not self.visited[slot].any():
+            return None
+        masked = np.where(self.visited[slot], self.values[slot], -np.inf)
+        return self.actions[int(np.argmax(masked))]
+
+    def items(self):
+        """Yield (state, {action: value}) for every stored state."""
+        for slot in np.flatnonzero(self.keys[:, 0] != EMPTY):
+            state = tuple(self.keys[slot].tolist())
+            cols = np.flatnonzero(self.visited[slot])
+            yield state, {self.actions[c]: float(self.values[slot, c]) for c in cols}
+
+    def to_dict(self):
+        """Return the table with stringified keys, in the legacy JSON layout."""
+        return {str(state): {str(act): val for act, val in actions.items()} for state, actions in self.items()}
+
+    def flush(self):
+        """Flush pending writes to disk."""
+        if not self.read_only:
+            for arr in (self.keys, self.values, self.visited, self._meta):
+                arr.flush()
+
+    def to_q_table(self):
+        """Copy the shared table into a compact in-memory QTable."""
+        table = QTable(self.num_bins, capacity=max(len(self), 1), dtype=self.values.dtype)
+        for state, actions in self.items():
+            table.row(state, create=True)
+            for action, value in actions.items():
+                table.set(state, action, value)
+        return table
+
+    def save(self, filename):
+        """Write a consolidated .npz snapshot (same format as QTable.save)."""
+        self.to_q_table().save(filename)
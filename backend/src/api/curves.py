@@ -0,0 +1,54 @@
+import math
+from collections import deque
+
+import numpy as np
+
+# --- Learning-curve views ---
+
+def parse_view_args(args, total=None):
+    """
+    Read `every`, `window`, `start` and `max_points` from request query args.
+    `max_points` (with a known `total`) raises `every` so at most that many points are returned.
+    """
+    every = max(args.get("every", 1, type=int) or 1, 1)
+    window = max(args.get("window", 1, type=int) or 1, 1)
+    start = max(args.get("start", 0, type=int) or 0, 0)
+    max_points = args.get("max_points", type=int)
+    if max_points and total:
+        every = max(every, math.ceil((total - start) / max_points))
+    return every, window, start
+
+
+def curve_view(rewards, every=1, window=1, start=0, episodes=None):
+    """
+    Downsampled learning curve: every `every`-th episode after `start` (episodes are 1-based),
+    each with the mean reward of the last `window` episodes up to and including it.
+    `episodes` gives the episode number of each reward for a decimated history (default 1..n);
+    `every` and `window` then count recorded points rather than episodes.
+    Returns (episodes, values) as lists.
+    """
+    rewards = np.asarray(rewards, dtype=np.float64)
+    csum = np.concatenate(([0.0], np.cumsum(rewards)))
+    points = np.arange(every, len(rewards) + 1, every)
+    numbers = points if episodes is None else np.asarray(episodes)[points - 1]
+    keep = numbers > start
+    points, numbers = points[keep], numbers[keep]
+    first = np.maximum(points - window, 0)
+    values = (csum[points] - csum[first]) / (points - first)
+    return numbers.tolist(), values.tolist()
+
+
+class CurveDownsampler:
+    """Incremental version of curve_view for streamed episode events."""
+
+    def __init__(self, every=1, window=1, start=0):
+        self.every = every
+        self.start = start
+        self._recent = deque(maxlen=window)
+
+    def push(self, episode, reward):
+        """Feed one episode; returns (episode, rolling mean) when it is a sampled point, else None."""
+        self._recent.append(reward)
+        if episode % self.every or episode <= self.start:
+            return None
+        return episode, sum(self._recent) / len(self._recent)
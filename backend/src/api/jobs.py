@@ -0,0 +1,357 @@
+import os
+import time
+import uuid
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(tempfile.gettempdir(), "vm-consolidation-jobs"))
+ROLLING_WINDOW = 50
+METRICS_EVERY = 10  # Episodes between instrumentation snapshots published by training jobs
+EVENT_CAPACITY = 10000  # Events kept per job; older ones are dropped
+PUBLISH_INTERVAL = 0.2  # Seconds between a worker's batched event/progress updates
+
+# --- Event Log ---
+
+class EventLog:
+    """
+    Bounded event log of one job, shared with its worker through the job manager.
+
+    Events keep their absolute index. Once more than `capacity` are held, the oldest are
+    dropped and `base` (the index of the first kept event) advances, so a reader's cursor
+    stays valid: read(start) resumes at `start`, or at the oldest kept event if `start`
+    was dropped. Appends and reads hold the manager lock, so they never see a half-trimmed log.
+    """
+
+    def __init__(self, manager, capacity=EVENT_CAPACITY):
+        self.capacity = capacity
+        self._events = manager.list()
+        self._base = manager.Value("i", 0)
+        self._lock = manager.Lock()
+
+    def extend(self, events):
+        with self._lock:
+            self._events.extend(events)
+            excess = len(self._events) - self.capacity
+            if excess > 0:
+                del self._events[:excess]
+                self._base.value += excess
+
+    def read(self, start=0):
+        """(index of the first returned event, events from `start` on)."""
+        with self._lock:
+            base = self._base.value
+            return max(start, base), self._events[max(start - base, 0):]
+
+
+class _Publisher:
+    """
+    Batches a worker's events and progress updates into one round trip to the manager
+    every PUBLISH_INTERVAL seconds (and on flush()), instead of one per episode.
+    Cancellation is picked up at the same time.
+    """
+
+    def __init__(self, progress, events):
+        self.progress = progress
+        self.events = events
+        self.cancelled = False
+        self._events = []
+        self._updates = {}
+        self._last = time.monotonic()
+
+    def push(self, event=None, **updates):
+        """Queue an event and/or progress fields; returns False once cancellation was requested."""
+        if event is not None:
+            self._events.append(event)
+        self._updates.update(updates)
+        if time.monotonic() - self._last >= PUBLISH_INTERVAL:
+            self.flush()
+        return not self.cancelled
+
+    def flush(self):
+        if self._events:
+            self.events.extend(self._events)
+            self._events = []
+        if self._updates:
+            self.progress.update(self._updates)
+            self._updates = {}
+        self.cancelled = bool(self.progress.get("cancel_requested", False))
+        self._last = time.monotonic()
+
+def stage_q_table(q_table):
+    """Write a Q-table to JOBS_DIR for a training job to start from (its `q_table_path`)."""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    path = os.path.join(JOBS_DIR, f"start-{uuid.uuid4().hex[:12]}.npz")
+    q_table.save(path)
+    return path
+
+# --- Job Workers (run inside the process pool) ---
+
+def run_training_job(job_id, params, progress, events):
+    """
+    Trains an agent, publishing per-episode events and honouring cancellation. It starts from
+    the Q-table at `q_table_path` (or the default table with `load_q_table`), else from scratch.
+    The seed is resolved up front and returned, so the trained cluster can be rebuilt from it.
+    """
+    from src.agent.q_learning import QLearningAgent
+    from src.agent.episode_stats import EpisodeStats
+
+    progress["state"] = "running"
+    progress["started_at"] = time.time()
+    seed = np.random.SeedSequence(params.get("seed")).entropy
+    agent = QLearningAgent(
+        alpha=params.get("alpha", 0.1),
+        gamma=params.get("gamma", 0.9),
+        episodes=params.get("episodes", 2000),
+        time_steps_per_episode=params.get("time_steps", 50),
+        rng=seed
+    )
+    if params.get("q_table_path"):
+        agent.load_q_table(params["q_table_path"])
+    elif params.get("load_q_table"):
+        agent.load_q_table()
+    agent.stats = EpisodeStats(window=ROLLING_WINDOW)
+    instrumentation = agent.enable_instrumentation() if params.get("instrument") else None
+    publisher = _Publisher(progress, events)
+
+    def on_episode(event):
+        updates = {
+            "episode": event["episode"],
+            "last_reward": event["reward"],
+            "rolling_reward": agent.stats.rolling_mean("reward"),
+        }
+        # The episode is folded into the totals right after this hook, hence the lag of one
+        if instrumentation is not None and event["episode"] % METRICS_EVERY == 0:
+            updates["instrumentation"] = instrumentation.summary()
+        return publisher.push(event, **updates)
+
+    agent.train(on_episode=on_episode)
+    if instrumentation is not None:
+        publisher.push(instrumentation=instrumentation.summary())
+    publisher.flush()
+
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    q_table_path = os.path.join(JOBS_DIR, f"{job_id}.npz")
+    agent.save_q_table(q_table_path)
+    return {
+        "metrics": agent.env.get_metrics(),
+        "avg_reward": agent.stats.mean("reward"),
+        "episodes_completed": agent.stats.count,
+        "episode_rewards": agent.get_learning_curve(),
+        "episode_stats": agent.stats.state(),
+        "q_table_path": q_table_path,
+        "seed": seed,
+        "cancelled": publisher.cancelled,
+    }
+
+
+def run_batch_job(job_id, params, progress, events):
+    """Runs run_batch_simulations, publishing per-run events and honouring cancellation."""
+    from batch_test import run_batch_simulations, resolve_seed
+
+    progress["state"] = "running"
+    progress["started_at"] = time.time()
+    publisher = _Publisher(progress, events)
+    seed = resolve_seed(params.get("seed"))
+    completed = 0
+
+    def on_run(result):
+        nonlocal completed
+        completed += 1
+        return publisher.push({"run": completed, "avg_reward": result["avg_reward"]},
+                              runs_completed=completed, last_avg_reward=result["avg_reward"])
+
+    results = run_batch_simulations(
+        num_runs=params.get("runs", 10),
+        episodes=params.get("episodes", 500),
+        time_steps=params.get("time_steps", 50),
+        alpha=params.get("alpha", 0.1),
+        gamma=params.get("gamma", 0.9),
+        independent_runs=params.get("independent_runs", False),
+        on_run=on_run,
+        seed=seed
+    )
+    publisher.flush()
+    return {
+        "results": results,
+        "seed": seed,
+        "cancelled": publisher.cancelled,
+    }
+
+
+JOB_TYPES = {
+    "train": run_training_job,
+    "batch": run_batch_job,
+}
+
+# --- Job Manager ---
+
+class JobManager:
+    """
+    Runs training and batch jobs on a bounded process pool so API requests return immediately.
+    Each job gets a shared progress dict and a bounded EventLog (via a multiprocessing
+    Manager) that the worker updates in batches and the API polls or streams;
+    setting `cancel_requested` asks a running job to stop at its next publish.
+    Queued jobs are cancelled outright.
+    """
+
+    def __init__(self, max_workers=None, event_capacity=EVENT_CAPACITY):
+        self.max_workers = max_workers or int(os.environ.get("JOB_WORKERS", 2))
+        self.event_capacity = event_capacity
+        self._executor = None
+        self._manager = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def _ensure_started(self):
+        # Started lazily so importing the API does not spawn processes
+        if self._executor is None:
+            self._manager = multiprocessing.Manager()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def add_listener(self, callback):
+        """Register `callback(job_id, job)` to run when a job finishes successfully."""
+        self._listeners.append(callback)
+
+    def submit(self, job_type, params):
+        """Queue a job and return its id."""
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type}")
+        with self._lock:
+            self._ensure_started()
+            job_id = uuid.uuid4().hex[:12]
+            progress = self._manager.dict({"state": "queued"})
+            if job_type == "train":
+                progress["episodes"] = params.get("episodes", 2000)
+            else:
+                progress["runs"] = params.get("runs", 10)
+            job = {
+                "id": job_id,
+                "type": job_type,
+                "params": params,
+                "submitted_at": time.time(),
+                "progress": progress,
+                "events": EventLog(self._manager, self.event_capacity),
+                "result": None,
+                "error": None,
+                "finished_at": None,
+            }
+            self._jobs[job_id] = job
+            job["future"] = self._executor.submit(JOB_TYPES[job_type], job_id, params, progress, job["events"])
+        job["future"].add_done_callback(lambda future, job_id=job_id: self._on_done(job_id, future))
+        return job_id
+
+    def _on_done(self, job_id, future):
+        # finished_at is set last: until then the job still reads as running, so pollers
+        # never see a finished job without its result or error
+        job = self._jobs[job_id]
+        if future.cancelled():
+            job["finished_at"] = time.time()
+            return
+        error = future.exception()
+        if error is not None:
+            job["error"] = str(error)
+            job["finished_at"] = time.time()
+            logging.error("❌ Job %s failed: %s", job_id, error)
+            return
+        job["result"] = future.result()
+        job["finished_at"] = time.time()
+        for callback in self._listeners:
+            try:
+                callback(job_id, job)
+            except Exception:
+                logging.exception("Job listener failed for %s", job_id)
+
+    def _state(self, job):
+        future = job["future"]
+        if future.cancelled():
+            return "cancelled"
+        if job["finished_at"] is not None:
+            if job["error"] is not None:
+                return "failed"
+            if job["result"] is not None and job["result"].get("cancelled"):
+                return "cancelled"
+            return "completed"
+        return job["progress"].get("state", "queued")
+
+    def status(self, job_id):
+        """Return a JSON-friendly status dict for a job, or None if unknown."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            progress = dict(job["progress"])
+        except (EOFError, BrokenPipeError, ConnectionError):
+            progress = {}
+        progress.pop("state", None)
+        return {
+            "job_id": job_id,
+            "type": job["type"],
+            "state": self._state(job),
+            "params": job["params"],
+            "submitted_at": job["submitted_at"],
+            "finished_at": job["finished_at"],
+            "progress": progress,
+            "error": job["error"],
+        }
+
+    def done(self, job_id):
+        """Whether a job has finished (completed, failed or cancelled)."""
+        return self._jobs[job_id]["finished_at"] is not None
+
+    def events(self, job_id, start=0):
+        """
+        (first index, events) a job has published from index `start` on, or None if the job
+        is unknown. Only the last `event_capacity` events are kept; the first index is later
+        than `start` when older ones were dropped.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            return job["events"].read(start)
+        except (EOFError, BrokenPipeError, ConnectionError):
+            return start, []
+
+    def instrumentation(self):
+        """(labels, summary) for every job that published instrumentation, for /metrics."""
+        samples = []
+        for job_id, job in list(self._jobs.items()):
+            try:
+                summary = job["progress"].get("instrumentation")
+            except (EOFError, BrokenPipeError, ConnectionError):
+                continue
+            if summary is not None:
+                samples.append(({"job": job_id}, summary))
+        return samples
+
+    def list(self):
+        """Statuses of all known jobs, newest first."""
+        jobs = sorted(self._jobs.values(), key=lambda j: j["submitted_at"], reverse=True)
+        return [self.status(job["id"]) for job in jobs]
+
+    def result(self, job_id):
+        """Return (state, result) for a job; result is None until it finishes successfully."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None, None
+        return self._state(job), job["result"]
+
+    def cancel(self, job_id):
+        """Cancel a queued job or ask a running one to stop. Returns False for unknown/finished jobs."""
+        job = self._jobs.get(job_id)
+        if job is None or job["future"].done():
+            return False
+        if not job["future"].cancel():
+            job["progress"]["cancel_requested"] = True
+        return True
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
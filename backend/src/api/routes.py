@@ -1,12 +1,76 @@
-from flask import Blueprint, jsonify, request
-from src.agent.q_learning import QLearningAgent
+import os
+import json
+import time
+
+import numpy as np
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 
-import random
-from flask import Blueprint, jsonify
+from src.agent.q_learning import QLearningAgent
+from src.agent.shared_q_table import SharedQTable
+from src.agent.instrumentation import render_prometheus
+from src.agent.policy import GreedyPolicy
+from src.agent.episode_stats import EpisodeStats
+from src.api.jobs import JobManager, stage_q_table
+from src.api.curves import CurveDownsampler, curve_view, parse_view_args
 
 
 routes = Blueprint("routes", __name__)
-agent = QLearningAgent()
+# The served agent's cluster is rebuilt from its seed, e.g. when /run-single keeps training it
+agent_seed = np.random.SeedSequence().entropy
+agent = QLearningAgent(rng=agent_seed)
+
+# Optional read-only, zero-copy view of the Q-table shared by parallel batch training
+shared_q_table = SharedQTable(os.environ["SHARED_Q_TABLE"], mode="r") if os.environ.get("SHARED_Q_TABLE") else None
+
+# Training runs as background jobs; finished training jobs replace the served agent
+jobs = JobManager()
+
+# Greedy action lookup served by /policy/recommend, built once per Q-table.
+# POLICY_Q_TABLE points at a table to serve from startup (.npz, or a SharedQTable directory).
+if os.environ.get("POLICY_Q_TABLE"):
+    agent.load_q_table(os.environ["POLICY_Q_TABLE"])
+
+
+def _policy_source():
+    # The shared table (if any) is served unless a table was loaded explicitly
+    if shared_q_table is not None and not os.environ.get("POLICY_Q_TABLE"):
+        return shared_q_table
+    return agent.q_table
+
+
+policy = GreedyPolicy.from_q_table(_policy_source())
+
+
+def _adopt_trained_agent(job_id, job):
+    # The job's seed rebuilds the cluster it trained on (in its initial layout), so
+    # /server-health and the metrics describe that cluster
+    global agent, agent_seed, policy
+    if job["type"] != "train" or job["result"].get("cancelled"):
+        return
+    params, result = job["params"], job["result"]
+    trained = QLearningAgent(
+        alpha=params.get("alpha", 0.1),
+        gamma=params.get("gamma", 0.9),
+        episodes=params.get("episodes", 2000),
+        time_steps_per_episode=params.get("time_steps", 50),
+        rng=result["seed"]
+    )
+    trained.load_q_table(result["q_table_path"])
+    trained.stats = EpisodeStats.from_state(result["episode_stats"])
+    agent, agent_seed = trained, result["seed"]
+    policy = GreedyPolicy.from_q_table(_policy_source())
+
+
+jobs.add_listener(_adopt_trained_agent)
+
+
+def _job_accepted(job_id, message):
+    return jsonify({
+        "message": message,
+        "job_id": job_id,
+        "status_url": f"/api/jobs/{job_id}",
+        "result_url": f"/api/jobs/{job_id}/result"
+    }), 202
 
 @routes.route("/")
 def index():
@@ -17,87 +81,195 @@ def index():
 
 @routes.route("/run-single", methods=["POST"])
 def run_single_episode():
+    """Keep training the served agent (its Q-table, cluster and settings) as a background job."""
     try:
-        agent.env.reset()
-        agent.train()
-        metrics = agent.env.get_metrics()
-        return jsonify({
-            "message": "Single training run complete.",
-            "metrics": metrics,
-            "avg_reward": sum(agent.get_learning_curve()) / len(agent.get_learning_curve())
-        })
+        params = {
+            "alpha": agent.initial_alpha,
+            "gamma": agent.gamma,
+            "episodes": agent.episodes,
+            "time_steps": agent.time_steps,
+            "seed": agent_seed,
+            "q_table_path": stage_q_table(agent.q_table),
+        }
+        job_id = jobs.submit("train", params)
+        return _job_accepted(job_id, "Single training run queued.")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @routes.route("/batch", methods=["POST"])
 def batch_run():
-    data = request.get_json(force=True)
-    episodes = data.get("episodes", 500)
-    runs = data.get("runs", 10)
-    time_steps = data.get("time_steps", 50)
+    data = request.get_json(silent=True) or {}
+    params = {
+        "runs": data.get("runs", 10),
+        "episodes": data.get("episodes", 500),
+        "time_steps": data.get("time_steps", 50),
+        "alpha": data.get("alpha", 0.1),
+        "gamma": data.get("gamma", 0.9),
+        "independent_runs": data.get("independent_runs", False),
+        "seed": data.get("seed")
+    }
 
     try:
-        from backend.batch_test import run_batch_simulations
-        results = run_batch_simulations(
-            num_runs=runs,
-            episodes=episodes,
-            time_steps=time_steps,
-            alpha=0.1,
-            gamma=0.9,
-            epsilon=0.9
-        )
-        return jsonify({
-            "message": f"Batch completed with {runs} runs.",
-            "results": results
-        })
+        job_id = jobs.submit("batch", params)
+        return _job_accepted(job_id, f"Batch with {params['runs']} runs queued.")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Background jobs
+@routes.route("/jobs", methods=["GET"])
+def list_jobs():
+    return jsonify({"jobs": jobs.list()})
+
+@routes.route("/jobs", methods=["POST"])
+def submit_job():
+    data = request.get_json(silent=True) or {}
+    job_type = data.get("type", "train")
+    try:
+        job_id = jobs.submit(job_type, data.get("params", {}))
+        return _job_accepted(job_id, f"{job_type.capitalize()} job queued.")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@routes.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(status)
+
+@routes.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    state, result = jobs.result(job_id)
+    if state is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if result is None:
+        return jsonify({"job_id": job_id, "state": state, "message": "Result not available yet."}), 202 if state in ("queued", "running") else 409
+    return jsonify({"job_id": job_id, "state": state, **result})
+
+@routes.route("/jobs/<job_id>/stream", methods=["GET"])
+def stream_job(job_id):
+    """
+    Server-sent events for a running job.
+    Training jobs emit `episode` events ({"episode", "reward"}); `every=k` keeps every k-th
+    episode and `window=w` replaces the reward with the mean of the last w episodes.
+    Batch jobs emit `run` events. A final `done` event carries the job state.
+    Reconnecting clients resume after the `Last-Event-ID` they received. Jobs keep their
+    last 10k events (see EventLog), so a stream opened late starts at the oldest kept one.
+    """
+    if jobs.status(job_id) is None:
+        return jsonify({"error": "Unknown job"}), 404
+    every, window, start = parse_view_args(request.args)
+    poll = request.args.get("poll", 0.5, type=float)
+    resume = request.headers.get("Last-Event-ID", type=int)
+
+    def generate():
+        sampler = CurveDownsampler(every, window, start)
+        cursor = 0
+        last_sent = time.monotonic()
+        while True:
+            finished = jobs.done(job_id)
+            first, batch = jobs.events(job_id, cursor)
+            frames = []
+            for offset, event in enumerate(batch):
+                index = first + offset
+                if "episode" in event:
+                    point = sampler.push(event["episode"], event["reward"])
+                    if point is None:
+                        continue
+                    name, event = "episode", {**event, "episode": point[0], "reward": point[1]}
+                else:
+                    name = "run"
+                # Earlier events still feed the rolling window, but are not re-sent
+                if resume is None or index > resume:
+                    frames.append(f"id: {index}\nevent: {name}\ndata: {json.dumps(event)}\n\n")
+            cursor = first + len(batch)
+            if frames:
+                last_sent = time.monotonic()
+                yield "".join(frames)
+            if finished:
+                yield f"event: done\ndata: {json.dumps(jobs.status(job_id))}\n\n"
+                return
+            if time.monotonic() - last_sent > 15:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            time.sleep(poll)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@routes.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    if not jobs.cancel(job_id):
+        return jsonify({"error": "Job not found or already finished"}), 404
+    return jsonify({"job_id": job_id, "message": "Cancellation requested."}), 202
+
 @routes.route("/qtable", methods=["GET"])
 def get_qtable():
     try:
-        q_table_data = {
-            str(k): {str(a): q for a, q in v.items()}
-            for k, v in agent.q_table.items()
-        }
-        return jsonify(q_table_data)
+        table = shared_q_table if shared_q_table is not None else agent.q_table
+        return jsonify(table.to_dict())
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+@routes.route("/policy", methods=["GET"])
+def policy_info():
+    return jsonify({
+        "states": len(policy),
+        "num_bins": policy.num_bins,
+        "built_at": policy.built_at,
+    })
+
+
+@routes.route("/policy/reload", methods=["POST"])
+def reload_policy():
+    """Rebuild the greedy lookup, e.g. to pick up updates to a shared Q-table."""
+    global policy
+    policy = GreedyPolicy.from_q_table(_policy_source())
+    return policy_info()
+
+
+@routes.route("/policy/recommend", methods=["POST"])
+def recommend_migrations():
+    """
+    Recommend migrations for a cluster snapshot using the greedy policy, without training.
+    Body: a snapshot {"hosts": [...], "vms": [...], "max_migrations": n} (see GreedyPolicy.recommend),
+    or {"snapshots": [...], "max_migrations": n} to score many clusters in one request.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    max_migrations = data.get("max_migrations", 1)
+    try:
+        if "snapshots" in data:
+            snapshots = data["snapshots"]
+            if not isinstance(snapshots, list) or not all(isinstance(s, dict) for s in snapshots):
+                raise TypeError("snapshots must be a list of objects")
+            return jsonify({"results": policy.recommend_batch(snapshots, max_migrations)})
+        return jsonify(policy.recommend(data, max_migrations))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid snapshot: {e}"}), 400
+
+
 @routes.route("/train-custom", methods=["POST"])
 def train_custom():
     try:
-        global agent  
         data = request.get_json(force=True)
 
-        alpha = data.get("alpha", 0.1)
-        gamma = data.get("gamma", 0.9)
-        episodes = data.get("episodes", 2000)
-        time_steps = data.get("time_steps", 50)
-
-        # Reinitialize the global agent with new config
-        agent = QLearningAgent(
-            alpha=alpha,
-            gamma=gamma,
-            episodes=episodes,
-            time_steps_per_episode=time_steps
-        )
-
-        agent.train()
-
-        metrics = agent.env.get_metrics()
-        rewards = agent.get_learning_curve()
-        avg_reward = sum(rewards) / len(rewards) if rewards else 0
-
-        return jsonify({
-            "message": "Custom training completed.",
-            "episodes": episodes,
-            "time_steps": time_steps,
-            "alpha": alpha,
-            "gamma": gamma,
-            "metrics": metrics,
-            "avg_reward": avg_reward
-        })
+        params = {
+            "alpha": data.get("alpha", 0.1),
+            "gamma": data.get("gamma", 0.9),
+            "episodes": data.get("episodes", 2000),
+            "time_steps": data.get("time_steps", 50),
+            "seed": data.get("seed"),
+            "instrument": data.get("instrument", False)
+        }
+
+        # Trains a fresh agent with the new config; it is served once the job completes
+        job_id = jobs.submit("train", params)
+        return _job_accepted(job_id, "Custom training queued.")
 
     except Exception as e:
         import traceback
@@ -111,41 +283,73 @@ def get_learning_curve():
     """
     Returns the reward earned in each episode during training.
     Useful for plotting how the agent's performance improves over time.
+    Optional query args give a smaller view: `every`, `window`, `start` and `max_points`
+    (see /jobs/<id>/stream); the sampled episode numbers are returned in `episodes`.
+    Very long runs keep a decimated history (see EpisodeStats); `episodes` is then always
+    returned, and `every`/`window` count recorded points. `stats` holds running aggregates
+    of reward, energy, migrations and SLA violations.
     """
     try:
-        rewards = agent.get_learning_curve()
-
-        if not rewards:
+        stats = agent.stats
+        if not stats.count:
             return jsonify({
                 "message": "No training data found. Please run training first.",
                 "episode_rewards": []
             }), 200
 
-        return jsonify({
+        episodes, rewards = stats.history("reward")
+        body = {
             "message": "Episode reward curve retrieved successfully.",
-            "total_episodes": len(rewards),
-            "average_reward": sum(rewards) / len(rewards),
-            "episode_rewards": rewards
-        }), 200
+            "total_episodes": stats.count,
+            "average_reward": stats.mean("reward"),
+            "episode_rewards": rewards.tolist(),
+            "stats": stats.summary()
+        }
+        if stats.stride > 1:
+            body["episodes"] = episodes.tolist()
+        if any(key in request.args for key in ("every", "window", "start", "max_points")):
+            every, window, start = parse_view_args(request.args, total=len(rewards))
+            body["episodes"], body["episode_rewards"] = curve_view(rewards, every, window, start, episodes)
+            body.update({"every": every, "window": window})
+        return jsonify(body), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@routes.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus scrape endpoint: phase timings, counters and steps/migrations per second of
+    instrumented training (jobs submitted with "instrument": true, and the served agent if
+    its instrumentation is enabled), plus the number of jobs in each state.
+    """
+    samples = jobs.instrumentation()
+    if agent.instrumentation is not None:
+        samples.append(({"job": "served"}, agent.instrumentation.summary()))
+    states = {}
+    for job in jobs.list():
+        states[job["state"]] = states.get(job["state"], 0) + 1
+    gauges = {"jobs": ("Known jobs by state", [({"state": state}, count) for state, count in states.items()])}
+    return Response(render_prometheus(samples, gauges), mimetype="text/plain; version=0.0.4")
+
+
 @routes.route("/server-health", methods=["GET"])
 def server_health():
     """
-    Returns live simulation data for 6 servers.
+    Returns the hosts of the served agent's environment.
     Status:
         - Healthy: CPU < 70% and RAM < 70%
         - Warning: 70% <= CPU < 90% or RAM >= 70%
         - Critical: CPU >= 90% or RAM >= 90%
+    For a continuous feed of a large cluster, use the telemetry WebSocket (src/api/telemetry.py).
     """
+    env = agent.env
+    cpus = (env.get_cpu_utilizations() * 100).round().astype(int).tolist()
+    rams = (env.get_mem_utilizations() * 100).round().astype(int).tolist()
+    powers = env.get_host_powers().tolist()
     servers = []
-    for i in range(1, 7):
-        cpu = random.randint(0, 100)
-        ram = random.randint(0, 100)
-        
+    for i, (cpu, ram, power) in enumerate(zip(cpus, rams, powers), start=1):
         if cpu >= 90 or ram >= 90:
             status = "Critical"
         elif cpu >= 70 or ram >= 70:
@@ -157,6 +361,7 @@ def server_health():
             "name": f"Server-{i}",
             "cpu": cpu,
             "ram": ram,
+            "power": round(power, 1),
             "status": status
         })
 
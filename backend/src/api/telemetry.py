@@ -0,0 +1,258 @@
+import json
+import time
+import asyncio
+import logging
+import argparse
+
+import numpy as np
+
+# --- Live Telemetry ---
+#
+# The dashboard connects to ws://<host>:3001 and receives JSON frames:
+#   {"type": "snapshot", "seq": n, "hosts": {"id": [...], "cpu": [...], ...}, "totals": {...}, "training": {...}}
+#   {"type": "delta",    "seq": n, "hosts": {"id": [...], <only the changed hosts>}, "totals": {...}, "training": {...}}
+# Host columns are parallel arrays: cpu/mem utilization (fractions), power (W), vms (count)
+# and online. A client applies every delta with seq = last seq + 1 on top of its snapshot.
+# Values are rounded before they are compared, so a host only appears in a delta when
+# a rounded value moved.
+
+HOST_FIELDS = ("cpu", "mem", "power", "vms", "online")
+
+
+class FrameEncoder:
+    """Samples an environment and encodes snapshot and delta frames against the last broadcast state."""
+
+    def __init__(self, precision=3):
+        self.precision = precision
+        self.seq = 0
+        self.sent = None  # Host columns as of frame `seq`
+        self.totals = {}
+        self.training = None
+
+    def _sample(self, env):
+        cpu = env.get_cpu_utilizations()
+        mem = env.get_mem_utilizations()
+        active = env.host_vm_count > 0
+        return {
+            "cpu": np.round(np.where(active, cpu, 0.0), self.precision),
+            "mem": np.round(np.where(active, mem, 0.0), self.precision),
+            "power": np.round(env.get_host_powers(), 1),
+            "vms": env.host_vm_count.copy(),
+            "online": env.host_online.copy(),
+        }
+
+    @staticmethod
+    def _columns(columns, idx):
+        hosts = {"id": idx.tolist()}
+        for field in HOST_FIELDS:
+            hosts[field] = columns[field][idx].tolist()
+        return hosts
+
+    def update(self, env, training=None):
+        """Advance to the next frame and return it as a delta over the previous one."""
+        current = self._sample(env)
+        if self.sent is None or len(self.sent["cpu"]) != len(current["cpu"]):
+            changed = np.arange(len(current["cpu"]))
+        else:
+            mask = np.zeros(len(current["cpu"]), dtype=bool)
+            for field in HOST_FIELDS:
+                mask |= current[field] != self.sent[field]
+            changed = np.flatnonzero(mask)
+        metrics = env.get_metrics()
+        self.sent = current
+        self.seq += 1
+        self.totals = {
+            "power": round(float(metrics["total_power_consumption"]), 1),
+            "energy_wh": round(float(metrics["energy_wh"]), 1),
+            "active_hosts": int(metrics["active_hosts"]),
+            "active_vms": int(current["vms"].sum()),
+            "avg_cpu_utilization": round(float(metrics["avg_cpu_utilization"]), self.precision),
+            "avg_mem_utilization": round(float(metrics["avg_mem_utilization"]), self.precision),
+            "sla_violations": int(metrics["sla_violations"]),
+        }
+        self.training = training
+        return self._frame("delta", self._columns(current, changed))
+
+    def snapshot(self):
+        """Full frame for the current seq (what a newly connected client starts from)."""
+        return self._frame("snapshot", self._columns(self.sent, np.arange(len(self.sent["cpu"]))))
+
+    def _frame(self, kind, hosts):
+        return {
+            "type": kind,
+            "seq": self.seq,
+            "timestamp": time.time(),
+            "hosts": hosts,
+            "totals": self.totals,
+            "training": self.training,
+        }
+
+
+def _encode(frame):
+    return json.dumps(frame, separators=(",", ":"))
+
+# --- WebSocket Server ---
+
+class TelemetryServer:
+    """
+    Streams one environment to any number of WebSocket clients.
+
+    A single producer samples the environment `hz` times per second. It encodes each frame
+    once and hands the same message to every client's bounded queue, so the cost of a frame
+    does not depend on the number of clients. Changes between two frames are coalesced into
+    one delta. A client whose queue is full has its backlog dropped and gets a fresh
+    snapshot instead, so a slow connection never holds up the others.
+
+    The environment is driven by `simulate()` (workload drift, optionally with periodic
+    consolidation) or by training an agent on it (`train()`). Either way, frames are only
+    read from the environment.
+    """
+
+    def __init__(self, env, hz=2.0, queue_size=8, precision=3):
+        self.env = env
+        self.hz = hz
+        self.queue_size = queue_size
+        self.encoder = FrameEncoder(precision)
+        self.clients = {}
+        self.training = None
+        self._snapshot = (None, None)  # (seq, encoded snapshot), built at most once per frame
+        self._stopping = False
+        self.encoder.update(env)
+
+    def _snapshot_message(self):
+        seq, message = self._snapshot
+        if seq != self.encoder.seq:
+            message = _encode(self.encoder.snapshot())
+            self._snapshot = (self.encoder.seq, message)
+        return message
+
+    def broadcast(self):
+        """Encode the next frame and queue it for every client."""
+        frame = self.encoder.update(self.env, self.training)
+        if not self.clients:
+            return
+        message = _encode(frame)
+        for queue in self.clients.values():
+            if queue.full():
+                # Too slow for deltas: drop the backlog and resynchronize from the current state
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot_message())
+            else:
+                queue.put_nowait(message)
+
+    async def handle(self, websocket, path=None):
+        import websockets
+
+        # Registered together with its snapshot (no await in between), so no delta is missed
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        queue.put_nowait(self._snapshot_message())
+        self.clients[websocket] = queue
+        logging.info("🔌 Telemetry client connected (%d total)", len(self.clients))
+        try:
+            while True:
+                await websocket.send(await queue.get())
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            del self.clients[websocket]
+            logging.info("🔌 Telemetry client disconnected (%d left)", len(self.clients))
+
+    async def produce(self):
+        """Broadcast a frame every 1/hz seconds."""
+        period = 1.0 / self.hz
+        next_frame = time.monotonic()
+        while not self._stopping:
+            next_frame += period
+            await asyncio.sleep(max(0.0, next_frame - time.monotonic()))
+            self.broadcast()
+
+    async def simulate(self, steps_per_second=10.0, plan_every=None):
+        """
+        Drive the environment in place: one update_vm_workloads() + tick per step, and with
+        `plan_every`, an applied consolidation plan (src/agent/planner.py) every that many steps.
+        """
+        from src.agent.planner import plan_consolidation
+
+        step = 0
+        while not self._stopping:
+            self.env.update_vm_workloads()
+            self.env.tick_idle_counters()
+            step += 1
+            if plan_every and step % plan_every == 0:
+                plan_consolidation(self.env, apply=True)
+            await asyncio.sleep(1.0 / steps_per_second)
+
+    async def train(self, agent):
+        """
+        Train `agent` (whose env this server streams) in a worker thread, publishing its progress.
+        Frames are sampled while training runs, so they may show a migration the agent is
+        still evaluating.
+        """
+        def on_episode(event):
+            self.training = {
+                "episode": event["episode"],
+                "episodes": agent.episodes,
+                "progress": event["episode"] / agent.episodes,
+                "reward": event["reward"],
+                "epsilon": event["epsilon"],
+            }
+            return not self._stopping
+
+        await asyncio.get_running_loop().run_in_executor(None, agent.train, on_episode)
+        logging.info("✅ Training finished; streaming the final state")
+        while not self._stopping:
+            await asyncio.sleep(1.0)
+
+    def stop(self):
+        self._stopping = True
+
+    async def serve(self, driver, host="0.0.0.0", port=3001):
+        """Serve clients while `driver` (simulate() or train()) runs the environment."""
+        try:
+            import websockets
+        except ImportError as e:
+            raise ImportError("The telemetry server requires websockets (pip install websockets)") from e
+
+        async with websockets.serve(self.handle, host, port):
+            logging.info("📡 Telemetry on ws://%s:%d (%d hosts, %.1f frames/s)", host, port, len(self.env.hosts), self.hz)
+            tasks = [asyncio.ensure_future(self.produce()), asyncio.ensure_future(driver)]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                self.stop()
+                for task in tasks:
+                    task.cancel()
+
+
+if __name__ == "__main__":
+    from src.env.cloud_env import CloudEnvironment
+    from src.agent.q_learning import QLearningAgent
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
+    parser = argparse.ArgumentParser(description="Stream a live simulation to the dashboard over WebSocket")
+    parser.add_argument("--hosts", type=int, default=1000, help="Number of hosts")
+    parser.add_argument("--vms", type=int, default=3000, help="Number of VMs")
+    parser.add_argument("--port", type=int, default=3001, help="WebSocket port")
+    parser.add_argument("--hz", type=float, default=2.0, help="Frames per second sent to clients")
+    parser.add_argument("--steps_per_second", type=float, default=10.0, help="Simulation steps per second")
+    parser.add_argument("--plan_every", type=int, default=None, help="Apply a consolidation plan every N steps")
+    parser.add_argument("--train", action="store_true", help="Train a Q-learning agent on the streamed cluster instead")
+    parser.add_argument("--episodes", type=int, default=2000, help="Episodes to train (with --train)")
+    parser.add_argument("--power_model", default="linear", choices=["linear", "specpower"], help="Host power model")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the generated cluster")
+    args = parser.parse_args()
+
+    if args.train:
+        agent = QLearningAgent(episodes=args.episodes, num_hosts=args.hosts, num_vms=args.vms, rng=args.seed)
+        agent.env.set_power_model(args.power_model)
+        server = TelemetryServer(agent.env, hz=args.hz)
+        driver = server.train(agent)
+    else:
+        env = CloudEnvironment(num_hosts=args.hosts, num_vms=args.vms, rng=args.seed, power_model=args.power_model)
+        server = TelemetryServer(env, hz=args.hz)
+        driver = server.simulate(args.steps_per_second, args.plan_every)
+    try:
+        asyncio.run(server.serve(driver, port=args.port))
+    except KeyboardInterrupt:
+        print("\n🛑 Telemetry server stopped")
@@ -1,32 +1,94 @@
-import random
+
+import itertools
+
+import numpy as np
+
+from src.env.placement import PlacementEngine
+from src.env.power import LinearPowerModel, make_power_model
+
+# Globally unique version stamps for VM sets and demand layouts (see snapshot/restore)
+_TOKENS = itertools.count()
+
+# Per-host/per-VM state captured by snapshot(); host capacities never change and are shared
+SNAPSHOT_ARRAYS = (
+    'host_free_cpu', 'host_free_mem', 'host_idle_steps', 'host_vm_count', 'host_online',
+    'vm_cpu', 'vm_mem', 'vm_host', 'vm_active', 'vm_slot',
+    '_host_power', '_host_cpu_util', '_host_mem_util', '_host_active',
+)
+SNAPSHOT_SCALARS = (
+    '_total_power', '_active_hosts', '_sum_cpu_util', '_sum_mem_util', '_total_idle_steps',
+    '_next_vm_id', '_vms_token', '_layout_token', 'energy_wh',
+)
 
 # --- VM Class ---
 
 class VM:
-    """Represents a Virtual Machine with dynamic resource requirements."""
-    def __init__(self, vm_id, cpu_req, mem_req):
+    """
+    Represents a Virtual Machine with dynamic resource requirements.
+    A thin view over one slot of the environment's VM arrays.
+    """
+    def __init__(self, env, idx, vm_id):
+        self._env = env
+        self._idx = idx
         self.id = vm_id
-        self.cpu_req = cpu_req
-        self.mem_req = mem_req
-        self.assigned_host = None
+
+    @property
+    def cpu_req(self):
+        return float(self._env.vm_cpu[self._idx])
+
+    @property
+    def mem_req(self):
+        return float(self._env.vm_mem[self._idx])
+
+    @property
+    def assigned_host(self):
+        host_id = int(self._env.vm_host[self._idx])
+        return host_id if host_id >= 0 else None
 
     def update_requirements(self, cpu_delta, mem_delta):
         """Update the VM's CPU and memory requirements dynamically."""
-        self.cpu_req = max(0, self.cpu_req + cpu_delta)
-        self.mem_req = max(0, self.mem_req + mem_delta)
+        self._env.set_vm_requirements(
+            self._idx,
+            max(0, self.cpu_req + cpu_delta),
+            max(0, self.mem_req + mem_delta)
+        )
 
 # --- Host Class ---
 
 class Host:
-    """Represents a Physical Host with varying resources and power states."""
-    def __init__(self, host_id, total_cpu, total_mem):
+    """
+    Represents a Physical Host with varying resources and power states.
+    A thin view over one slot of the environment's host arrays.
+    """
+    def __init__(self, env, host_id):
+        self._env = env
         self.id = host_id
-        self.total_cpu = total_cpu
-        self.total_mem = total_mem
-        self.available_cpu = total_cpu
-        self.available_mem = total_mem
-        self.idle_steps = 0
-        self.vms = []
+
+    @property
+    def total_cpu(self):
+        return float(self._env.host_total_cpu[self.id])
+
+    @property
+    def total_mem(self):
+        return float(self._env.host_total_mem[self.id])
+
+    @property
+    def available_cpu(self):
+        return float(self._env.host_free_cpu[self.id])
+
+    @property
+    def available_mem(self):
+        return float(self._env.host_free_mem[self.id])
+
+    @property
+    def idle_steps(self):
+        return int(self._env.host_idle_steps[self.id])
+
+    @property
+    def vms(self):
+        """VMs currently placed on this host."""
+        env = self._env
+        return [env._vm_views[i] for i in env._host_slots[self.id]]
 
     def can_host(self, vm):
         """Check if the host has sufficient resources for a VM."""
@@ -34,23 +96,13 @@ class Host:
 
     def assign_vm(self, vm):
         """Assign a VM to this host if resources are available."""
-        if self.can_host(vm):
-            self.available_cpu -= vm.cpu_req
-            self.available_mem -= vm.mem_req
-            self.vms.append(vm)
-            vm.assigned_host = self.id
-            return True
-        return False
+        return self._env.assign_vm(vm, self.id)
 
     def remove_vm(self, vm):
         """Remove a VM from this host and free its resources."""
-        if vm in self.vms:
-            self.available_cpu += vm.cpu_req
-            self.available_mem += vm.mem_req
-            self.vms.remove(vm)
-            vm.assigned_host = None
-            return True
-        return False
+        if vm.assigned_host != self.id:
+            return False
+        return self._env.remove_vm(vm)
 
     def get_cpu_utilization(self):
         """Calculate current CPU utilization as a fraction."""
@@ -65,93 +117,431 @@ class Host:
         return (self.total_mem - self.available_mem) / self.total_mem
 
     def power_consumption(self):
-        """
-        Calculate power consumption based on CPU and memory utilization.
-        Uses a weighted model: 150W base + utilization-driven increase up to 250W.
-        """
-        if not self.vms:
-            return 0
-        base_power = 150
-        max_power = 250
-        cpu_util = self.get_cpu_utilization()
-        mem_util = self.get_mem_utilization()
-        util = 0.7 * cpu_util + 0.3 * mem_util
-        return base_power + (max_power - base_power) * util
+        """Current draw in watts under the environment's power model (0 for empty hosts)."""
+        return float(self._env._host_power[self.id])
 
 # --- Cloud Environment Class ---
 
 class CloudEnvironment:
-    """Manages a realistic cloud simulation with hosts and VMs."""
-    def __init__(self, num_hosts=12, num_vms=18):
+    """
+    Manages a realistic cloud simulation with hosts and VMs.
+
+    State is kept as a structure of arrays: per-host capacity, free capacity,
+    idle steps and VM counts, plus per-VM demands and a VM -> host index
+    (-1 when unplaced). `hosts` and `vms` hold thin `Host`/`VM` views over
+    these arrays for callers that work with objects.
+
+    VM slots are indexed for constant-time churn: a VM-id map, per-host slot
+    lists with swap-remove, and a set of unplaced VMs. Terminated slots are
+    recycled by `add_vm`.
+
+    All randomness comes from `rng` (a seed, SeedSequence or numpy Generator), so an
+    environment built from the same seed generates the same cluster and workload drift.
+
+    Host power comes from `power_model` (see src/env/power.py; a model or a name such as
+    "specpower"), evaluated for all hosts at once. Empty hosts are treated as switched off
+    and draw nothing. Each tick_idle_counters() call is one step of `step_seconds`, and
+    `energy_wh` integrates the draw over the steps since the last reset.
+    """
+    def __init__(self, num_hosts=12, num_vms=18, rng=None, power_model=None, step_seconds=300.0):
+        self.rng = np.random.default_rng(rng)
+
         # Heterogeneous hosts with varying CPU (80-120) and memory (160-240)
-        self.hosts = [Host(i, random.randint(80, 120), random.randint(160, 240)) for i in range(num_hosts)]
-        self.vms = [VM(i, random.randint(10, 30), random.randint(20, 50)) for i in range(num_vms)]
+        self.host_total_cpu = self.rng.integers(80, 121, num_hosts).astype(np.float64)
+        self.host_total_mem = self.rng.integers(160, 241, num_hosts).astype(np.float64)
+        self.host_free_cpu = self.host_total_cpu.copy()
+        self.host_free_mem = self.host_total_mem.copy()
+        self._inv_total_cpu = self._inverse(self.host_total_cpu)
+        self._inv_total_mem = self._inverse(self.host_total_mem)
+        self.host_idle_steps = np.zeros(num_hosts, dtype=np.int64)
+        self.host_vm_count = np.zeros(num_hosts, dtype=np.int64)
+        if isinstance(power_model, str):
+            power_model = make_power_model(power_model, self.host_total_cpu)
+        self.power_model = power_model if power_model is not None else LinearPowerModel()
+        self.step_seconds = step_seconds
+        self.energy_wh = 0.0
+        self.host_online = np.ones(num_hosts, dtype=bool)  # Offline hosts are skipped by placement
+
+        self.vm_cpu = self.rng.integers(10, 31, num_vms).astype(np.float64)
+        self.vm_mem = self.rng.integers(20, 51, num_vms).astype(np.float64)
+        self.vm_host = np.full(num_vms, -1, dtype=np.int64)
+        self.vm_active = np.ones(num_vms, dtype=bool)
+        self.vm_slot = np.zeros(num_vms, dtype=np.int64)  # Position in its host's slot list
+
+        self.hosts = [Host(self, i) for i in range(num_hosts)]
+        self._vm_views = [VM(self, i, i) for i in range(num_vms)]
+        self._vm_by_id = {vm.id: vm for vm in self._vm_views}
+        self._host_slots = [[] for _ in range(num_hosts)]
+        self._unplaced = set(range(num_vms))
+        self._free_slots = []
+        self._next_vm_id = num_vms
+
+        # Per-host cached contributions and running totals behind get_metrics()
+        self._host_power = np.zeros(num_hosts)
+        self._host_cpu_util = np.zeros(num_hosts)
+        self._host_mem_util = np.zeros(num_hosts)
+        self._host_active = np.zeros(num_hosts, dtype=bool)
+        self._total_power = 0.0
+        self._active_hosts = 0
+        self._sum_cpu_util = 0.0
+        self._sum_mem_util = 0.0
+        self._total_idle_steps = 0
+
+        self.placement = PlacementEngine(self.host_free_cpu, self.host_free_mem)
+
+        # Optional demand source replacing random drift (see src/env/workload.py)
+        self.workload = None
+
         self._history = []  # For simulate/rollback
+
+        # Version stamps: the VM set (ids, slots, order) and the demand layout that reset() places.
+        # `_views_token` is the VM set the Host/VM views were built for.
+        self._vms_token = self._views_token = self._layout_token = next(_TOKENS)
+        self._vm_index_cache = None
+        self._initial_layouts = {}  # strategy -> snapshot right after reset()'s initial allocation
         self.overload_threshold = 0.8
         self.underload_threshold = 0.2
         self._initial_allocation()
 
+    # --- Array-level accessors ---
+
+    @staticmethod
+    def _inverse(capacity):
+        """Elementwise 1/capacity, with 0 for zero-capacity hosts."""
+        return np.divide(1.0, capacity, out=np.zeros_like(capacity), where=capacity > 0)
+
+    def get_cpu_utilizations(self):
+        """Return the CPU utilization of every host as an array."""
+        return (self.host_total_cpu - self.host_free_cpu) * self._inv_total_cpu
+
+    def get_mem_utilizations(self):
+        """Return the memory utilization of every host as an array."""
+        return (self.host_total_mem - self.host_free_mem) * self._inv_total_mem
+
+    def get_host_powers(self):
+        """Return the power draw of every host as an array (0 for empty hosts)."""
+        power = self.power_model.power(self.get_cpu_utilizations(), self.get_mem_utilizations())
+        return np.where(self.host_vm_count > 0, power, 0.0)
+
+    def set_power_model(self, power_model):
+        """Switch power models (an instance or a name) and rebuild the cached power figures."""
+        if isinstance(power_model, str):
+            power_model = make_power_model(power_model, self.host_total_cpu)
+        self.power_model = power_model
+        self._layout_token = next(_TOKENS)  # Cached reset layouts hold the old powers
+        self._recompute_totals()
+
+    # --- Incremental metrics ---
+
+    def _refresh_host(self, host_id):
+        """Recompute one host's cached utilization and power and patch the running totals."""
+        if self.host_vm_count[host_id] > 0:
+            cpu_util = float((self.host_total_cpu[host_id] - self.host_free_cpu[host_id]) * self._inv_total_cpu[host_id])
+            mem_util = float((self.host_total_mem[host_id] - self.host_free_mem[host_id]) * self._inv_total_mem[host_id])
+            power = float(self.power_model.power(cpu_util, mem_util, host_id))
+            active = 1
+        else:
+            cpu_util = mem_util = power = 0.0
+            active = 0
+        was_active = 1 if self._host_active[host_id] else 0
+        self._total_power += power - self._host_power[host_id].item()
+        self._sum_cpu_util += cpu_util - self._host_cpu_util[host_id].item()
+        self._sum_mem_util += mem_util - self._host_mem_util[host_id].item()
+        self._active_hosts += active - was_active
+        self._host_power[host_id] = power
+        self._host_cpu_util[host_id] = cpu_util
+        self._host_mem_util[host_id] = mem_util
+        self._host_active[host_id] = active
+        self._update_placement(host_id)
+
+    def _update_placement(self, host_id):
+        if self.host_online[host_id]:
+            self.placement.update(host_id, self.host_free_cpu[host_id], self.host_free_mem[host_id])
+        else:
+            self.placement.update(host_id, -np.inf, -np.inf)
+
+    def _recompute_totals(self):
+        """Rebuild every cached contribution and running total from the arrays."""
+        active = self.host_vm_count > 0
+        self._host_active = active
+        self._host_cpu_util = np.where(active, self.get_cpu_utilizations(), 0.0)
+        self._host_mem_util = np.where(active, self.get_mem_utilizations(), 0.0)
+        self._host_power = np.where(active, self.power_model.power(self._host_cpu_util, self._host_mem_util), 0.0)
+        self._total_power = float(self._host_power.sum())
+        self._active_hosts = int(np.count_nonzero(active))
+        self._sum_cpu_util = float(self._host_cpu_util.sum())
+        self._sum_mem_util = float(self._host_mem_util.sum())
+        self._total_idle_steps = int(self.host_idle_steps.sum())
+        self.placement.rebuild(
+            np.where(self.host_online, self.host_free_cpu, -np.inf),
+            np.where(self.host_online, self.host_free_mem, -np.inf)
+        )
+
+    def set_host_online(self, host_id, online):
+        """Power a host on or off for placement purposes. Only empty hosts can go offline."""
+        if not online and self.host_vm_count[host_id] > 0:
+            raise ValueError(f"Host {host_id} still runs {self.host_vm_count[host_id]} VMs")
+        self.host_online[host_id] = online
+        self._update_placement(host_id)
+
+    def _apply_requirements(self, idx, cpu_req, mem_req):
+        """Write a VM's demands and its host's free capacity without touching the totals."""
+        host_id = self.vm_host[idx]
+        if host_id >= 0:
+            self.host_free_cpu[host_id] -= cpu_req - self.vm_cpu[idx]
+            self.host_free_mem[host_id] -= mem_req - self.vm_mem[idx]
+        self.vm_cpu[idx] = cpu_req
+        self.vm_mem[idx] = mem_req
+        self._layout_token = next(_TOKENS)
+        return host_id
+
+    def set_vm_requirements(self, idx, cpu_req, mem_req):
+        """Set a VM's demands, keeping its host's free capacity in sync."""
+        host_id = self._apply_requirements(idx, cpu_req, mem_req)
+        if host_id >= 0:
+            self._refresh_host(host_id)
+
+    def assign_vm(self, vm, host_id):
+        """Place an unplaced VM on a host if resources are available."""
+        idx = vm._idx
+        if (self.vm_host[idx] >= 0
+                or self.host_free_cpu[host_id] < self.vm_cpu[idx]
+                or self.host_free_mem[host_id] < self.vm_mem[idx]):
+            return False
+        self._attach(idx, host_id)
+        return True
+
+    def _attach(self, idx, host_id):
+        """Put an unplaced VM slot on a host without checking capacity."""
+        self.host_free_cpu[host_id] -= self.vm_cpu[idx]
+        self.host_free_mem[host_id] -= self.vm_mem[idx]
+        self.host_vm_count[host_id] += 1
+        self.vm_host[idx] = host_id
+        slots = self._host_slots[host_id]
+        self.vm_slot[idx] = len(slots)
+        slots.append(idx)
+        self._unplaced.discard(idx)
+        self._refresh_host(host_id)
+
+    def remove_vm(self, vm):
+        """Take a VM off its host and free the host's resources."""
+        idx = vm._idx
+        host_id = self.vm_host[idx]
+        if host_id < 0:
+            return False
+        self.host_free_cpu[host_id] += self.vm_cpu[idx]
+        self.host_free_mem[host_id] += self.vm_mem[idx]
+        self.host_vm_count[host_id] -= 1
+        self.vm_host[idx] = -1
+        # Swap-remove from the host's slot list
+        slots = self._host_slots[host_id]
+        pos = self.vm_slot[idx]
+        last = slots.pop()
+        if last != idx:
+            slots[pos] = last
+            self.vm_slot[last] = pos
+        self._unplaced.add(idx)
+        self._refresh_host(host_id)
+        return True
+
+    # --- VM lifecycle ---
+
+    @property
+    def vms(self):
+        """All live VMs, in arrival order."""
+        return list(self._vm_by_id.values())
+
+    def get_vm(self, vm_id):
+        """Look up a live VM by id, or None."""
+        return self._vm_by_id.get(vm_id)
+
+    def get_unplaced_vms(self):
+        """Return the live VMs that currently have no host (SLA violations)."""
+        return [self._vm_views[i] for i in self._unplaced]
+
+    def _grow_vm_arrays(self):
+        """Double the capacity of every per-VM array."""
+        old = len(self.vm_cpu)
+        new = max(2 * old, 16)
+        for name, fill in (('vm_cpu', 0.0), ('vm_mem', 0.0), ('vm_host', -1), ('vm_active', False), ('vm_slot', 0)):
+            arr = getattr(self, name)
+            grown = np.full(new, fill, dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+        self._vm_views.extend([None] * (new - old))
+        self._free_slots.extend(range(new - 1, old - 1, -1))
+
+    def add_vm(self, cpu_req, mem_req, vm_id=None):
+        """Register a new, unplaced VM and return it. Reuses terminated slots."""
+        if not self._free_slots:
+            self._grow_vm_arrays()
+        idx = self._free_slots.pop()
+        if vm_id is None:
+            vm_id = self._next_vm_id
+        self._next_vm_id = max(self._next_vm_id, vm_id + 1)
+        self.vm_cpu[idx] = cpu_req
+        self.vm_mem[idx] = mem_req
+        self.vm_host[idx] = -1
+        self.vm_active[idx] = True
+        vm = VM(self, idx, vm_id)
+        self._vm_views[idx] = vm
+        self._vm_by_id[vm_id] = vm
+        self._unplaced.add(idx)
+        self._vms_token = self._views_token = self._layout_token = next(_TOKENS)
+        return vm
+
+    # --- Simulation ---
+
     def tick_idle_counters(self):
-        """Increment idle steps for hosts without VMs."""
-        for host in self.hosts:
-            if not host.vms:
-                host.idle_steps += 1
-            else:
-                host.idle_steps = 0
-
-    def _initial_allocation(self):
-        """Place VMs on hosts using a first-fit strategy."""
-        for vm in self.vms:
-            placed = False
-            for host in self.hosts:
-                if host.assign_vm(vm):
-                    placed = True
-                    break
+        """Advance one step: integrate energy over `step_seconds` and increment idle steps for hosts without VMs."""
+        self.energy_wh += self._total_power * self.step_seconds / 3600.0
+        empty = self.host_vm_count == 0
+        self.host_idle_steps = np.where(empty, self.host_idle_steps + 1, 0)
+        self._total_idle_steps = int(self.host_idle_steps.sum())
+
+    def place_vm(self, vm, strategy='first_fit'):
+        """
+        Place an unplaced VM using the capacity index.
+        strategy: 'first_fit', 'best_fit' or 'worst_fit'. Returns the host id, or None.
+        """
+        if vm.assigned_host is not None:
+            return None
+        host_id = self.placement.find_host(vm.cpu_req, vm.mem_req, strategy)
+        if host_id < 0:
+            return None
+        self.assign_vm(vm, host_id)
+        return host_id
+
+    def _initial_allocation(self, strategy='first_fit'):
+        """Place VMs on hosts using a first-fit strategy (or the given one)."""
+        for vm in self._vm_by_id.values():
+            self.place_vm(vm, strategy)
             # SLA violation if not placed
 
     def update_vm_workloads(self):
-        """Simulate dynamic changes in VM resource demands."""
-        for vm in self.vms:
-            cpu_delta = random.randint(-5, 5)
-            mem_delta = random.randint(-10, 10)
-            vm.update_requirements(cpu_delta, mem_delta)
+        """
+        Simulate dynamic changes in VM resource demands.
+        With a `workload` attached (e.g. a TraceReplayer), the next trace step is applied
+        instead of random drift.
+        """
+        if self.workload is not None:
+            self.workload.apply(self)
+            return
+        idx = np.fromiter((vm._idx for vm in self._vm_by_id.values()), dtype=np.int64, count=len(self._vm_by_id))
+        self.apply_vm_workloads(
+            idx,
+            np.maximum(0, self.vm_cpu[idx] + self.rng.integers(-5, 6, len(idx))),
+            np.maximum(0, self.vm_mem[idx] + self.rng.integers(-10, 11, len(idx)))
+        )
+
+    def apply_vm_workloads(self, idx, cpu_req, mem_req):
+        """
+        Set the demands of many VMs (by slot index, each at most once) in one vectorized update:
+        per-host demand changes are summed with bincount, then the totals are rebuilt.
+        """
+        host = self.vm_host[idx]
+        placed = host >= 0
+        num_hosts = len(self.hosts)
+        self.host_free_cpu -= np.bincount(host[placed], weights=(cpu_req - self.vm_cpu[idx])[placed], minlength=num_hosts)
+        self.host_free_mem -= np.bincount(host[placed], weights=(mem_req - self.vm_mem[idx])[placed], minlength=num_hosts)
+        self.vm_cpu[idx] = cpu_req
+        self.vm_mem[idx] = mem_req
+        self._layout_token = next(_TOKENS)
+        # Every host may have changed; one vectorized rebuild beats per-VM patches
+        self._recompute_totals()
 
     def get_state(self):
         """Return a simplified state representation for decision-making."""
-        state = []
-        for host in self.hosts:
-            if not host.vms:
-                state.append('off')
-                continue
-            util = host.get_cpu_utilization()
-            if util > self.overload_threshold:
-                state.append('over')
-            elif util < self.underload_threshold:
-                state.append('under')
-            else:
-                state.append('normal')
-        return tuple(state)
+        util = self.get_cpu_utilizations()
+        labels = np.select(
+            [self.host_vm_count == 0, util > self.overload_threshold, util < self.underload_threshold],
+            ['off', 'over', 'under'],
+            default='normal'
+        )
+        return tuple(labels.tolist())
 
     def get_host_status(self):
         """Categorize hosts based on utilization levels."""
-        overloaded, underloaded, normal = [], [], []
-        for host in self.hosts:
-            if not host.vms:
-                continue
-            util = host.get_cpu_utilization()
-            if util > self.overload_threshold:
-                overloaded.append(host)
-            elif util < self.underload_threshold:
-                underloaded.append(host)
-            else:
-                normal.append(host)
-        return overloaded, underloaded, normal
+        util = self.get_cpu_utilizations()
+        active = self.host_vm_count > 0
+        over = active & (util > self.overload_threshold)
+        under = active & ~over & (util < self.underload_threshold)
+        normal = active & ~over & ~under
+        return (
+            [self.hosts[i] for i in np.flatnonzero(over)],
+            [self.hosts[i] for i in np.flatnonzero(under)],
+            [self.hosts[i] for i in np.flatnonzero(normal)],
+        )
+
+    def evaluate_migration(self, src_id, dst_id, vm):
+        """
+        Predict the change in get_metrics() if `vm` moved from `src_id` to `dst_id`.
+        Side-effect free; see evaluate_migrations for the batched form.
+        """
+        deltas = self.evaluate_migrations([src_id], [dst_id], [vm])
+        return {key: values[0].item() for key, values in deltas.items()}
+
+    def evaluate_migrations(self, src_ids, dst_ids, vms):
+        """
+        Predict metric deltas for many candidate migrations at once without mutating the environment.
+        Each candidate only changes its source and destination host, so the deltas are derived
+        analytically from those two hosts and evaluated as array operations across all candidates.
+        Returns a dict of arrays keyed like get_metrics(), plus a boolean 'feasible' array;
+        infeasible candidates have all-zero deltas.
+        """
+        src = np.asarray(src_ids, dtype=np.int64)
+        dst = np.asarray(dst_ids, dtype=np.int64)
+        idx = np.fromiter((vm._idx for vm in vms), dtype=np.int64, count=len(src))
+        cpu = self.vm_cpu[idx]
+        mem = self.vm_mem[idx]
+
+        feasible = (
+            (self.vm_host[idx] == src)
+            & (self.host_free_cpu[dst] >= cpu)
+            & (self.host_free_mem[dst] >= mem)
+        )
+
+        def host_after(host, cpu_change, mem_change, count_change):
+            count = self.host_vm_count[host] + count_change
+            active = count > 0
+            cpu_util = np.where(active, (self.host_total_cpu[host] - self.host_free_cpu[host] + cpu_change) * self._inv_total_cpu[host], 0.0)
+            mem_util = np.where(active, (self.host_total_mem[host] - self.host_free_mem[host] + mem_change) * self._inv_total_mem[host], 0.0)
+            power = np.where(active, self.power_model.power(cpu_util, mem_util, host), 0.0)
+            return active, cpu_util, mem_util, power
+
+        src_active, src_cpu, src_mem, src_power = host_after(src, -cpu, -mem, -1)
+        dst_active, dst_cpu, dst_mem, dst_power = host_after(dst, cpu, mem, 1)
+
+        d_power = (src_power - self._host_power[src]) + (dst_power - self._host_power[dst])
+        d_active = (src_active.astype(np.int64) - self._host_active[src]) + (dst_active.astype(np.int64) - self._host_active[dst])
+        d_cpu_sum = (src_cpu - self._host_cpu_util[src]) + (dst_cpu - self._host_cpu_util[dst])
+        d_mem_sum = (src_mem - self._host_mem_util[src]) + (dst_mem - self._host_mem_util[dst])
+
+        before = self.get_metrics()
+        active_after = self._active_hosts + d_active
+        safe_active = np.maximum(active_after, 1)
+        d_avg_cpu = np.where(active_after > 0, (self._sum_cpu_util + d_cpu_sum) / safe_active, 0.0) - before['avg_cpu_utilization']
+        d_avg_mem = np.where(active_after > 0, (self._sum_mem_util + d_mem_sum) / safe_active, 0.0) - before['avg_mem_utilization']
+
+        # A same-host "migration" succeeds but changes nothing
+        moves = feasible & (src != dst)
+        zeros = np.zeros(len(src))
+        return {
+            'total_power_consumption': np.where(moves, d_power, 0.0),
+            'active_hosts': np.where(moves, d_active, 0),
+            'avg_cpu_utilization': np.where(moves, d_avg_cpu, 0.0),
+            'avg_mem_utilization': np.where(moves, d_avg_mem, 0.0),
+            'total_idle_steps': zeros.astype(np.int64),
+            'sla_violations': zeros.astype(np.int64),
+            'energy_wh': zeros,
+            'feasible': feasible
+        }
 
     def simulate_migration(self, src_id, dst_id, vm):
         """Simulate a VM migration and return success status."""
         src = self.hosts[src_id]
         dst = self.hosts[dst_id]
-        if vm not in src.vms or not dst.can_host(vm):
+        if vm.assigned_host != src_id or not dst.can_host(vm):
             return False
         self._history.append((src, dst, vm))
         src.remove_vm(vm)
@@ -164,7 +554,8 @@ class CloudEnvironment:
             return
         src, dst, vm = self._history.pop()
         dst.remove_vm(vm)
-        src.assign_vm(vm)
+        # Unchecked: the source may have been overcommitted by demand drift before the move
+        self._attach(vm._idx, src.id)
 
     def migrate_vm(self, vm, target_host):
         """Migrate a VM to a target host if possible."""
@@ -179,39 +570,126 @@ class CloudEnvironment:
 
     def terminate_vm(self, vm_id):
         """Terminate a VM and remove it from the environment."""
-        vm = next((v for v in self.vms if v.id == vm_id), None)
-        if vm and vm.assigned_host is not None:
-            host = self.hosts[vm.assigned_host]
-            host.remove_vm(vm)
-            self.vms.remove(vm)
+        vm = self._vm_by_id.pop(vm_id, None)
+        if vm is None:
+            return False
+        self.remove_vm(vm)
+        idx = vm._idx
+        self.vm_active[idx] = False
+        self._unplaced.discard(idx)
+        self._free_slots.append(idx)
+        self._vms_token = self._views_token = self._layout_token = next(_TOKENS)
+        return True
 
     def get_total_power(self):
         """Calculate total power consumption across all hosts."""
-        return sum(host.power_consumption() for host in self.hosts)
-
-    def reset(self):
-        """Reset the environment for a new simulation episode."""
-        for host in self.hosts:
-            host.vms.clear()
-            host.available_cpu = host.total_cpu
-            host.available_mem = host.total_mem
-            host.idle_steps = 0
-        for vm in self.vms:
-            vm.assigned_host = None
+        return self._total_power
+
+    def reset(self, strategy='first_fit', use_cache=True):
+        """
+        Reset the environment for a new simulation episode.
+        The layout produced by the initial allocation is cached per strategy and restored on later
+        resets, as long as no VM demand or VM has changed since (the result would be identical).
+        """
+        cached = self._initial_layouts.get(strategy) if use_cache else None
+        if cached is not None and cached['scalars']['_layout_token'] == self._layout_token:
+            self.restore(cached)
+            return
+        self.host_free_cpu = self.host_total_cpu.copy()
+        self.host_free_mem = self.host_total_mem.copy()
+        self.host_idle_steps[:] = 0
+        self.energy_wh = 0.0
+        self.host_vm_count[:] = 0
+        self.host_online[:] = True
+        self.vm_host[:] = -1
+        self._host_slots = [[] for _ in self.hosts]
+        self._unplaced = {vm._idx for vm in self._vm_by_id.values()}
         self._history.clear()
-        self._initial_allocation()
+        # Resync from the arrays so floating-point drift never outlives an episode
+        self._recompute_totals()
+        self._initial_allocation(strategy)
+        if any(s['scalars']['_layout_token'] != self._layout_token for s in self._initial_layouts.values()):
+            self._initial_layouts = {}
+        self._initial_layouts[strategy] = self.snapshot()
+
+    # --- Snapshots ---
+
+    def _vm_index(self):
+        """(slot ids, live slots in arrival order) of the current VM set, cached per VM-set version."""
+        if self._vm_index_cache is None or self._vm_index_cache[0] != self._vms_token:
+            ids = tuple(vm.id if vm is not None else None for vm in self._vm_views)
+            order = tuple(vm._idx for vm in self._vm_by_id.values())
+            self._vm_index_cache = (self._vms_token, ids, order)
+        return self._vm_index_cache[1:]
+
+    def snapshot(self):
+        """
+        Capture the dynamic state as array copies plus the per-host slot lists and the
+        placement index: no Host/VM objects are copied. The snapshot is a plain picklable
+        dict, so it can be sent to worker processes and restored into any environment built
+        with the same hosts (e.g. a fork). The RNG, undo log and workload source are not included.
+        """
+        ids, order = self._vm_index()
+        return {
+            'arrays': {name: getattr(self, name).copy() for name in SNAPSHOT_ARRAYS},
+            'scalars': {name: getattr(self, name) for name in SNAPSHOT_SCALARS},
+            'host_slots': [slots.copy() for slots in self._host_slots],
+            'unplaced': self._unplaced.copy(),
+            'free_slots': self._free_slots.copy(),
+            'vm_ids': ids,
+            'vm_order': order,
+            'placement': self.placement.snapshot(),
+        }
+
+    def restore(self, snapshot):
+        """Return to a snapshot's state. The snapshot itself is left untouched and can be restored again."""
+        for name, arr in snapshot['arrays'].items():
+            setattr(self, name, arr.copy())
+        for name, value in snapshot['scalars'].items():
+            setattr(self, name, value)
+        self._host_slots = [slots.copy() for slots in snapshot['host_slots']]
+        self._unplaced = snapshot['unplaced'].copy()
+        self._free_slots = snapshot['free_slots'].copy()
+        if self._views_token != self._vms_token:
+            # Different VM set than our views describe: rebuild them (keeping arrival order)
+            ids = snapshot['vm_ids']
+            self._vm_views = [VM(self, idx, vm_id) if vm_id is not None else None for idx, vm_id in enumerate(ids)]
+            self._vm_by_id = {ids[idx]: self._vm_views[idx] for idx in snapshot['vm_order']}
+            self._views_token = self._vms_token
+            self._vm_index_cache = (self._vms_token, ids, snapshot['vm_order'])
+        self.placement.restore(snapshot['placement'])
+        self._history.clear()
+
+    def fork(self, rng=None):
+        """
+        Independent copy of the environment in its current state, for lookahead or rollouts.
+        Host capacities are shared (they never change); everything else is restored from a
+        snapshot. The fork draws from `rng`, or from a child stream of this environment's RNG.
+        """
+        child = object.__new__(type(self))
+        child.__dict__.update(self.__dict__)
+        child.rng = self.rng.spawn(1)[0] if rng is None else np.random.default_rng(rng)
+        child.hosts = [Host(child, i) for i in range(len(self.hosts))]
+        child._views_token = None  # Views must be bound to the child
+        child.placement = PlacementEngine.__new__(PlacementEngine)
+        child.workload = None
+        child._history = []
+        child._initial_layouts = dict(self._initial_layouts)  # Snapshots are never mutated
+        child.restore(self.snapshot())
+        return child
 
     def get_metrics(self):
-        """Return detailed metrics about the cloud environment."""
-        active = [h for h in self.hosts if h.vms]
-        cpu_utils = [h.get_cpu_utilization() for h in active]
-        mem_utils = [h.get_mem_utilization() for h in active]
-        idle_steps = [h.idle_steps for h in self.hosts]
+        """
+        Return detailed metrics about the cloud environment.
+        Built from running totals, so a snapshot is O(1) regardless of cluster size.
+        """
+        num_active = self._active_hosts
         return {
-            'total_power_consumption': self.get_total_power(),
-            'active_hosts': len(active),
-            'avg_cpu_utilization': sum(cpu_utils) / len(cpu_utils) if cpu_utils else 0,
-            'avg_mem_utilization': sum(mem_utils) / len(mem_utils) if mem_utils else 0,
-            'total_idle_steps': sum(idle_steps),
-            'sla_violations': sum(1 for vm in self.vms if vm.assigned_host is None)
-        }
\ No newline at end of file
+            'total_power_consumption': self._total_power,
+            'active_hosts': num_active,
+            'avg_cpu_utilization': self._sum_cpu_util / num_active if num_active else 0,
+            'avg_mem_utilization': self._sum_mem_util / num_active if num_active else 0,
+            'total_idle_steps': self._total_idle_steps,
+            'sla_violations': len(self._unplaced),
+            'energy_wh': self.energy_wh
+        }
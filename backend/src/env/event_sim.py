@@ -0,0 +1,368 @@
+import heapq
+import argparse
+import itertools
+import logging
+import time
+
+import numpy as np
+
+# Event kinds
+ARRIVAL = "arrival"
+DEPARTURE = "departure"
+WORKLOAD = "workload"
+BOOT_DONE = "boot_done"
+POWER_OFF = "power_off"
+
+# Host power states
+OFF, BOOTING, ON = 0, 1, 2
+
+# --- Discrete-Event Simulator ---
+
+class EventSimulator:
+    """
+    Discrete-event simulation on top of a CloudEnvironment.
+
+    Events sit in a heap keyed by time (seconds), and the clock jumps straight to the next
+    one, so a run costs O(events * log events) no matter how long the simulated horizon is.
+    Events:
+      - arrival: a new VM is added and placed with the environment's capacity index; if no
+        powered-on host fits it, it waits and an OFF host is booted.
+      - departure: the VM is terminated; waiting VMs retry placement.
+      - workload: a VM's demand changes (O(1) running-total patch); a decrease lets waiting
+        VMs retry placement on its host.
+      - boot_done: a host finishes booting (`boot_latency` after power-on) and goes online.
+      - power_off: a host that stayed empty for `idle_timeout` is switched off.
+
+    Energy is integrated between events with the environment's power model: hosts running
+    VMs draw their loaded power, empty powered-on hosts their idle power, booting hosts the
+    model's boot draw and OFF hosts its standby draw. Power-on and power-off transitions add
+    the model's one-off transition energy.
+
+    VMs the environment could not place before the run start out waiting.
+    `rng` (seed, SeedSequence or Generator) drives arrivals, lifetimes and demand changes.
+    """
+
+    def __init__(self, env, strategy='first_fit', boot_latency=120.0, idle_timeout=300.0, rng=None):
+        self.env = env
+        self.strategy = strategy
+        self.boot_latency = boot_latency
+        self.idle_timeout = idle_timeout
+        # Defaults to a child of the environment's stream, so seeding the environment seeds the run
+        self.rng = np.random.default_rng(rng) if rng is not None else env.rng.spawn(1)[0]
+        all_hosts = np.arange(len(env.hosts))
+        self.idle_watts = env.power_model.idle_power(all_hosts)
+        self.boot_watts = env.power_model.booting_power(all_hosts)
+
+        self.now = 0.0
+        self._queue = []
+        self._seq = itertools.count()  # Tie-breaker so simultaneous events run in schedule order
+        self._waiting = {}  # vm_id -> slot of VMs waiting for capacity, in arrival order
+        self._queued_at = {}
+        self._handlers = {
+            ARRIVAL: self._on_arrival,
+            DEPARTURE: self._on_departure,
+            WORKLOAD: self._on_workload,
+            BOOT_DONE: self._on_boot_done,
+            POWER_OFF: self._on_power_off,
+        }
+
+        self.host_state = np.where(env.host_online, ON, OFF)
+        self._empty_since = np.full(len(env.hosts), np.nan)
+        self._idle_on = 0  # Powered-on hosts without VMs
+        self._idle_power = 0.0  # ... and their total idle draw
+        self._booting = 0
+        self._boot_power = 0.0
+        self._off = int(np.count_nonzero(self.host_state == OFF))
+        self._booting_cpu = 0.0
+        self._booting_mem = 0.0
+        self.energy_wh = 0.0
+        self._powered_host_seconds = 0.0
+        self.stats = {
+            'events': 0,
+            'arrivals': 0,
+            'departures': 0,
+            'workload_changes': 0,
+            'queued': 0,
+            'dequeued': 0,
+            'power_ons': 0,
+            'power_offs': 0,
+            'transition_wh': 0.0,
+            'wait_time': 0.0,
+        }
+        for host_id in np.flatnonzero((self.host_state == ON) & (env.host_vm_count == 0)).tolist():
+            self._host_emptied(host_id)
+        for vm in env.get_unplaced_vms():
+            self._waiting[vm.id] = vm._idx
+            self._queued_at[vm.id] = self.now
+            self.stats['queued'] += 1
+        self._request_capacity()
+
+    # --- Scheduling ---
+
+    def schedule(self, at, kind, *data):
+        """Queue an event of `kind` at absolute time `at`."""
+        heapq.heappush(self._queue, (at, next(self._seq), kind, data))
+
+    def schedule_arrival(self, at, cpu_req, mem_req, lifetime=None):
+        """A VM with the given demand arrives at `at` and, with `lifetime`, departs that much later."""
+        self.schedule(at, ARRIVAL, cpu_req, mem_req, lifetime, None)
+
+    def schedule_departure(self, at, vm_id):
+        self.schedule(at, DEPARTURE, vm_id)
+
+    def schedule_workload(self, at, vm_id, cpu_req, mem_req):
+        """Set a VM's demand at `at`."""
+        self.schedule(at, WORKLOAD, vm_id, cpu_req, mem_req, None)
+
+    def add_poisson_arrivals(self, rate, mean_lifetime=None, cpu_range=(10, 30), mem_range=(20, 50), change_rate=0.0):
+        """
+        Poisson VM arrivals at `rate` per second with exponential lifetimes. Each arrival schedules
+        the next one, so the queue holds one pending arrival per process. With `change_rate`, every
+        VM also gets random demand changes (the drift of update_vm_workloads) at that rate.
+        """
+        process = {
+            'rate': rate,
+            'mean_lifetime': mean_lifetime,
+            'cpu_range': cpu_range,
+            'mem_range': mem_range,
+            'change_rate': change_rate,
+        }
+        self.schedule(self.now + self.rng.exponential(1.0 / rate), ARRIVAL, None, None, None, process)
+
+    # --- Host power bookkeeping ---
+
+    def _host_filled(self, host_id):
+        if self.env.host_vm_count[host_id] == 1:
+            self._idle_on -= 1
+            self._idle_power -= self.idle_watts[host_id]
+            self._empty_since[host_id] = np.nan
+
+    def _host_emptied(self, host_id):
+        self._idle_on += 1
+        self._idle_power += self.idle_watts[host_id]
+        self._empty_since[host_id] = self.now
+        self.schedule(self.now + self.idle_timeout, POWER_OFF, host_id, self.now)
+
+    def _waiting_slots(self):
+        return np.fromiter(self._waiting.values(), dtype=np.int64, count=len(self._waiting))
+
+    def _request_capacity(self):
+        """
+        Boot OFF hosts (lowest ids first) until the capacity already booting covers the total
+        demand of the waiting VMs. VMs too large for any host are left out of the demand.
+        """
+        if not self._waiting:
+            return
+        env = self.env
+        idx = self._waiting_slots()
+        cpu, mem = env.vm_cpu[idx], env.vm_mem[idx]
+        placeable = (cpu <= env.host_total_cpu.max()) & (mem <= env.host_total_mem.max())
+        if not placeable.any():
+            return
+        need_cpu = cpu[placeable].sum() - self._booting_cpu
+        need_mem = mem[placeable].sum() - self._booting_mem
+        if need_cpu <= 0 and need_mem <= 0:
+            return
+        off = np.flatnonzero(self.host_state == OFF)
+        off = off[(env.host_total_cpu[off] >= cpu[placeable].min()) & (env.host_total_mem[off] >= mem[placeable].min())]
+        if len(off) == 0:
+            return
+        covered = (np.cumsum(env.host_total_cpu[off]) >= need_cpu) & (np.cumsum(env.host_total_mem[off]) >= need_mem)
+        count = int(np.argmax(covered)) + 1 if covered.any() else len(off)
+        for host_id in off[:count].tolist():
+            self.host_state[host_id] = BOOTING
+            self._booting += 1
+            self._boot_power += self.boot_watts[host_id]
+            self._off -= 1
+            self._add_transition(env.power_model.power_on_wh)
+            self._booting_cpu += env.host_total_cpu[host_id]
+            self._booting_mem += env.host_total_mem[host_id]
+            self.stats['power_ons'] += 1
+            self.schedule(self.now + self.boot_latency, BOOT_DONE, host_id)
+
+    def _add_transition(self, wh):
+        self.energy_wh += wh
+        self.stats['transition_wh'] += wh
+
+    def _place_or_queue(self, vm):
+        host_id = self.env.place_vm(vm, self.strategy)
+        if host_id is None:
+            self._waiting[vm.id] = vm._idx
+            self._queued_at[vm.id] = self.now
+            self.stats['queued'] += 1
+            self._request_capacity()
+        else:
+            self._host_filled(host_id)
+
+    def _drain_waiting(self, host_id=None):
+        """
+        Retry placement of waiting VMs in arrival order. When only `host_id` gained capacity,
+        only the VMs that fit its free capacity are retried.
+        """
+        if not self._waiting:
+            return
+        env = self.env
+        vm_ids = list(self._waiting)
+        if host_id is not None:
+            idx = self._waiting_slots()
+            fits = (env.vm_cpu[idx] <= env.host_free_cpu[host_id]) & (env.vm_mem[idx] <= env.host_free_mem[host_id])
+            vm_ids = [vm_ids[k] for k in np.flatnonzero(fits).tolist()]
+        for vm_id in vm_ids:
+            placed_on = env.place_vm(env.get_vm(vm_id), self.strategy)
+            if placed_on is None:
+                continue
+            self._waiting.pop(vm_id, None)
+            self._host_filled(placed_on)
+            self.stats['dequeued'] += 1
+            self.stats['wait_time'] += self.now - self._queued_at.pop(vm_id, self.now)
+
+    # --- Event handlers ---
+
+    def _on_arrival(self, cpu_req, mem_req, lifetime, process):
+        if process is not None:
+            cpu_req = int(self.rng.integers(process['cpu_range'][0], process['cpu_range'][1] + 1))
+            mem_req = int(self.rng.integers(process['mem_range'][0], process['mem_range'][1] + 1))
+            if process['mean_lifetime']:
+                lifetime = self.rng.exponential(process['mean_lifetime'])
+            self.schedule(self.now + self.rng.exponential(1.0 / process['rate']), ARRIVAL, None, None, None, process)
+
+        vm = self.env.add_vm(cpu_req, mem_req)
+        self.stats['arrivals'] += 1
+        if lifetime is not None:
+            self.schedule(self.now + lifetime, DEPARTURE, vm.id)
+        if process is not None and process['change_rate'] > 0:
+            rate = process['change_rate']
+            self.schedule(self.now + self.rng.exponential(1.0 / rate), WORKLOAD, vm.id, None, None, rate)
+        self._place_or_queue(vm)
+
+    def _on_departure(self, vm_id):
+        vm = self.env.get_vm(vm_id)
+        if vm is None:
+            return
+        host_id = vm.assigned_host
+        self.env.terminate_vm(vm_id)
+        self.stats['departures'] += 1
+        if host_id is None:
+            # Left before it was ever placed (VMs added behind the simulator's back were never queued)
+            self._waiting.pop(vm_id, None)
+            self._queued_at.pop(vm_id, None)
+            return
+        if self.env.host_vm_count[host_id] == 0:
+            self._host_emptied(host_id)
+        self._drain_waiting(host_id)
+
+    def _on_workload(self, vm_id, cpu_req, mem_req, rate):
+        vm = self.env.get_vm(vm_id)
+        if vm is None:
+            return
+        old_cpu, old_mem = vm.cpu_req, vm.mem_req
+        if cpu_req is None:
+            cpu_req = max(0, old_cpu + int(self.rng.integers(-5, 6)))
+            mem_req = max(0, old_mem + int(self.rng.integers(-10, 11)))
+        self.env.set_vm_requirements(vm._idx, cpu_req, mem_req)
+        self.stats['workload_changes'] += 1
+        host_id = vm.assigned_host
+        if host_id is not None and (cpu_req < old_cpu or mem_req < old_mem):
+            self._drain_waiting(host_id)
+        if rate:
+            self.schedule(self.now + self.rng.exponential(1.0 / rate), WORKLOAD, vm_id, None, None, rate)
+
+    def _on_boot_done(self, host_id):
+        self.host_state[host_id] = ON
+        self._booting -= 1
+        self._boot_power -= self.boot_watts[host_id]
+        self._booting_cpu -= self.env.host_total_cpu[host_id]
+        self._booting_mem -= self.env.host_total_mem[host_id]
+        self.env.set_host_online(host_id, True)
+        self._host_emptied(host_id)
+        self._drain_waiting()
+        self._request_capacity()
+
+    def _on_power_off(self, host_id, empty_since):
+        # Stale if the host received VMs (or emptied again) since this was scheduled
+        if (self.host_state[host_id] != ON or self.env.host_vm_count[host_id] > 0
+                or self._empty_since[host_id] != empty_since):
+            return
+        self.env.set_host_online(host_id, False)
+        self.host_state[host_id] = OFF
+        self._idle_on -= 1
+        self._idle_power -= self.idle_watts[host_id]
+        self._off += 1
+        self._add_transition(self.env.power_model.power_off_wh)
+        self._empty_since[host_id] = np.nan
+        self.stats['power_offs'] += 1
+
+    # --- Main loop ---
+
+    def _advance(self, at):
+        """Move the clock to `at`, integrating energy at the current (constant) power draw."""
+        dt = at - self.now
+        if dt > 0:
+            powered = self.env._active_hosts + self._idle_on + self._booting
+            power = (self.env._total_power + self._idle_power + self._boot_power
+                     + self.env.power_model.off_watts * self._off)
+            self.energy_wh += power * dt / 3600.0
+            self._powered_host_seconds += powered * dt
+            self.now = at
+
+    def run(self, until=None, max_events=None):
+        """Process events in time order up to time `until` and/or `max_events`; returns summary()."""
+        processed = 0
+        queue = self._queue
+        while queue and (max_events is None or processed < max_events):
+            if until is not None and queue[0][0] > until:
+                break
+            at, _, kind, data = heapq.heappop(queue)
+            self._advance(at)
+            self._handlers[kind](*data)
+            processed += 1
+        self.stats['events'] += processed
+        if until is not None and (max_events is None or processed < max_events):
+            self._advance(until)
+        return self.summary()
+
+    def summary(self):
+        """Time-integrated results so far, plus the environment's current metrics."""
+        dequeued = self.stats['dequeued']
+        return {
+            **self.env.get_metrics(),
+            'time': self.now,
+            'energy_wh': self.energy_wh,
+            'avg_power': self.energy_wh * 3600.0 / self.now if self.now else 0.0,
+            'avg_powered_hosts': self._powered_host_seconds / self.now if self.now else 0.0,
+            'powered_hosts': int(np.count_nonzero(self.host_state != OFF)),
+            'running_vms': len(self.env._vm_by_id) - len(self.env._unplaced),
+            'waiting_vms': len(self.env._unplaced),
+            'avg_wait': self.stats['wait_time'] / dequeued if dequeued else 0.0,
+            **self.stats,
+        }
+
+
+if __name__ == "__main__":
+    from src.env.cloud_env import CloudEnvironment
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
+    parser = argparse.ArgumentParser(description="Discrete-event VM arrival/departure simulation")
+    parser.add_argument("--hosts", type=int, default=100, help="Number of hosts")
+    parser.add_argument("--vms", type=int, default=0, help="VMs placed before the simulation starts")
+    parser.add_argument("--hours", type=float, default=24.0, help="Simulated horizon in hours")
+    parser.add_argument("--rate", type=float, default=0.05, help="VM arrivals per second")
+    parser.add_argument("--lifetime", type=float, default=3600.0, help="Mean VM lifetime in seconds")
+    parser.add_argument("--change_rate", type=float, default=0.0, help="Demand changes per VM per second")
+    parser.add_argument("--boot_latency", type=float, default=120.0, help="Host boot time in seconds")
+    parser.add_argument("--idle_timeout", type=float, default=300.0, help="Seconds an empty host stays on")
+    parser.add_argument("--strategy", default="first_fit", choices=["first_fit", "best_fit", "worst_fit"])
+    parser.add_argument("--power_model", default="linear", choices=["linear", "specpower"], help="Host power model")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible run")
+    args = parser.parse_args()
+
+    env = CloudEnvironment(num_hosts=args.hosts, num_vms=args.vms, rng=args.seed, power_model=args.power_model)
+    env.reset(strategy=args.strategy)
+    sim = EventSimulator(env, args.strategy, args.boot_latency, args.idle_timeout)
+    sim.add_poisson_arrivals(args.rate, args.lifetime, change_rate=args.change_rate)
+
+    start = time.perf_counter()
+    summary = sim.run(until=args.hours * 3600.0)
+    logging.info("⏱️ Simulated %.1f h (%d events) in %.2f s", args.hours, summary['events'], time.perf_counter() - start)
+    for key, value in summary.items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
@@ -0,0 +1,272 @@
+import math
+import bisect
+
+# --- Placement Engine ---
+
+class PlacementEngine:
+    """
+    Capacity index over host free CPU/memory for fast VM placement.
+
+    - First-fit uses a max segment tree over (free CPU, free memory): the search
+      descends into the leftmost subtree whose maxima can still fit the VM, O(log hosts)
+      per descent. The two maxima may come from different hosts, so each node also
+      remembers the last demand its subtree failed to fit and prunes any demand at
+      least that large.
+    - Best-fit and worst-fit keep the hosts sorted by free CPU + free memory (the
+      "remaining resources" score) in blocks of about sqrt(hosts) / 2 entries. Each block also
+      keeps the Pareto frontier of its hosts' (free CPU, free memory), which tells exactly
+      whether the block holds a host that fits, so a search skips non-fitting blocks and
+      scans a single one. An update moves one entry between two blocks. Both are
+      O(sqrt(hosts)). The blocks are built on the first best/worst-fit query and kept up
+      to date afterwards.
+
+    Demands that found no host are remembered (as a Pareto frontier) until some
+    host's free capacity grows, so a full cluster rejects VMs without a tree walk.
+
+    The owning environment calls `update` whenever a host's free capacity changes.
+    """
+    STRATEGIES = ('first_fit', 'best_fit', 'worst_fit')
+
+    def __init__(self, free_cpu, free_mem):
+        self.rebuild(free_cpu, free_mem)
+
+    def rebuild(self, free_cpu, free_mem):
+        """Rebuild the whole index from per-host free capacity arrays."""
+        self._n = len(free_cpu)
+        size = 1
+        while size < max(self._n, 1):
+            size *= 2
+        self._size = size
+        self._cpu = [float('-inf')] * (2 * size)
+        self._mem = [float('-inf')] * (2 * size)
+        self._cpu[size:size + self._n] = [float(c) for c in free_cpu]
+        self._mem[size:size + self._n] = [float(m) for m in free_mem]
+        for node in range(size - 1, 0, -1):
+            self._cpu[node] = max(self._cpu[2 * node], self._cpu[2 * node + 1])
+            self._mem[node] = max(self._mem[2 * node], self._mem[2 * node + 1])
+        self._fail_cpu = [float('inf')] * (2 * size)
+        self._fail_mem = [float('inf')] * (2 * size)
+        self._blocks = None  # Sorted (score, host) blocks for best/worst-fit
+        self._keys = None
+        self._failed = []
+
+    def snapshot(self):
+        """Copy of the index state (flat lists, so copying is cheap)."""
+        return {
+            'n': self._n, 'size': self._size,
+            'cpu': self._cpu.copy(), 'mem': self._mem.copy(),
+            'fail_cpu': self._fail_cpu.copy(), 'fail_mem': self._fail_mem.copy(),
+            'blocks': None if self._blocks is None else [block.copy() for block in self._blocks],
+            'firsts': None if self._blocks is None else self._firsts.copy(),
+            'fronts': None if self._blocks is None else self._fronts.copy(),
+            'keys': None if self._keys is None else self._keys.copy(),
+            'failed': self._failed.copy(),
+        }
+
+    def restore(self, state):
+        """Return to a snapshot() state; the snapshot stays reusable."""
+        self._n = state['n']
+        self._size = state['size']
+        self._cpu = state['cpu'].copy()
+        self._mem = state['mem'].copy()
+        self._fail_cpu = state['fail_cpu'].copy()
+        self._fail_mem = state['fail_mem'].copy()
+        self._blocks = None if state['blocks'] is None else [block.copy() for block in state['blocks']]
+        if self._blocks is not None:
+            self._firsts = state['firsts'].copy()
+            self._fronts = state['fronts'].copy()  # Frontiers are replaced, never mutated
+            self._load = self._block_size()
+        self._keys = None if state['keys'] is None else state['keys'].copy()
+        self._failed = state['failed'].copy()
+
+    def update(self, host_id, free_cpu, free_mem):
+        """Record a host's new free capacity."""
+        free_cpu = float(free_cpu)
+        free_mem = float(free_mem)
+        node = host_id + self._size
+        old_cpu, old_mem = self._cpu[node], self._mem[node]
+        if free_cpu > self._cpu[node] or free_mem > self._mem[node]:
+            # Capacity grew: failure memos on the path to the root are stale
+            self._failed = []
+            ancestor = node
+            while ancestor:
+                self._fail_cpu[ancestor] = float('inf')
+                self._fail_mem[ancestor] = float('inf')
+                ancestor //= 2
+        self._cpu[node] = free_cpu
+        self._mem[node] = free_mem
+        node //= 2
+        cpu_tree, mem_tree = self._cpu, self._mem
+        while node:
+            left = 2 * node
+            new_cpu = cpu_tree[left] if cpu_tree[left] > cpu_tree[left + 1] else cpu_tree[left + 1]
+            new_mem = mem_tree[left] if mem_tree[left] > mem_tree[left + 1] else mem_tree[left + 1]
+            if new_cpu == cpu_tree[node] and new_mem == mem_tree[node]:
+                break  # Ancestors already hold these maxima
+            cpu_tree[node] = new_cpu
+            mem_tree[node] = new_mem
+            node //= 2
+
+        if self._blocks is not None:
+            self._remove_entry((self._keys[host_id], host_id), old_cpu, old_mem)
+            self._keys[host_id] = free_cpu + free_mem
+            self._insert_entry((self._keys[host_id], host_id), free_cpu, free_mem)
+
+    def _fits(self, host_id, cpu, mem):
+        leaf = host_id + self._size
+        return self._cpu[leaf] >= cpu and self._mem[leaf] >= mem
+
+    # --- Sorted blocks (best/worst-fit) ---
+
+    def _block_size(self):
+        """Target entries per block; blocks split at twice this size."""
+        return max(16, math.isqrt(self._n) // 2)
+
+    def _ensure_sorted(self):
+        if self._blocks is None:
+            leaves = self._size
+            self._keys = [self._cpu[leaves + i] + self._mem[leaves + i] for i in range(self._n)]
+            entries = sorted((key, i) for i, key in enumerate(self._keys))
+            self._load = self._block_size()
+            self._blocks = [entries[i:i + self._load] for i in range(0, len(entries), self._load)]
+            self._firsts = [block[0] for block in self._blocks]
+            self._fronts = [None] * len(self._blocks)
+            for b in range(len(self._blocks)):
+                self._refresh_front(b)
+
+    def _refresh_front(self, b):
+        """
+        Recompute block b's Pareto frontier: the (free CPU, free memory) pairs no other host
+        in the block beats on both, by CPU descending (so memory ascending). A host in the
+        block fits a demand exactly when some frontier point does.
+        """
+        leaves = self._size
+        points = sorted(((self._cpu[leaves + host_id], self._mem[leaves + host_id]) for _, host_id in self._blocks[b]),
+                        reverse=True)
+        front = []
+        for point in points:
+            if not front or point[1] > front[-1][1]:
+                front.append(point)
+        self._fronts[b] = front
+
+    def _block_fits(self, b, cpu, mem):
+        """Whether any host in block b fits the demand."""
+        for front_cpu, front_mem in self._fronts[b]:
+            if front_cpu < cpu:
+                return False
+            if front_mem >= mem:
+                return True
+        return False
+
+    def _remove_entry(self, entry, free_cpu, free_mem):
+        """Drop a host's entry; free_cpu/free_mem are the capacities it was indexed with."""
+        b = bisect.bisect_right(self._firsts, entry) - 1
+        block = self._blocks[b]
+        del block[bisect.bisect_left(block, entry)]
+        if not block:
+            del self._blocks[b], self._firsts[b], self._fronts[b]
+            return
+        self._firsts[b] = block[0]
+        front = self._fronts[b]
+        point = (free_cpu, free_mem)
+        if point not in front:
+            return
+        # Only hosts the removed point alone dominated can join the frontier: those beating
+        # its neighbours on CPU (next point) and on memory (previous point)
+        k = front.index(point)
+        low_cpu = front[k + 1][0] if k + 1 < len(front) else float('-inf')
+        low_mem = front[k - 1][1] if k else float('-inf')
+        leaves, cpu, mem = self._size, self._cpu, self._mem
+        candidates = sorted(((cpu[leaves + host_id], mem[leaves + host_id]) for _, host_id in block
+                             if cpu[leaves + host_id] > low_cpu and mem[leaves + host_id] > low_mem), reverse=True)
+        joined = []
+        for candidate in candidates:
+            if not joined or candidate[1] > joined[-1][1]:
+                joined.append(candidate)
+        self._fronts[b] = front[:k] + joined + front[k + 1:]
+
+    def _insert_entry(self, entry, free_cpu, free_mem):
+        if not self._blocks:
+            self._blocks.append([entry])
+            self._firsts.append(entry)
+            self._fronts.append([(free_cpu, free_mem)])
+            return
+        b = max(bisect.bisect_right(self._firsts, entry) - 1, 0)
+        block = self._blocks[b]
+        bisect.insort(block, entry)
+        self._firsts[b] = block[0]
+        front = self._fronts[b]
+        if not any(c >= free_cpu and m >= free_mem for c, m in front):
+            front = [(c, m) for c, m in front if c > free_cpu or m > free_mem]
+            front.append((free_cpu, free_mem))
+            front.sort(reverse=True)
+            self._fronts[b] = front
+        if len(block) > 2 * self._load:
+            # Split an oversized block in two
+            half = len(block) // 2
+            self._blocks[b:b + 1] = [block[:half], block[half:]]
+            self._firsts[b:b + 1] = [block[0], block[half]]
+            self._fronts[b:b + 1] = [None, None]
+            self._refresh_front(b)
+            self._refresh_front(b + 1)
+
+    def first_fit(self, cpu, mem):
+        """Return the lowest-numbered host that can fit the demand, or -1."""
+        max_cpu, max_mem = self._cpu, self._mem
+        fail_cpu, fail_mem = self._fail_cpu, self._fail_mem
+        size = self._size
+
+        def search(node):
+            if (max_cpu[node] < cpu or max_mem[node] < mem
+                    or (cpu >= fail_cpu[node] and mem >= fail_mem[node])):
+                return -1
+            if node >= size:
+                return node - size
+            host_id = search(2 * node)
+            if host_id < 0:
+                host_id = search(2 * node + 1)
+            if host_id < 0:
+                fail_cpu[node] = cpu
+                fail_mem[node] = mem
+            return host_id
+
+        return search(1)
+
+    def best_fit(self, cpu, mem):
+        """Return the fitting host with the least remaining CPU + memory, or -1."""
+        self._ensure_sorted()
+        max_cpu, max_mem, size = self._cpu, self._mem, self._size
+        # Hosts scoring below cpu + mem cannot fit both; start at the block holding the first that might
+        start = max(bisect.bisect_left(self._firsts, (cpu + mem, -1)) - 1, 0)
+        for b in range(start, len(self._blocks)):
+            if self._block_fits(b, cpu, mem):
+                for _, host_id in self._blocks[b]:
+                    if max_cpu[host_id + size] >= cpu and max_mem[host_id + size] >= mem:
+                        return host_id
+        return -1
+
+    def worst_fit(self, cpu, mem):
+        """Return the fitting host with the most remaining CPU + memory, or -1."""
+        self._ensure_sorted()
+        for b in range(len(self._blocks) - 1, -1, -1):
+            block = self._blocks[b]
+            if block[-1][0] < cpu + mem:
+                break
+            if self._block_fits(b, cpu, mem):
+                for pos in range(len(block) - 1, -1, -1):
+                    if self._fits(block[pos][1], cpu, mem):
+                        return block[pos][1]
+        return -1
+
+    def find_host(self, cpu, mem, strategy='first_fit'):
+        """Return a host for the demand using the named strategy, or -1."""
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown placement strategy: {strategy}")
+        # Whether any host fits does not depend on the strategy
+        if any(cpu >= f_cpu and mem >= f_mem for f_cpu, f_mem in self._failed):
+            return -1
+        host_id = getattr(self, strategy)(cpu, mem)
+        if host_id < 0:
+            self._failed = [(c, m) for c, m in self._failed if c < cpu or m < mem]
+            self._failed.append((cpu, mem))
+        return host_id
@@ -0,0 +1,159 @@
+import numpy as np
+
+# --- Power Models ---
+#
+# A power model turns host utilization into watts for many hosts at once:
+#   power(cpu_util, mem_util, hosts=None) -> watts of powered-on hosts
+# `hosts` holds the host index of each utilization value (any shape); None means the last
+# axis of the utilization arrays runs over all hosts in order. Scalars work too.
+# Besides the running draw, a model describes the other power states used by the
+# discrete-event simulator: off (standby) draw, draw while booting, and the one-off
+# energy of a power-on or power-off transition.
+# stack_power_models() joins the models of several equally sized clusters into one, so
+# batched replicas that each built their own model are evaluated in a single call.
+
+# SPECpower_ssj2008 results: watts at 0%, 10%, ..., 100% CPU load (as used by CloudSim)
+SPECPOWER_TABLES = {
+    "hp_proliant_ml110_g4": (86.0, 89.4, 92.6, 96.0, 99.5, 102.0, 106.0, 108.0, 112.0, 114.0, 117.0),
+    "hp_proliant_ml110_g5": (93.7, 97.0, 101.0, 105.0, 110.0, 116.0, 121.0, 125.0, 129.0, 133.0, 135.0),
+    "ibm_x3550_m3_x5675": (58.4, 98.0, 109.0, 118.0, 128.0, 140.0, 153.0, 170.0, 189.0, 205.0, 222.0),
+    "ibm_x3550_m3_x5670": (66.0, 107.0, 120.0, 131.0, 143.0, 156.0, 173.0, 191.0, 211.0, 229.0, 247.0),
+}
+
+
+class PowerModel:
+    """Shared power-state parameters; subclasses implement power()."""
+
+    def __init__(self, off_watts=0.0, boot_watts=None, power_on_wh=0.0, power_off_wh=0.0):
+        self.off_watts = off_watts
+        self.boot_watts = boot_watts  # None: a booting host draws its idle power
+        self.power_on_wh = power_on_wh
+        self.power_off_wh = power_off_wh
+
+    def power(self, cpu_util, mem_util, hosts=None):
+        raise NotImplementedError
+
+    def idle_power(self, hosts):
+        """Draw of powered-on hosts without load, one entry per host index in `hosts`."""
+        hosts = np.asarray(hosts, dtype=np.int64)
+        zeros = np.zeros(hosts.shape)
+        return np.broadcast_to(self.power(zeros, zeros, hosts), hosts.shape).astype(np.float64)
+
+    def booting_power(self, hosts):
+        """Draw of booting hosts, one entry per host index in `hosts`."""
+        if self.boot_watts is None:
+            return self.idle_power(hosts)
+        return np.full(np.shape(hosts), float(self.boot_watts))
+
+    def _states(self):
+        return {"off_watts": self.off_watts, "boot_watts": self.boot_watts,
+                "power_on_wh": self.power_on_wh, "power_off_wh": self.power_off_wh}
+
+    @classmethod
+    def stack(cls, models, num_hosts):
+        raise NotImplementedError(f"{cls.__name__} cannot be stacked")
+
+
+class LinearPowerModel(PowerModel):
+    """
+    idle + (peak - idle) * (cpu_weight * cpu_util + mem_weight * mem_util).
+    `idle` and `peak` may be scalars or per-host arrays for a heterogeneous fleet.
+    The defaults (150 W -> 250 W on 0.7 CPU + 0.3 memory) are the simulator's original model.
+    """
+
+    def __init__(self, idle=150.0, peak=250.0, cpu_weight=0.7, mem_weight=0.3, **states):
+        super().__init__(**states)
+        self.idle = idle if np.ndim(idle) == 0 else np.asarray(idle, dtype=np.float64)
+        self.peak = peak if np.ndim(peak) == 0 else np.asarray(peak, dtype=np.float64)
+        self.cpu_weight = cpu_weight
+        self.mem_weight = mem_weight
+
+    def power(self, cpu_util, mem_util, hosts=None):
+        idle, peak = self.idle, self.peak
+        if hosts is not None:
+            idle = idle if np.ndim(idle) == 0 else idle[hosts]
+            peak = peak if np.ndim(peak) == 0 else peak[hosts]
+        util = self.cpu_weight * cpu_util + self.mem_weight * mem_util
+        return idle + (peak - idle) * util
+
+    @classmethod
+    def stack(cls, models, num_hosts):
+        first = models[0]
+        if any((m.cpu_weight, m.mem_weight) != (first.cpu_weight, first.mem_weight) for m in models):
+            raise ValueError("Stacked linear models must share their CPU and memory weights")
+
+        def joined(name):
+            values = [getattr(m, name) for m in models]
+            if all(np.ndim(v) == 0 and v == values[0] for v in values):
+                return values[0]
+            return np.concatenate([np.broadcast_to(v, num_hosts) for v in values]).astype(np.float64)
+        return cls(joined("idle"), joined("peak"), first.cpu_weight, first.mem_weight, **first._states())
+
+
+class SpecPowerModel(PowerModel):
+    """
+    SPECpower-style piecewise-linear model: each host type has a table of watts at 0%, 10%,
+    ..., 100% CPU load, and power is interpolated between the two surrounding points.
+    Memory does not contribute, and load above 100% (overcommit) draws full power.
+    `host_types` names each host's table, e.g. built with by_capacity().
+    """
+
+    def __init__(self, host_types, tables=None, **states):
+        super().__init__(**states)
+        tables = SPECPOWER_TABLES if tables is None else tables
+        self.type_names = list(tables)
+        self.tables = np.array([tables[name] for name in self.type_names], dtype=np.float64)
+        if self.tables.ndim != 2 or self.tables.shape[1] < 2:
+            raise ValueError("Power tables need at least two load points each")
+        index = {name: i for i, name in enumerate(self.type_names)}
+        self.host_types = np.array([index[name] for name in host_types], dtype=np.int64)
+        self._steps = self.tables.shape[1] - 1
+
+    @classmethod
+    def by_capacity(cls, host_total_cpu, type_names, tables=None, **states):
+        """Assign types by CPU capacity: the smallest hosts get type_names[0], the largest the last."""
+        order = np.argsort(np.asarray(host_total_cpu), kind="stable")
+        groups = np.array_split(order, len(type_names))
+        host_types = [None] * len(order)
+        for name, group in zip(type_names, groups):
+            for host_id in group.tolist():
+                host_types[host_id] = name
+        return cls(host_types, tables, **states)
+
+    def power(self, cpu_util, mem_util, hosts=None):
+        types = self.host_types if hosts is None else self.host_types[hosts]
+        load = np.clip(cpu_util, 0.0, 1.0) * self._steps
+        lower = np.minimum(np.asarray(load).astype(np.int64), self._steps - 1)
+        low = self.tables[types, lower]
+        high = self.tables[types, lower + 1]
+        return low + (load - lower) * (high - low)
+
+    @classmethod
+    def stack(cls, models, num_hosts):
+        first = models[0]
+        if any(m.type_names != first.type_names or not np.array_equal(m.tables, first.tables) for m in models):
+            raise ValueError("Stacked SPECpower models must share their tables")
+        if any(len(m.host_types) != num_hosts for m in models):
+            raise ValueError(f"Every stacked model must describe {num_hosts} hosts")
+        host_types = [first.type_names[t] for m in models for t in m.host_types.tolist()]
+        return cls(host_types, dict(zip(first.type_names, first.tables.tolist())), **first._states())
+
+
+def make_power_model(name, host_total_cpu=None):
+    """Build a model by CLI name: "linear" or "specpower" (the built-in tables assigned by capacity)."""
+    if name == "linear":
+        return LinearPowerModel()
+    if name == "specpower":
+        return SpecPowerModel.by_capacity(host_total_cpu, list(SPECPOWER_TABLES))
+    raise ValueError(f"Unknown power model: {name}")
+
+
+def stack_power_models(models, num_hosts):
+    """
+    One model for several clusters of `num_hosts` hosts each, with host h of cluster i at
+    index i * num_hosts + h. The models must be of one class (e.g. one per replica).
+    """
+    kinds = {type(m) for m in models}
+    if len(kinds) != 1:
+        raise ValueError("Stacked power models must all be of one class")
+    return kinds.pop().stack(models, num_hosts)
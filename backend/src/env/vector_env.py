@@ -0,0 +1,249 @@
+import numpy as np
+
+from src.env.cloud_env import CloudEnvironment
+from src.env.power import SpecPowerModel, stack_power_models
+
+# --- Vectorized Cloud Environment ---
+
+def _replica_power_model(model, host_total_cpu):
+    """`model` for a generated replica: SPECpower types are reassigned by that replica's capacities."""
+    if isinstance(model, SpecPowerModel):
+        tables = dict(zip(model.type_names, model.tables.tolist()))
+        return SpecPowerModel.by_capacity(host_total_cpu, model.type_names, tables, **model._states())
+    return model
+
+
+class VectorCloudEnvironment:
+    """
+    Steps N independent cluster replicas in lockstep as batched array operations.
+
+    Every per-host array has shape (num_envs, num_hosts) and every per-VM array has
+    shape (num_envs, num_vms); VM -> host assignment is -1 when unplaced. Each replica
+    starts from its own randomly generated CloudEnvironment, and `reset` restores that
+    replica's initial first-fit layout (including the original VM demands).
+    Replica i is generated from the i-th child stream of `rng`. With `base_env`, replica 0
+    is instead a copy of that environment in its initial layout (what its reset() restores),
+    and the other replicas are generated with its size and power model.
+    Each replica keeps the power model its CloudEnvironment built for its own hosts (e.g.
+    "specpower" types assigned by that replica's capacities); they are stacked into one
+    `power_model` over all (replica, host) pairs, indexed by `host_index`. `energy_wh`
+    integrates each replica's draw per tick, as in CloudEnvironment.
+    """
+
+    def __init__(self, num_envs=8, num_hosts=12, num_vms=18, rng=None, power_model=None, step_seconds=300.0,
+                 base_env=None):
+        envs = []
+        if base_env is not None:
+            base = base_env.fork(rng=0)
+            base.reset()
+            envs.append(base)
+            num_hosts, num_vms = len(base.hosts), len(base.vms)
+            step_seconds = base.step_seconds
+        children = np.random.default_rng(rng).spawn(num_envs - len(envs))
+        envs += [
+            CloudEnvironment(num_hosts=num_hosts, num_vms=num_vms, rng=child, power_model=power_model, step_seconds=step_seconds)
+            for child in children
+        ]
+        if base_env is not None and power_model is None:
+            for env in envs[1:]:
+                env.set_power_model(_replica_power_model(envs[0].power_model, env.host_total_cpu))
+        self.num_envs = num_envs
+        self.num_hosts = num_hosts
+        self.num_vms = num_vms
+        self.overload_threshold = envs[0].overload_threshold
+        self.underload_threshold = envs[0].underload_threshold
+        self.power_model = stack_power_models([e.power_model for e in envs], num_hosts)
+        self.host_index = np.arange(num_envs * num_hosts).reshape(num_envs, num_hosts)
+        self.step_seconds = step_seconds
+
+        self.host_total_cpu = np.stack([e.host_total_cpu for e in envs])
+        self.host_total_mem = np.stack([e.host_total_mem for e in envs])
+        self._inv_total_cpu = np.stack([e._inv_total_cpu for e in envs])
+        self._inv_total_mem = np.stack([e._inv_total_mem for e in envs])
+        self._initial = {
+            'host_free_cpu': np.stack([e.host_free_cpu for e in envs]),
+            'host_free_mem': np.stack([e.host_free_mem for e in envs]),
+            'host_vm_count': np.stack([e.host_vm_count for e in envs]),
+            'vm_cpu': np.stack([e.vm_cpu[:num_vms] for e in envs]),
+            'vm_mem': np.stack([e.vm_mem[:num_vms] for e in envs]),
+            'vm_host': np.stack([e.vm_host[:num_vms] for e in envs]),
+        }
+        self._rows = np.arange(num_envs)
+        self.reset()
+
+    def reset(self):
+        """Restore every replica to its initial layout."""
+        for name, arr in self._initial.items():
+            setattr(self, name, arr.copy())
+        self.host_idle_steps = np.zeros((self.num_envs, self.num_hosts), dtype=np.int64)
+        self.energy_wh = np.zeros(self.num_envs)
+
+    # --- Batched queries ---
+
+    def get_cpu_utilizations(self):
+        return (self.host_total_cpu - self.host_free_cpu) * self._inv_total_cpu
+
+    def get_mem_utilizations(self):
+        return (self.host_total_mem - self.host_free_mem) * self._inv_total_mem
+
+    def get_host_bins(self, num_bins):
+        """(num_envs, num_hosts) utilization bin of every host; empty hosts fall in bin 0."""
+        util = np.where(self.host_vm_count > 0, self.get_cpu_utilizations(), 0.0)
+        return np.minimum((util * num_bins).astype(np.int64), num_bins - 1)
+
+    def get_states(self, num_bins, bins=None):
+        """(num_envs, num_bins) host counts per utilization bin, i.e. each replica's agent state."""
+        if bins is None:
+            bins = self.get_host_bins(num_bins)
+        offsets = bins + (self._rows * num_bins)[:, None]
+        return np.bincount(offsets.ravel(), minlength=self.num_envs * num_bins).reshape(self.num_envs, num_bins)
+
+    def idle_host_counts(self, threshold=5):
+        """Number of hosts per replica idle for more than `threshold` steps."""
+        return np.count_nonzero(self.host_idle_steps > threshold, axis=1)
+
+    def get_metrics(self):
+        """Same keys as CloudEnvironment.get_metrics, each an array with one entry per replica."""
+        active = self.host_vm_count > 0
+        num_active = np.count_nonzero(active, axis=1)
+        cpu_util = np.where(active, self.get_cpu_utilizations(), 0.0)
+        mem_util = np.where(active, self.get_mem_utilizations(), 0.0)
+        power = np.where(active, self.power_model.power(cpu_util, mem_util, self.host_index), 0.0)
+        safe_active = np.maximum(num_active, 1)
+        return {
+            'total_power_consumption': power.sum(axis=1),
+            'active_hosts': num_active,
+            'avg_cpu_utilization': cpu_util.sum(axis=1) / safe_active,
+            'avg_mem_utilization': mem_util.sum(axis=1) / safe_active,
+            'total_idle_steps': self.host_idle_steps.sum(axis=1),
+            'sla_violations': np.count_nonzero(self.vm_host < 0, axis=1),
+            'energy_wh': self.energy_wh.copy(),
+        }
+
+    # --- Candidate selection ---
+
+    def select_migrations(self, bin_from, bin_to, num_bins, bins=None, rng=None, rows=None):
+        """
+        Pick one migration per request for actions (bin_from[k], bin_to[k]) in replica rows[k]
+        (default: one request per replica, in order).
+        Default (greedy) rule, as in QLearningAgent.train: the most-loaded source host in
+        bin_from, its smallest-CPU VM, and the least-loaded host in bin_to that fits it.
+        With `rng`, source and destination are drawn uniformly instead (exploration sampling).
+        Returns (src, vm, dst, valid) arrays with one entry per request.
+        """
+        if bins is None:
+            bins = self.get_host_bins(num_bins)
+        if rows is None:
+            rows = self._rows
+        req = np.arange(len(rows))
+        bins = bins[rows]
+        util = self.get_cpu_utilizations()[rows]
+
+        src_mask = (bins == bin_from[:, None]) & (self.host_vm_count[rows] > 0)
+        src_score = rng.random(util.shape) if rng is not None else util
+        src = np.argmax(np.where(src_mask, src_score, -np.inf), axis=1)
+        has_src = src_mask[req, src]
+
+        vm_cpu = self.vm_cpu[rows]
+        vm_mask = self.vm_host[rows] == src[:, None]
+        vm = np.argmin(np.where(vm_mask, vm_cpu, np.inf), axis=1)
+        has_vm = has_src & vm_mask[req, vm]
+
+        cpu = vm_cpu[req, vm]
+        mem = self.vm_mem[rows, vm]
+        dst_mask = (
+            (bins == bin_to[:, None])
+            & (self.host_free_cpu[rows] >= cpu[:, None])
+            & (self.host_free_mem[rows] >= mem[:, None])
+        )
+        dst_score = rng.random(util.shape) if rng is not None else util
+        dst = np.argmin(np.where(dst_mask, dst_score, np.inf), axis=1)
+        valid = has_vm & dst_mask[req, dst] & (bin_from >= 0) & (bin_to >= 0)
+        return src, vm, dst, valid
+
+    def evaluate(self, src, vm, dst, valid, before=None, rows=None):
+        """
+        Predicted (before, after) metrics for each request's (src, vm, dst) migration in replica
+        rows[k] (default: one per replica), without mutating anything. Requests with valid=False
+        are unchanged. Pass `before` (a get_metrics() snapshot) to avoid recomputing it.
+        """
+        if rows is None:
+            rows = self._rows
+        if before is None:
+            before = self.get_metrics()
+        before = {key: values[rows] for key, values in before.items()}
+        cpu = np.where(valid, self.vm_cpu[rows, vm], 0.0)
+        mem = np.where(valid, self.vm_mem[rows, vm], 0.0)
+        move = valid.astype(np.int64)
+
+        def host_power(host, cpu_change, mem_change, count_change):
+            count = self.host_vm_count[rows, host] + count_change
+            active = count > 0
+            cpu_util = (self.host_total_cpu[rows, host] - self.host_free_cpu[rows, host] + cpu_change) * self._inv_total_cpu[rows, host]
+            mem_util = (self.host_total_mem[rows, host] - self.host_free_mem[rows, host] + mem_change) * self._inv_total_mem[rows, host]
+            return active, np.where(active, self.power_model.power(cpu_util, mem_util, self.host_index[rows, host]), 0.0)
+
+        src_active0, src_power0 = host_power(src, 0.0, 0.0, 0)
+        dst_active0, dst_power0 = host_power(dst, 0.0, 0.0, 0)
+        src_active1, src_power1 = host_power(src, -cpu, -mem, -move)
+        dst_active1, dst_power1 = host_power(dst, cpu, mem, move)
+
+        after = dict(before)
+        after['total_power_consumption'] = before['total_power_consumption'] + np.where(
+            valid, (src_power1 - src_power0) + (dst_power1 - dst_power0), 0.0)
+        after['active_hosts'] = before['active_hosts'] + np.where(
+            valid,
+            (src_active1.astype(np.int64) - src_active0) + (dst_active1.astype(np.int64) - dst_active0),
+            0)
+        return before, after
+
+    # --- Batched mutation ---
+
+    def migrate(self, src, vm, dst, valid):
+        """Apply each valid replica's migration; returns the per-replica success mask."""
+        rows = self._rows
+        cpu = self.vm_cpu[rows, vm]
+        mem = self.vm_mem[rows, vm]
+        ok = (
+            valid
+            & (self.vm_host[rows, vm] == src)
+            & (self.host_free_cpu[rows, dst] >= cpu)
+            & (self.host_free_mem[rows, dst] >= mem)
+        )
+        r, s, d, v = rows[ok], src[ok], dst[ok], vm[ok]
+        self.host_free_cpu[r, s] += cpu[ok]
+        self.host_free_mem[r, s] += mem[ok]
+        self.host_vm_count[r, s] -= 1
+        self.host_free_cpu[r, d] -= cpu[ok]
+        self.host_free_mem[r, d] -= mem[ok]
+        self.host_vm_count[r, d] += 1
+        self.vm_host[r, v] = d
+        return ok
+
+    def update_vm_workloads(self, rng):
+        """Random demand drift for every VM in every replica, with host capacity kept in sync."""
+        new_cpu = np.maximum(0, self.vm_cpu + rng.integers(-5, 6, self.vm_cpu.shape))
+        new_mem = np.maximum(0, self.vm_mem + rng.integers(-10, 11, self.vm_mem.shape))
+        placed = self.vm_host >= 0
+        rows, _ = np.nonzero(placed)
+        flat = rows * self.num_hosts + self.vm_host[placed]
+        size = self.num_envs * self.num_hosts
+        d_cpu = np.bincount(flat, weights=(new_cpu - self.vm_cpu)[placed], minlength=size)
+        d_mem = np.bincount(flat, weights=(new_mem - self.vm_mem)[placed], minlength=size)
+        self.host_free_cpu -= d_cpu.reshape(self.num_envs, self.num_hosts)
+        self.host_free_mem -= d_mem.reshape(self.num_envs, self.num_hosts)
+        self.vm_cpu = new_cpu
+        self.vm_mem = new_mem
+
+    def tick_idle_counters(self, mask=None):
+        """
+        Advance one step: integrate energy and increment idle steps for empty hosts;
+        with `mask`, only in the selected replicas.
+        """
+        energy = self.get_metrics()['total_power_consumption'] * self.step_seconds / 3600.0
+        self.energy_wh += energy if mask is None else np.where(mask, energy, 0.0)
+        ticked = np.where(self.host_vm_count == 0, self.host_idle_steps + 1, 0)
+        if mask is None:
+            self.host_idle_steps = ticked
+        else:
+            self.host_idle_steps = np.where(mask[:, None], ticked, self.host_idle_steps)
@@ -0,0 +1,245 @@
+import os
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+# --- Trace readers ---
+#
+# Every reader is a generator of steps (timestamp, vm_ids, cpu, mem): one step per trace
+# timestamp, with one entry per VM sampled at that time. `mem` is None when the trace has
+# no memory column. Only the current chunk (or one line per VM file) is held in memory,
+# so traces larger than RAM can be replayed.
+
+LONG_COLUMNS = {"time": "timestamp", "vm": "vm_id", "cpu": "cpu", "mem": "mem"}
+
+
+def _read_chunks(path, columns, chunksize):
+    """Yield DataFrame chunks of a long-format CSV, JSON Lines or Parquet file."""
+    name = path.lower()
+    if name.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Reading Parquet traces requires pyarrow (pip install pyarrow)") from e
+        parquet = pq.ParquetFile(path)
+        present = [c for c in columns if c in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=present):
+            yield batch.to_pandas()
+    elif name.endswith((".json", ".jsonl", ".ndjson", ".json.gz", ".jsonl.gz")):
+        # JSON traces must be JSON Lines (one record per line) to be streamable
+        with pd.read_json(path, lines=True, chunksize=chunksize) as reader:
+            yield from reader
+    else:
+        with pd.read_csv(path, chunksize=chunksize, usecols=lambda c: c in columns) as reader:
+            yield from reader
+
+
+def read_long_trace(path, chunksize=100_000, columns=None):
+    """
+    Stream a long-format trace: one row per (timestamp, VM) sample, sorted by timestamp.
+    `columns` renames the expected fields, e.g. {"time": "ts", "vm": "machine", "cpu": "cpu_pct"};
+    the memory column is optional.
+    """
+    cols = {**LONG_COLUMNS, **(columns or {})}
+    pending = None
+    for chunk in _read_chunks(path, set(cols.values()), chunksize):
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+        times = chunk[cols["time"]].to_numpy()
+        # The last timestamp may continue in the next chunk; hold it back
+        boundaries = np.flatnonzero(times[1:] != times[:-1]) + 1
+        cut = boundaries[-1] if len(boundaries) else 0
+        pending = chunk.iloc[cut:]
+        yield from _split_steps(chunk.iloc[:cut], cols)
+    if pending is not None:
+        yield from _split_steps(pending, cols)
+
+
+def _split_steps(frame, cols):
+    if frame.empty:
+        return
+    times = frame[cols["time"]].to_numpy()
+    vm_ids = frame[cols["vm"]].to_numpy()
+    cpu = frame[cols["cpu"]].to_numpy(dtype=np.float64)
+    mem = frame[cols["mem"]].to_numpy(dtype=np.float64) if cols["mem"] in frame else None
+    starts = np.concatenate(([0], np.flatnonzero(times[1:] != times[:-1]) + 1, [len(times)]))
+    for a, b in zip(starts[:-1], starts[1:]):
+        yield times[a], vm_ids[a:b], cpu[a:b], None if mem is None else mem[a:b]
+
+
+def read_per_vm_dir(directory, cpu_col=None, mem_col=None, delimiter=None):
+    """
+    Stream a directory with one time series file per VM, read in lockstep (one line per file per step).
+    - PlanetLab style: one CPU value per line, no header (leave `cpu_col` unset).
+    - Bitbrains style: a header row plus delimited columns; pass e.g.
+      cpu_col="CPU usage [%]", mem_col="Memory usage [KB]", delimiter=";".
+    VM ids are the file names. Stops when the shortest file ends.
+    """
+    names = sorted(n for n in os.listdir(directory) if os.path.isfile(os.path.join(directory, n)))
+    files = [open(os.path.join(directory, n), "r") for n in names]
+    try:
+        cpu_pos = mem_pos = None
+        if cpu_col is not None:
+            headers = [[h.strip() for h in f.readline().split(delimiter)] for f in files]
+            cpu_pos = [h.index(cpu_col) for h in headers]
+            mem_pos = [h.index(mem_col) for h in headers] if mem_col is not None else None
+        vm_ids = np.array(names)
+        step = 0
+        while True:
+            lines = [f.readline() for f in files]
+            if not lines or any(not line.strip() for line in lines):
+                return
+            if cpu_pos is None:
+                cpu = np.array([float(line) for line in lines])
+                mem = None
+            else:
+                fields = [line.split(delimiter) for line in lines]
+                cpu = np.array([float(row[pos]) for row, pos in zip(fields, cpu_pos)])
+                mem = np.array([float(row[pos]) for row, pos in zip(fields, mem_pos)]) if mem_pos else None
+            yield step, vm_ids, cpu, mem
+            step += 1
+    finally:
+        for f in files:
+            f.close()
+
+
+def open_trace(path, **kwargs):
+    """Pick a reader for a trace path: directories are per-VM series, files are long-format."""
+    if os.path.isdir(path):
+        return read_per_vm_dir(path, **kwargs)
+    return read_long_trace(path, **kwargs)
+
+# --- Replay ---
+
+class TraceReplayer:
+    """
+    Drives a CloudEnvironment's VM demands from a trace, one step per `apply` call.
+
+    Trace VMs are matched to environment VMs in order of first appearance. With `grow`,
+    trace VMs beyond the environment's current VMs are added as new (unplaced) VMs;
+    otherwise their samples are ignored. Terminated VMs stop receiving samples. Values
+    are multiplied by `cpu_scale`/`mem_scale` (e.g. to turn percentages into demands),
+    and VMs absent from a step keep their previous demand.
+
+    Attach it with `env.workload = replayer` so `env.update_vm_workloads()` replays the trace.
+    """
+
+    def __init__(self, steps, cpu_scale=1.0, mem_scale=1.0, grow=True):
+        self.steps = iter(steps)
+        self.cpu_scale = cpu_scale
+        self.mem_scale = mem_scale
+        self.grow = grow
+        self.step_count = 0
+        self.timestamp = None
+        self.exhausted = False
+        self._known = pd.Index([])
+        self._slots = np.empty(0, dtype=np.int64)  # Trace VM (by first appearance) -> env slot, -1 if none
+        self._unmatched = None
+
+    def _match(self, env, vm_ids):
+        """Environment slot of each trace VM in a step (-1 when it has none)."""
+        pos = self._known.get_indexer(vm_ids)
+        new = pos < 0
+        if new.any():
+            new_ids = pd.unique(np.asarray(vm_ids)[new])
+            if self._unmatched is None:
+                # Environment VMs not driven by the trace yet, in id order
+                self._unmatched = [vm._idx for _, vm in sorted(env._vm_by_id.items())]
+                self._unmatched.reverse()
+            slots = np.full(len(new_ids), -1, dtype=np.int64)
+            for k in range(len(new_ids)):
+                if self._unmatched:
+                    slots[k] = self._unmatched.pop()
+                elif self.grow:
+                    slots[k] = env.add_vm(0.0, 0.0)._idx
+            self._known = self._known.append(pd.Index(new_ids))
+            self._slots = np.concatenate((self._slots, slots))
+            pos = self._known.get_indexer(vm_ids)
+        slots = self._slots[pos]
+        live = slots >= 0
+        dead = live.copy()
+        dead[live] = ~env.vm_active[slots[live]]
+        if dead.any():
+            self._slots[pos[dead]] = -1
+            slots[dead] = -1
+        return slots
+
+    def apply(self, env):
+        """Apply the next trace step to `env`. Returns False once the trace is exhausted."""
+        if self.exhausted:
+            return False
+        try:
+            timestamp, vm_ids, cpu, mem = next(self.steps)
+        except StopIteration:
+            self.exhausted = True
+            logging.info("🏁 Trace exhausted after %d steps", self.step_count)
+            return False
+        slots = self._match(env, vm_ids)
+        # Skip unmatched VMs; if a VM is sampled twice in a step, its last sample wins
+        keep = np.flatnonzero(slots >= 0)[::-1]
+        idx, first = np.unique(slots[keep], return_index=True)
+        keep = keep[first]
+        cpu = np.maximum(0.0, cpu[keep] * self.cpu_scale)
+        mem = env.vm_mem[idx] if mem is None else np.maximum(0.0, mem[keep] * self.mem_scale)
+        env.apply_vm_workloads(idx, cpu, mem)
+        self.timestamp = timestamp
+        self.step_count += 1
+        return True
+
+
+def replay_trace(env, replayer, strategy="first_fit", max_steps=None):
+    """
+    Run a baseline placement policy over a trace: each step places the unplaced VMs,
+    applies the next trace step and ticks idle counters. Returns the mean of every
+    get_metrics() value over the steps, plus the number of steps replayed; `energy_wh`
+    is the energy used over the whole replay instead.
+    """
+    env.workload = replayer
+    start_wh = env.energy_wh
+    totals = {}
+    steps = 0
+    while max_steps is None or steps < max_steps:
+        for vm in env.get_unplaced_vms():
+            env.place_vm(vm, strategy)
+        if not replayer.apply(env):
+            break
+        env.tick_idle_counters()
+        steps += 1
+        for key, value in env.get_metrics().items():
+            totals[key] = totals.get(key, 0.0) + value
+    summary = {key: value / steps for key, value in totals.items()}
+    summary["energy_wh"] = env.energy_wh - start_wh
+    summary["steps"] = steps
+    return summary
+
+
+if __name__ == "__main__":
+    from src.env.cloud_env import CloudEnvironment
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
+    parser = argparse.ArgumentParser(description="Replay a workload trace with a baseline placement policy")
+    parser.add_argument("trace", help="Long-format CSV/JSON Lines/Parquet file, or a directory of per-VM series")
+    parser.add_argument("--strategy", default="first_fit", choices=["first_fit", "best_fit", "worst_fit"])
+    parser.add_argument("--hosts", type=int, default=12, help="Number of hosts")
+    parser.add_argument("--steps", type=int, default=None, help="Stop after this many steps")
+    parser.add_argument("--cpu_scale", type=float, default=1.0, help="Multiplier turning trace CPU values into demands")
+    parser.add_argument("--mem_scale", type=float, default=1.0, help="Multiplier turning trace memory values into demands")
+    parser.add_argument("--cpu_col", default=None, help="CPU column of per-VM files with a header (Bitbrains)")
+    parser.add_argument("--mem_col", default=None, help="Memory column of per-VM files with a header (Bitbrains)")
+    parser.add_argument("--delimiter", default=None, help="Field delimiter of per-VM files")
+    parser.add_argument("--step_seconds", type=float, default=300.0, help="Seconds between trace samples")
+    parser.add_argument("--power_model", default="linear", choices=["linear", "specpower"], help="Host power model")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the generated hosts")
+    args = parser.parse_args()
+
+    reader_args = {}
+    if os.path.isdir(args.trace):
+        reader_args = {"cpu_col": args.cpu_col, "mem_col": args.mem_col, "delimiter": args.delimiter}
+    env = CloudEnvironment(num_hosts=args.hosts, num_vms=0, rng=args.seed,
+                           power_model=args.power_model, step_seconds=args.step_seconds)
+    replayer = TraceReplayer(open_trace(args.trace, **reader_args), args.cpu_scale, args.mem_scale)
+    summary = replay_trace(env, replayer, args.strategy, args.steps)
+    for key, value in summary.items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
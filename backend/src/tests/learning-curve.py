@@ -1,23 +1,75 @@
+import sys
+import json
 import requests
 import matplotlib.pyplot as plt
 
-# Fetch learning curve data
-url = "http://localhost:5000/api/learning-curve"
-response = requests.get(url)
-data = response.json()
+API = "http://localhost:5000/api"
+WINDOW = 50  # Rolling-mean window in episodes
 
-# Extract rewards
-rewards = data.get("episode_rewards", [])
 
-if not rewards:
-    print("No training data found. Run training first.")
-else:
+def plot_final_curve():
+    # Fetch a downsampled learning curve of the served agent
+    url = f"{API}/learning-curve"
+    response = requests.get(url, params={"max_points": 2000, "window": WINDOW})
+    data = response.json()
+
+    # Extract rewards
+    rewards = data.get("episode_rewards", [])
+    episodes = data.get("episodes", list(range(1, len(rewards) + 1)))
+
+    if not rewards:
+        print("No training data found. Run training first.")
+        return
+
     # Plot learning curve
     plt.figure(figsize=(10, 5))
-    plt.plot(range(1, len(rewards) + 1), rewards, label="Reward per Episode", color="blue")
+    plt.plot(episodes, rewards, label=f"Reward per Episode (mean of last {WINDOW})", color="blue")
     plt.xlabel("Episode")
     plt.ylabel("Reward")
     plt.title("Q-Learning Agent Learning Curve")
     plt.grid(True)
     plt.legend()
     plt.show()
+
+
+def plot_live_curve(job_id, every=10):
+    # Follow a running training job over server-sent events
+    url = f"{API}/jobs/{job_id}/stream"
+    episodes, rewards = [], []
+
+    plt.ion()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    line, = ax.plot([], [], label=f"Reward per Episode (mean of last {WINDOW})", color="blue")
+    ax.set_xlabel("Episode")
+    ax.set_ylabel("Reward")
+    ax.set_title(f"Q-Learning Agent Learning Curve (job {job_id})")
+    ax.grid(True)
+    ax.legend()
+
+    with requests.get(url, params={"every": every, "window": WINDOW}, stream=True) as response:
+        event = None
+        for raw in response.iter_lines(decode_unicode=True):
+            if raw.startswith("event:"):
+                event = raw.split(":", 1)[1].strip()
+            elif raw.startswith("data:"):
+                data = json.loads(raw.split(":", 1)[1])
+                if event == "done":
+                    print(f"Job finished: {data['state']}")
+                    break
+                if event == "episode":
+                    episodes.append(data["episode"])
+                    rewards.append(data["reward"])
+                    line.set_data(episodes, rewards)
+                    ax.relim()
+                    ax.autoscale_view()
+                    plt.pause(0.01)
+
+    plt.ioff()
+    plt.show()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        plot_live_curve(sys.argv[1])
+    else:
+        plot_final_curve()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+import os
+import json
+import math
+import time
+import pickle
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from src.agent.q_learning import QLearningAgent
+from src.agent.episode_stats import EpisodeStats
+
+PARAMS = ("alpha", "gamma", "num_bins", "decay_rate", "episodes", "time_steps")
+DEFAULTS = {"alpha": 0.1, "gamma": 0.9, "num_bins": 5, "decay_rate": 0.005, "episodes": 2000, "time_steps": 50}
+INT_PARAMS = {"num_bins", "episodes", "time_steps"}
+
+# --- Search Space ---
+
+def parse_space(specs):
+    """
+    Parse CLI entries into a search space:
+      name=v1,v2,...       grid values (sampled uniformly in random search)
+      name=uniform:lo:hi   continuous uniform
+      name=loguniform:lo:hi
+      name=int:lo:hi       integer in [lo, hi]
+    """
+    space = {}
+    for spec in specs:
+        name, _, value = spec.partition("=")
+        if name not in PARAMS:
+            raise ValueError(f"Unknown sweep parameter: {name} (expected one of {', '.join(PARAMS)})")
+        cast = int if name in INT_PARAMS else float
+        kind, _, bounds = value.partition(":")
+        if kind in ("uniform", "loguniform", "int"):
+            lo, hi = (float(b) for b in bounds.split(":"))
+            space[name] = [kind, lo, hi]
+        else:
+            space[name] = [cast(v) for v in value.split(",")]
+    return space
+
+
+def make_trials(space, num_samples=None, seed=0):
+    """
+    Expand a space into trial configs: the full grid, or `num_samples` random draws.
+    Each trial gets a deterministic seed spawned from `seed`, so a sweep is reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    is_grid = all(isinstance(v, list) and (not v or not isinstance(v[0], str)) for v in space.values())
+    if num_samples is None:
+        if not is_grid:
+            raise ValueError("Distributions need --samples (random search)")
+        names = list(space)
+        configs = [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+    else:
+        configs = []
+        for _ in range(num_samples):
+            config = {}
+            for name, values in space.items():
+                if isinstance(values[0], str):
+                    kind, lo, hi = values
+                    if kind == "uniform":
+                        value = rng.uniform(lo, hi)
+                    elif kind == "loguniform":
+                        value = math.exp(rng.uniform(math.log(lo), math.log(hi)))
+                    else:
+                        value = rng.integers(int(lo), int(hi) + 1)
+                else:
+                    value = values[rng.integers(len(values))]
+                config[name] = int(value) if name in INT_PARAMS else float(value)
+            configs.append(config)
+
+    seeds = np.random.SeedSequence(seed).spawn(len(configs))
+    return [
+        {"id": f"t{i:04d}", "seed": int(child.generate_state(1)[0]), **DEFAULTS, **config}
+        for i, (config, child) in enumerate(zip(configs, seeds))
+    ]
+
+
+def rung_budgets(episodes, rungs, eta):
+    """Episode budget of each rung: episodes / eta^(rungs-1), ..., episodes / eta, episodes."""
+    return [max(1, math.ceil(episodes / eta ** (rungs - 1 - r))) for r in range(rungs)]
+
+# --- Results Store ---
+
+class SweepStore:
+    """
+    On-disk, resumable sweep state:
+      spec.json          the sweep definition (trials, rungs, eta, window)
+      results.jsonl      one line per finished (trial, rung), appended as they complete
+      checkpoints/*.pkl  each trial's agent (with its RNG) after its latest rung
+    Re-running the same sweep skips every (trial, rung) already in results.jsonl and
+    continues unfinished trials from their checkpoints.
+    """
+
+    def __init__(self, path, spec):
+        self.path = path
+        os.makedirs(os.path.join(path, "checkpoints"), exist_ok=True)
+        spec_path = os.path.join(path, "spec.json")
+        if os.path.exists(spec_path):
+            with open(spec_path, "r") as f:
+                stored = json.load(f)
+            if stored != json.loads(json.dumps(spec)):
+                raise ValueError(f"{path} holds a different sweep; use a new directory")
+        else:
+            with open(spec_path, "w") as f:
+                json.dump(spec, f, indent=2)
+        self.results = {}
+        results_path = os.path.join(path, "results.jsonl")
+        if os.path.exists(results_path):
+            with open(results_path, "r") as f:
+                lines = f.readlines()
+            if lines and not lines[-1].endswith("\n"):
+                # Torn last line from an interrupted write: cut it so the next record starts on a line of its own
+                torn = lines.pop()
+                with open(results_path, "r+") as f:
+                    f.truncate(os.path.getsize(results_path) - len(torn.encode()))
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Unreadable line
+                self.results[(record["trial"], record["rung"])] = record
+        self._log = open(results_path, "a")
+
+    def get(self, trial_id, rung):
+        return self.results.get((trial_id, rung))
+
+    def record(self, record):
+        self.results[(record["trial"], record["rung"])] = record
+        self._log.write(json.dumps(record) + "\n")
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def checkpoint_path(self, trial_id):
+        return os.path.join(self.path, "checkpoints", f"{trial_id}.pkl")
+
+    def close(self):
+        self._log.close()
+
+# --- Trial Worker ---
+
+def run_trial(checkpoint_path, trial, episodes, window):
+    """
+    Train one trial up to `episodes` total episodes, continuing from its checkpoint if there is one.
+    Returns the trial's score (mean reward of the last `window` episodes) and final metrics.
+    """
+    if os.path.exists(checkpoint_path):
+        # The pickled agent carries its RNG state, so continuing is bit-identical to an uninterrupted run
+        with open(checkpoint_path, "rb") as f:
+            agent = pickle.load(f)
+    else:
+        agent = QLearningAgent(
+            alpha=trial["alpha"],
+            gamma=trial["gamma"],
+            episodes=episodes,
+            time_steps_per_episode=trial["time_steps"],
+            num_bins=trial["num_bins"],
+            rng=trial["seed"]
+        )
+        agent.decay_rate = trial["decay_rate"]
+        agent.stats = EpisodeStats(window=window)  # Its rolling mean is the trial's score
+
+    agent.episodes = episodes
+    agent.train(start_episode=agent.stats.count + 1)
+
+    # Write-then-rename so an interrupted save never leaves a corrupt checkpoint
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(agent, f)
+    os.replace(tmp_path, checkpoint_path)
+
+    return {
+        "trial": trial["id"],
+        "episodes": agent.stats.count,
+        "score": agent.stats.rolling_mean("reward"),
+        "avg_reward": agent.stats.mean("reward"),
+        **agent.env.get_metrics()
+    }
+
+# --- Sweep Execution ---
+
+def run_sweep(store_dir, trials, rungs=3, eta=3, window=100, max_workers=None):
+    """
+    Successive halving over `trials`: every surviving trial trains to the rung's budget in
+    parallel, then only the top 1/eta (by rolling reward) continue to the next rung.
+    With rungs=1 every trial trains to its full episode count.
+    Returns a DataFrame with each trial's latest result, best score first.
+    """
+    spec = {"trials": trials, "rungs": rungs, "eta": eta, "window": window}
+    store = SweepStore(store_dir, spec)
+    alive = list(trials)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for rung in range(rungs):
+                pending = {}
+                for trial in alive:
+                    if store.get(trial["id"], rung) is not None:
+                        continue
+                    budget = rung_budgets(trial["episodes"], rungs, eta)[rung]
+                    future = executor.submit(run_trial, store.checkpoint_path(trial["id"]), trial, budget, window)
+                    pending[future] = trial
+                for future in tqdm(as_completed(pending), total=len(pending), desc=f"Rung {rung + 1}/{rungs}", unit="trial"):
+                    store.record({"rung": rung, **future.result()})
+
+                if rung < rungs - 1:
+                    keep = max(1, len(alive) // eta)
+                    alive.sort(key=lambda t: store.get(t["id"], rung)["score"], reverse=True)
+                    alive = alive[:keep]
+    finally:
+        store.close()
+
+    latest = {}
+    for (trial_id, rung), record in sorted(store.results.items(), key=lambda item: item[0][1]):
+        latest[trial_id] = record
+    configs = {t["id"]: t for t in trials}
+    rows = [{**configs[trial_id], **record} for trial_id, record in latest.items()]
+    df = pd.DataFrame(rows).sort_values(["rung", "score"], ascending=False)
+    return df.reset_index(drop=True)
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Parallel hyperparameter sweep with successive halving for the Q-Learning agent"
+    )
+    parser.add_argument("store", help="Directory for the resumable results store")
+    parser.add_argument(
+        "params", nargs="+",
+        help="Search space entries, e.g. alpha=0.05,0.1,0.2 gamma=uniform:0.8:0.99 num_bins=int:3:8"
+    )
+    parser.add_argument("--samples", type=int, default=None, help="Random search with this many trials (default: full grid)")
+    parser.add_argument("--seed", type=int, default=0, help="Sweep seed; fixes the sampled configs and per-trial seeds")
+    parser.add_argument("--rungs", type=int, default=3, help="Successive halving rungs (1 disables early stopping)")
+    parser.add_argument("--eta", type=int, default=3, help="Keep the top 1/eta trials at each rung")
+    parser.add_argument("--window", type=int, default=100, help="Episodes in the rolling reward used for ranking")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--export_csv", type=str, default=None, help="If provided, writes the final table to this CSV file")
+    args = parser.parse_args()
+
+    trials = make_trials(parse_space(args.params), args.samples, args.seed)
+    print(f"🔎 Sweep: {len(trials)} trials, {args.rungs} rungs, eta={args.eta} -> {args.store}")
+    start = time.time()
+
+    df = run_sweep(args.store, trials, rungs=args.rungs, eta=args.eta, window=args.window, max_workers=args.workers)
+
+    print(f"\n✅ Sweep completed in {time.time() - start:.2f} seconds")
+    print("\n--- Leaderboard ---")
+    columns = ["id", "rung", "score", "episodes"] + [p for p in PARAMS if p != "episodes"]
+    print(df[columns].head(10).to_string(index=False))
+    if args.export_csv:
+        df.to_csv(args.export_csv, index=False)
+        print(f"\n📁 Sweep results written to {args.export_csv}")
@@ -0,0 +1,30 @@
+import time
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    """Flask test client plus the routes module; job workers write their tables to a temp dir."""
+    from src.api import jobs as jobs_module
+    jobs_module.JOBS_DIR = str(tmp_path_factory.mktemp("jobs"))
+    from app import create_app
+    from src.api import routes
+    app = create_app()
+    app.testing = True
+    yield app.test_client(), routes
+    routes.jobs.shutdown()
+
+
+@pytest.fixture
+def wait_for_job():
+    """wait(client, job_id): poll a job until it leaves the queued/running states; returns its status."""
+    def wait(client, job_id, timeout=120):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = client.get(f"/api/jobs/{job_id}").get_json()
+            if status["state"] not in ("queued", "running"):
+                return status
+            time.sleep(0.05)
+        raise TimeoutError(f"Job {job_id} did not finish")
+    return wait
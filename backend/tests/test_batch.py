@@ -0,0 +1,14 @@
+from batch_test import resolve_seed, run_batch_simulations
+
+
+def test_seeded_batch_is_reproducible_and_silent(capsys):
+    args = dict(num_runs=2, episodes=2, time_steps=3, alpha=0.1, gamma=0.9, independent_runs=True, max_workers=2)
+    first = run_batch_simulations(seed=7, **args)
+    second = run_batch_simulations(seed=resolve_seed(7), **args)
+    assert first == second
+    assert "Batch seed" not in capsys.readouterr().out  # Only the CLI prints the seed
+
+
+def test_fresh_seed_is_recorded():
+    seed = resolve_seed()
+    assert isinstance(seed, int) and seed != resolve_seed()
@@ -0,0 +1,19 @@
+import pytest
+
+from benchmark import BENCHMARKS, SIZES
+from src.agent.q_learning import QLearningAgent
+
+
+@pytest.mark.parametrize("name", ["get_action_explore", "get_action_exploit", "train_episode"])
+def test_decision_benchmarks_take_the_full_path(name):
+    hosts, vms = SIZES[1]
+    agent = QLearningAgent(num_hosts=hosts, num_vms=vms, time_steps_per_episode=10, rng=0)
+    agent.env.reset()
+    assert callable(BENCHMARKS[name][0](agent))
+
+
+def test_saturated_cluster_is_refused():
+    agent = QLearningAgent(num_hosts=100, num_vms=1000, rng=0)  # The old 1:10 sizes: no migration fits
+    agent.env.reset()
+    with pytest.raises(RuntimeError):
+        BENCHMARKS["get_action_explore"][0](agent)
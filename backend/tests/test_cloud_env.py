@@ -0,0 +1,282 @@
+import numpy as np
+import pytest
+
+from src.env.cloud_env import CloudEnvironment
+
+# --- Helpers ---
+
+def recomputed_metrics(env):
+    """get_metrics() rebuilt from the host/VM arrays, without the running totals."""
+    active = env.host_vm_count > 0
+    cpu = env.get_cpu_utilizations()[active]
+    mem = env.get_mem_utilizations()[active]
+    return {
+        'total_power_consumption': float(env.get_host_powers().sum()),
+        'active_hosts': int(active.sum()),
+        'avg_cpu_utilization': float(cpu.mean()) if len(cpu) else 0,
+        'avg_mem_utilization': float(mem.mean()) if len(mem) else 0,
+        'total_idle_steps': int(env.host_idle_steps.sum()),
+        'sla_violations': sum(vm.assigned_host is None for vm in env.vms),
+        'energy_wh': env.energy_wh,
+    }
+
+
+def assert_metrics_consistent(env):
+    metrics = env.get_metrics()
+    expected = recomputed_metrics(env)
+    assert metrics.keys() == expected.keys()
+    for key, value in expected.items():
+        assert metrics[key] == pytest.approx(value, rel=1e-9, abs=1e-9), key
+
+
+def random_op(env, rng):
+    """Apply one random mutation through the public API."""
+    vms = env.vms
+    vm = vms[rng.integers(len(vms))]
+    host = env.hosts[rng.integers(len(env.hosts))]
+    op = rng.integers(6)
+    if op == 0:
+        env.remove_vm(vm)
+    elif op == 1:
+        env.assign_vm(vm, host.id)
+    elif op == 2:
+        env.migrate_vm(vm, host)
+    elif op == 3:
+        vm.update_requirements(rng.integers(-8, 9), rng.integers(-15, 16))
+    elif op == 4:
+        env.update_vm_workloads()
+    else:
+        env.tick_idle_counters()
+
+# --- Running totals ---
+
+def test_initial_metrics_match_recomputation():
+    env = CloudEnvironment(num_hosts=20, num_vms=40, rng=1)
+    assert_metrics_consistent(env)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_running_totals_survive_random_operations(seed):
+    env = CloudEnvironment(num_hosts=15, num_vms=30, rng=seed)
+    rng = np.random.default_rng(seed)
+    for _ in range(500):
+        random_op(env, rng)
+        assert_metrics_consistent(env)
+
+
+def test_power_model_switch_rebuilds_totals():
+    env = CloudEnvironment(num_hosts=10, num_vms=20, rng=3)
+    env.set_power_model("specpower")
+    assert_metrics_consistent(env)
+    env.update_vm_workloads()
+    assert_metrics_consistent(env)
+
+
+def test_reset_restores_consistent_totals():
+    env = CloudEnvironment(num_hosts=10, num_vms=25, rng=4)
+    rng = np.random.default_rng(4)
+    for _ in range(100):
+        random_op(env, rng)
+    env.reset()
+    assert_metrics_consistent(env)
+    assert env.get_metrics()['energy_wh'] == 0.0
+    assert env.get_metrics()['total_idle_steps'] == 0
+
+# --- What-if evaluation ---
+
+@pytest.mark.parametrize("seed", range(3))
+def test_evaluate_migrations_matches_simulate_and_rollback(seed):
+    env = CloudEnvironment(num_hosts=12, num_vms=30, rng=seed)
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        random_op(env, rng)
+    vms = env.vms
+    picks = [vms[i] for i in rng.integers(len(vms), size=200)]
+    src = [vm.assigned_host if vm.assigned_host is not None and rng.random() < 0.9 else int(rng.integers(12)) for vm in picks]
+    dst = rng.integers(12, size=200).tolist()
+
+    state_before = env.snapshot()
+    deltas = env.evaluate_migrations(src, dst, picks)
+    # Side-effect free
+    for name, arr in state_before['arrays'].items():
+        assert np.array_equal(getattr(env, name), arr), name
+
+    for k, (s, d, vm) in enumerate(zip(src, dst, picks)):
+        before = env.get_metrics()
+        moved = env.simulate_migration(s, d, vm)
+        assert bool(deltas['feasible'][k]) == moved
+        after = env.get_metrics()
+        for key in before:
+            assert deltas[key][k] == pytest.approx(after[key] - before[key], abs=1e-9), key
+        env.rollback()
+        assert env.get_metrics() == pytest.approx(before)
+
+
+def test_evaluate_migration_single_candidate():
+    env = CloudEnvironment(num_hosts=6, num_vms=8, rng=7)
+    vm = next(vm for vm in env.vms if vm.assigned_host is not None)
+    dst = next(h.id for h in env.hosts if h.id != vm.assigned_host and h.can_host(vm))
+    delta = env.evaluate_migration(vm.assigned_host, dst, vm)
+    before = env.get_metrics()
+    env.simulate_migration(vm.assigned_host, dst, vm)
+    assert delta['feasible']
+    assert delta['active_hosts'] == env.get_metrics()['active_hosts'] - before['active_hosts']
+    assert delta['total_power_consumption'] == pytest.approx(env.get_metrics()['total_power_consumption'] - before['total_power_consumption'])
+
+# --- VM and slot indexes ---
+
+def assert_layout_consistent(env):
+    """Per-host slot lists, VM counts and free capacity agree with the VM -> host array."""
+    live = np.array([vm._idx for vm in env.vms], dtype=np.int64)
+    hosts = env.vm_host[live]
+    placed = hosts >= 0
+    num_hosts = len(env.hosts)
+    assert np.array_equal(env.host_vm_count, np.bincount(hosts[placed], minlength=num_hosts))
+    np.testing.assert_allclose(env.host_free_cpu, env.host_total_cpu - np.bincount(
+        hosts[placed], weights=env.vm_cpu[live][placed], minlength=num_hosts))
+    np.testing.assert_allclose(env.host_free_mem, env.host_total_mem - np.bincount(
+        hosts[placed], weights=env.vm_mem[live][placed], minlength=num_hosts))
+    for host in env.hosts:
+        on_host = host.vms
+        assert sorted(vm._idx for vm in on_host) == sorted(live[hosts == host.id].tolist())
+        for pos, vm in enumerate(on_host):
+            assert env.vm_slot[vm._idx] == pos
+    assert {vm.id for vm in env.get_unplaced_vms()} == {vm.id for vm in env.vms if vm.assigned_host is None}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_churn_keeps_indexes_consistent(seed):
+    env = CloudEnvironment(num_hosts=10, num_vms=20, rng=seed)
+    rng = np.random.default_rng(seed)
+    for _ in range(600):
+        roll = rng.random()
+        if roll < 0.15:
+            vm = env.add_vm(float(rng.integers(5, 30)), float(rng.integers(10, 50)))
+            env.place_vm(vm, ("first_fit", "best_fit", "worst_fit")[rng.integers(3)])
+        elif roll < 0.3 and len(env.vms) > 1:
+            vm = env.vms[rng.integers(len(env.vms))]
+            assert env.terminate_vm(vm.id)
+            assert env.get_vm(vm.id) is None
+        else:
+            random_op(env, rng)
+        assert_layout_consistent(env)
+        assert_metrics_consistent(env)
+
+
+def test_terminated_slots_are_recycled():
+    env = CloudEnvironment(num_hosts=4, num_vms=6, rng=0)
+    victim = env.vms[2]
+    slot = victim._idx
+    assert env.terminate_vm(victim.id)
+    assert not env.terminate_vm(victim.id)
+    vm = env.add_vm(10.0, 20.0)
+    assert vm._idx == slot
+    assert vm.id == 6
+    assert env.get_vm(6) is vm
+    assert [v.id for v in env.vms] == [0, 1, 3, 4, 5, 6]
+
+
+def test_swap_remove_moves_last_slot_into_the_gap():
+    env = CloudEnvironment(num_hosts=3, num_vms=0, rng=0)
+    vms = [env.add_vm(1.0, 1.0) for _ in range(4)]
+    for vm in vms:
+        assert env.assign_vm(vm, 0)
+    env.remove_vm(vms[1])
+    assert [vm.id for vm in env.hosts[0].vms] == [0, 3, 2]
+    assert env.vm_slot[vms[3]._idx] == 1
+    assert_layout_consistent(env)
+
+# --- Snapshots and forks ---
+
+def assert_same_state(env, other):
+    for name, arr in env.snapshot()['arrays'].items():
+        assert np.array_equal(getattr(other, name), arr), name
+    assert [vm.id for vm in env.vms] == [vm.id for vm in other.vms]
+    assert [[vm.id for vm in host.vms] for host in env.hosts] == [[vm.id for vm in host.vms] for host in other.hosts]
+    assert env.get_metrics() == other.get_metrics()
+
+
+def run_ops(env, seed, count=200):
+    """Seeded churn (env.rng reseeded too), returning the final snapshot's arrays."""
+    env.rng = np.random.default_rng(seed)
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        if rng.random() < 0.1:
+            env.place_vm(env.add_vm(float(rng.integers(5, 30)), float(rng.integers(10, 50))), "best_fit")
+        elif rng.random() < 0.1 and len(env.vms) > 1:
+            env.terminate_vm(env.vms[rng.integers(len(env.vms))].id)
+        else:
+            random_op(env, rng)
+    return env.snapshot()['arrays']
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_snapshot_can_be_restored_repeatedly(seed):
+    env = CloudEnvironment(num_hosts=10, num_vms=25, rng=seed)
+    run_ops(env, seed, 50)
+    snapshot = env.snapshot()
+    reference = CloudEnvironment(num_hosts=10, num_vms=25, rng=seed)
+    run_ops(reference, seed, 50)
+
+    first = run_ops(env, seed + 100)
+    env.restore(snapshot)
+    assert_same_state(reference, env)
+    assert_layout_consistent(env)
+    assert_metrics_consistent(env)
+    second = run_ops(env, seed + 100)  # Same decisions from the same state, placement index included
+    for name, arr in first.items():
+        assert np.array_equal(second[name], arr), name
+
+
+def test_fork_is_independent_of_its_parent():
+    env = CloudEnvironment(num_hosts=8, num_vms=20, rng=3)
+    before = env.snapshot()
+    fork = env.fork()
+    assert_same_state(env, fork)
+    run_ops(fork, 1)
+    for name, arr in before['arrays'].items():
+        assert np.array_equal(getattr(env, name), arr), name
+    assert_metrics_consistent(env)
+    assert_layout_consistent(fork)
+
+    fork_state = fork.snapshot()
+    run_ops(env, 2)
+    for name, arr in fork_state['arrays'].items():
+        assert np.array_equal(getattr(fork, name), arr), name
+    assert all(host._env is fork for host in fork.hosts) and all(vm._env is fork for vm in fork.vms)
+
+
+def test_forks_with_the_same_rng_are_identical():
+    env = CloudEnvironment(num_hosts=8, num_vms=20, rng=4)
+    forks = [env.fork(rng=11) for _ in range(2)]
+    for fork in forks:
+        for _ in range(10):
+            fork.update_vm_workloads()
+    assert_same_state(*forks)
+    child_a, child_b = env.fork(), env.fork()  # Child streams of the parent RNG differ
+    child_a.update_vm_workloads()
+    child_b.update_vm_workloads()
+    assert not np.array_equal(child_a.vm_cpu, child_b.vm_cpu)
+
+
+def test_reset_reuses_the_cached_layout_until_vms_change(monkeypatch):
+    env = CloudEnvironment(num_hosts=10, num_vms=30, rng=5)
+    env.reset("best_fit")
+    cached = env.snapshot()
+    for _ in range(5):
+        env.tick_idle_counters()
+        env.migrate_vm(env.vms[0], env.hosts[-1])
+    with monkeypatch.context() as patch:
+        patch.setattr(env, "_initial_allocation", None)  # A cache hit must not allocate again
+        env.reset("best_fit")
+    for name, arr in cached['arrays'].items():
+        assert np.array_equal(getattr(env, name), arr), name
+
+    run_ops(env, 0, 20)  # Changes demands and the VM set: the cached layout is stale
+    env.reset("best_fit")
+    fresh = CloudEnvironment(num_hosts=10, num_vms=30, rng=5)
+    fresh.restore(env.snapshot())
+    fresh.reset("best_fit", use_cache=False)
+    assert_same_state(fresh, env)
+    assert_layout_consistent(env)
+    assert_metrics_consistent(env)
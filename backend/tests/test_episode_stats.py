@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.agent.episode_stats import EpisodeStats
+
+
+def pushed(values, **kwargs):
+    stats = EpisodeStats(**kwargs)
+    for episode, value in enumerate(values, start=1):
+        stats.push(episode, reward=value, migrations=2 * value)
+    return stats
+
+# --- Aggregates ---
+
+def test_aggregates_match_numpy():
+    values = np.random.default_rng(0).normal(50.0, 20.0, size=1234)
+    stats = pushed(values, window=100, capacity=64)
+    assert stats.mean() == pytest.approx(values.mean())
+    assert stats.std() == pytest.approx(values.std())
+    assert stats.mean("migrations") == pytest.approx(2 * values.mean())
+    assert (stats.min(), stats.max(), stats.last()) == (values.min(), values.max(), values[-1])
+    assert stats.rolling_mean() == pytest.approx(values[-100:].mean())
+    assert stats.mean("energy_wh") == 0.0  # Fields not pushed count as 0
+
+
+def test_rolling_mean_before_the_window_fills():
+    stats = EpisodeStats(window=10, capacity=8)
+    assert stats.rolling_mean() == 0.0 and stats.std() == 0.0
+    for episode, value in enumerate((3.0, 5.0, 10.0), start=1):
+        stats.push(episode, reward=value)
+    assert stats.rolling_mean() == pytest.approx(6.0)
+
+# --- Decimated history ---
+
+def test_history_is_exact_up_to_capacity():
+    values = np.arange(8.0)
+    episodes, history = pushed(values, capacity=8).history()
+    assert episodes.tolist() == list(range(1, 9))
+    assert history.tolist() == values.tolist()
+
+
+@pytest.mark.parametrize("count", [9, 16, 17, 40, 100, 1000])
+def test_history_stays_evenly_spaced(count):
+    stats = pushed(np.arange(1.0, count + 1), capacity=8)
+    episodes, history = stats.history()
+    assert len(episodes) <= 8
+    stride = 1
+    while count // stride > 8:
+        stride *= 2  # Doubled each time a due row finds the buffer full
+    assert stats.stride == stride
+    assert episodes.tolist() == list(range(stats.stride, count + 1, stats.stride))
+    assert history.tolist() == episodes.astype(float).tolist()
+
+
+def test_odd_capacity_is_rejected():
+    for capacity in (0, 1, 7):
+        with pytest.raises(ValueError):
+            EpisodeStats(capacity=capacity)
+
+# --- Serialization ---
+
+def test_state_round_trip_continues_identically():
+    values = np.random.default_rng(1).uniform(-10, 10, size=300)
+    stats = pushed(values[:150], window=20, capacity=16)
+    restored = EpisodeStats.from_state(json.loads(json.dumps(stats.state())))
+    for field in stats.fields:
+        # The rolling sum is re-summed on restore, so it may differ in the last bits
+        assert restored.summary()[field] == pytest.approx(stats.summary()[field], rel=1e-12)
+    for mine, theirs in zip(restored.history(), stats.history()):
+        assert np.array_equal(mine, theirs)
+    for episode, value in enumerate(values[150:], start=151):
+        stats.push(episode, reward=value)
+        restored.push(episode, reward=value)
+    assert restored.state() == stats.state()
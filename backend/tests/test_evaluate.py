@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agent import evaluate
+from src.agent.evaluate import evaluate_policies, make_scenarios
+from src.agent.linear_agent import LinearQAgent, LinearQFunction
+from src.agent.q_learning import QLearningAgent
+from src.agent.q_table import QTable
+from src.env.cloud_env import CloudEnvironment
+
+# --- Helpers ---
+
+@pytest.fixture(scope="module")
+def policies(tmp_path_factory):
+    """Baselines plus a trained tabular and a trained linear policy, saved to disk."""
+    folder = tmp_path_factory.mktemp("policies")
+    tabular = QLearningAgent(episodes=20, time_steps_per_episode=10, rng=0)
+    tabular.train()
+    tabular.save_q_table(str(folder / "q_table.npz"))
+    linear = LinearQAgent(episodes=10, time_steps_per_episode=10, rng=0)
+    linear.train()
+    linear.save_q_table(str(folder / "linear.npz"))
+    return ["first_fit", "best_fit", f"greedy:{folder / 'q_table.npz'}", f"linear:{folder / 'linear.npz'}"]
+
+
+def without_timing(results):
+    return results.drop(columns="seconds").sort_values(["policy", "scenario"]).reset_index(drop=True)
+
+# --- Evaluation ---
+
+def test_results_are_deterministic_per_seed(policies):
+    scenarios = make_scenarios(3, seed=11, steps=15, drift=True)
+    assert make_scenarios(3, seed=11, steps=15, drift=True) == scenarios
+    first = evaluate_policies(policies, scenarios, max_workers=1)
+    second = evaluate_policies(policies, scenarios, max_workers=1)
+    pooled = evaluate_policies(policies, scenarios, max_workers=2)
+    pd.testing.assert_frame_equal(without_timing(first), without_timing(second))
+    pd.testing.assert_frame_equal(without_timing(first), without_timing(pooled))
+    assert len(first) == len(policies) * len(scenarios)
+    assert first[first["policy"].str.startswith(("greedy", "linear"))]["migrations"].sum() > 0
+
+    other = evaluate_policies(policies, make_scenarios(3, seed=12, steps=15, drift=True), max_workers=1)
+    assert not without_timing(other)["energy_wh"].equals(without_timing(first)["energy_wh"])
+
+
+def test_learned_policies_act_greedily_without_updates(policies, monkeypatch):
+    def no_updates(*args, **kwargs):
+        raise AssertionError("Evaluation must not update the policy")
+    for cls, names in ((QTable, ("set",)), (LinearQFunction, ("set", "update"))):
+        for name in names:
+            monkeypatch.setattr(cls, name, no_updates)
+
+    actions = []
+    get_action = QLearningAgent.get_action
+
+    def greedy_only(self, state, hosts_by_bin):
+        action = get_action(self, state, hosts_by_bin)
+        best = self.q_table.best_action(state)
+        assert self.epsilon == 0.0
+        assert best is None or action == best  # Fallback only where the policy knows no action
+        actions.append(action)
+        return action
+    monkeypatch.setattr(QLearningAgent, "get_action", greedy_only)
+
+    evaluate._TABLES.clear()
+    tables = {spec: evaluate._policy_table(spec) for spec in policies[2:]}
+    before = {spec: (t.values.copy(), t.visited.copy()) if isinstance(t, QTable) else (t.weights.copy(),)
+              for spec, t in tables.items()}
+    evaluate_policies(policies, make_scenarios(2, seed=3, steps=20, drift=True), max_workers=1)
+
+    assert actions
+    for spec, arrays in before.items():
+        table = evaluate._policy_table(spec)
+        assert table is tables[spec]
+        current = (table.values, table.visited) if isinstance(table, QTable) else (table.weights,)
+        for old, new in zip(arrays, current):
+            np.testing.assert_array_equal(new, old)
+
+
+def test_every_policy_sees_the_same_scenarios(policies, monkeypatch):
+    trajectories = []  # Per environment: capacities, then the VM demands after every drift
+    update = CloudEnvironment.update_vm_workloads
+    reset = CloudEnvironment.reset
+
+    def recording_reset(self, *args, **kwargs):
+        reset(self, *args, **kwargs)
+        if "trajectory" not in self.__dict__:
+            self.trajectory = [self.host_total_cpu.copy(), self.host_total_mem.copy()]
+            trajectories.append(self.trajectory)
+
+    def recording_update(self):
+        update(self)
+        self.trajectory.append(np.concatenate([self.vm_cpu, self.vm_mem]))
+    monkeypatch.setattr(CloudEnvironment, "reset", recording_reset)
+    monkeypatch.setattr(CloudEnvironment, "update_vm_workloads", recording_update)
+
+    scenarios = make_scenarios(2, seed=5, steps=12, drift=True)
+    results = evaluate_policies(policies, scenarios, max_workers=1)
+    assert len({s["seed"] for s in scenarios}) == len(scenarios)
+
+    # Tasks run policy by policy, scenario by scenario (itertools.product order)
+    runs = [trajectory for trajectory in trajectories if len(trajectory) > 2]
+    assert len(runs) == len(policies) * len(scenarios)
+    for s in range(len(scenarios)):
+        seen = [runs[p * len(scenarios) + s] for p in range(len(policies))]
+        for trajectory in seen[1:]:
+            assert len(trajectory) == len(seen[0])
+            for expected, actual in zip(seen[0], trajectory):
+                np.testing.assert_array_equal(actual, expected)
+    assert set(results.groupby("policy")["scenario"].apply(tuple)) == {tuple(s["id"] for s in scenarios)}
@@ -0,0 +1,99 @@
+import pytest
+
+from src.env.cloud_env import CloudEnvironment
+from src.env.event_sim import EventSimulator, OFF, ON
+from src.env.power import LinearPowerModel
+
+
+def cluster(num_hosts, power_model=None):
+    env = CloudEnvironment(num_hosts=num_hosts, num_vms=0, rng=0, power_model=power_model)
+    # A VM of `big` CPU fits any host alone, but no two fit on one host
+    return env, float(env.host_total_cpu.min())
+
+# --- Arrivals, departures and the waiting queue ---
+
+def test_arrival_runs_until_departure():
+    env, _ = cluster(2)
+    sim = EventSimulator(env, idle_timeout=1e9, rng=0)
+    sim.schedule_arrival(10.0, 20, 20, lifetime=50.0)
+    summary = sim.run(until=30.0)
+    assert (summary['arrivals'], summary['running_vms'], summary['time']) == (1, 1, 30.0)
+    summary = sim.run(until=100.0)
+    assert (summary['departures'], summary['running_vms']) == (1, 0)
+    assert env.host_vm_count.sum() == 0
+
+
+def test_waiting_vm_is_placed_when_a_departure_frees_room():
+    env, big = cluster(2)
+    sim = EventSimulator(env, idle_timeout=1e9, rng=0)
+    for at in (0.0, 1.0, 2.0):
+        sim.schedule_arrival(at, big, 10)
+    sim.schedule_departure(100.0, 0)
+    summary = sim.run(until=50.0)
+    assert (summary['queued'], summary['waiting_vms']) == (1, 1)
+    summary = sim.run(until=200.0)
+    assert (summary['dequeued'], summary['waiting_vms']) == (1, 0)
+    assert summary['avg_wait'] == pytest.approx(98.0)
+    assert env.get_vm(2).assigned_host is not None
+
+
+def test_demand_decrease_lets_waiting_vms_in():
+    env, big = cluster(1)
+    sim = EventSimulator(env, idle_timeout=1e9, rng=0)
+    sim.schedule_arrival(0.0, big - 5, 10)
+    sim.schedule_arrival(1.0, 20, 10)
+    sim.schedule_workload(5.0, 0, 10, 10)
+    summary = sim.run(until=10.0)
+    assert (summary['dequeued'], summary['waiting_vms'], summary['avg_wait']) == (1, 0, 4.0)
+
+
+def test_vms_unplaced_before_the_run_wait_like_arrivals():
+    env, big = cluster(1)
+    for _ in range(2):
+        env.place_vm(env.add_vm(big, 10))
+    sim = EventSimulator(env, idle_timeout=1e9, rng=0)
+    assert sim.summary()['queued'] == 1
+    sim.schedule_departure(10.0, 0)
+    summary = sim.run(until=20.0)
+    assert (summary['dequeued'], summary['waiting_vms'], summary['avg_wait']) == (1, 0, 10.0)
+
+
+def test_departure_of_a_vm_that_never_queued():
+    env, _ = cluster(1)
+    sim = EventSimulator(env, idle_timeout=1e9, rng=0)
+    vm = env.add_vm(1000, 10)  # Added behind the simulator's back, never placed or queued
+    sim.schedule_departure(1.0, vm.id)
+    assert sim.run(until=2.0)['departures'] == 1
+    assert env.get_vm(vm.id) is None
+
+# --- Host power states ---
+
+def test_booting_host_takes_boot_latency():
+    env, big = cluster(2, LinearPowerModel(off_watts=10.0, boot_watts=50.0, power_on_wh=2.0))
+    env.set_host_online(1, False)
+    sim = EventSimulator(env, boot_latency=120.0, idle_timeout=1e9, rng=0)
+    assert sim.host_state.tolist() == [ON, OFF]
+    sim.schedule_arrival(0.0, big, 10)
+    sim.schedule_arrival(1.0, big, 10)
+    summary = sim.run(until=100.0)
+    assert (summary['power_ons'], summary['waiting_vms'], summary['powered_hosts']) == (1, 1, 2)
+    loaded = env._total_power  # Host 0 only
+    assert summary['energy_wh'] == pytest.approx(2.0 + (loaded * 100 + 10 * 1 + 50 * 99) / 3600)
+    summary = sim.run(until=200.0)
+    assert (summary['waiting_vms'], summary['avg_wait']) == (0, 120.0)
+    assert env.host_online[1] and env.get_vm(1).assigned_host == 1
+
+
+def test_empty_host_powers_off_after_idle_timeout():
+    env, _ = cluster(1, LinearPowerModel(off_watts=10.0, power_off_wh=3.0))
+    sim = EventSimulator(env, idle_timeout=300.0, rng=0)
+    sim.schedule_arrival(100.0, 20, 20, lifetime=100.0)
+    summary = sim.run(until=450.0)  # The power-off due at 300 is stale: the host emptied again at 200
+    assert (summary['power_offs'], summary['powered_hosts']) == (0, 1)
+    summary = sim.run(until=1000.0)
+    assert (summary['power_offs'], summary['powered_hosts']) == (1, 0)
+    assert not env.host_online[0]
+    idle = LinearPowerModel().idle
+    loaded = LinearPowerModel().power(20 / env.host_total_cpu[0], 20 / env.host_total_mem[0])
+    expected = (idle * 400 + loaded * 100) / 3600 + 3.0 + 10.0 * 500 / 3600
+    assert summary['energy_wh'] == pytest.approx(expected)
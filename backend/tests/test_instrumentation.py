@@ -0,0 +1,103 @@
+import re
+import time
+
+from src.agent.instrumentation import PHASES, Instrumentation, render_prometheus
+from src.agent.q_learning import QLearningAgent
+
+NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+LABEL = r'[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\[\\"n])*"'
+SAMPLE = re.compile(rf"^({NAME})(?:\{{({LABEL}(?:,{LABEL})*)\}})? (\S+)$")
+
+# --- Helpers ---
+
+def parse_exposition(text):
+    """
+    Parse Prometheus text format (0.0.4) strictly: {family: {"type", "help", "samples"}}.
+    Fails on malformed lines, samples without a preceding TYPE, repeated or interleaved families.
+    """
+    assert not text or text.endswith("\n")
+    families = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name, _, help_text = line[7:].partition(" ")
+            assert name not in families, f"{name} declared twice"
+            families[name] = {"help": help_text, "type": None, "samples": []}
+            current = name
+        elif line.startswith("# TYPE "):
+            name, _, kind = line[7:].partition(" ")
+            assert name == current and families[name]["type"] is None
+            assert kind in ("counter", "gauge", "summary", "histogram", "untyped")
+            families[name]["type"] = kind
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"Malformed sample line: {line!r}"
+            name, labels, value = match.groups()
+            assert name == current and families[name]["type"], f"{name} has no TYPE before its samples"
+            pairs = re.findall(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"', labels or "")
+            families[name]["samples"].append((dict(pairs), float(value)))
+    return families
+
+# --- Exposition ---
+
+def test_render_escapes_labels_and_special_values():
+    summary = Instrumentation().summary()
+    summary["steps_per_second"] = float("inf")
+    summary["migrations_per_second"] = float("nan")
+    text = render_prometheus([({"job": 'a"b\\c\nd'}, summary)], {"jobs": ("Known jobs\nby state", [({"state": "done"}, 2)])})
+    families = parse_exposition(text)
+    assert families["vm_consolidation_jobs"]["help"] == "Known jobs\\nby state"
+    labels, value = families["vm_consolidation_steps_per_second"]["samples"][0]
+    assert labels == {"job": 'a\\"b\\\\c\\nd'} and value == float("inf")
+    assert "vm_consolidation_migrations_per_second" in text and " NaN\n" in text
+    assert parse_exposition(render_prometheus([])) == {}
+
+
+def test_metrics_endpoint_exposes_job_counters(api, wait_for_job):
+    client, _ = api
+    params = {"episodes": 4, "time_steps": 5, "seed": 2, "instrument": True}
+    job_id = client.post("/api/jobs", json={"type": "train", "params": params}).get_json()["job_id"]
+    assert wait_for_job(client, job_id)["state"] == "completed"
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain" and "version=0.0.4" in response.content_type
+    families = parse_exposition(response.get_data(as_text=True))
+
+    def job_samples(name):
+        return [(labels, value) for labels, value in families[f"vm_consolidation_{name}"]["samples"] if labels.get("job") == job_id]
+
+    for name in ("episodes_total", "steps_total", "migrations_total", "failed_migrations_total", "explore_total",
+                 "exploit_total", "phase_seconds_total"):
+        assert families[f"vm_consolidation_{name}"]["type"] == "counter", name
+    assert families["vm_consolidation_steps_per_second"]["type"] == "gauge"
+    assert job_samples("episodes_total") == [({"job": job_id}, 4.0)]
+    [(_, steps)] = job_samples("steps_total")
+    [(_, explore)] = job_samples("explore_total")
+    [(_, exploit)] = job_samples("exploit_total")
+    assert 0 < steps <= 4 * 5 and explore + exploit == steps
+    assert {labels["phase"] for labels, _ in job_samples("phase_seconds_total")} == set(PHASES)
+    assert all(seconds >= 0 for _, seconds in job_samples("phase_seconds_total"))
+    states = {labels["state"]: value for labels, value in families["vm_consolidation_jobs"]["samples"]}
+    assert states["completed"] >= 1
+
+# --- Overhead ---
+
+def test_training_without_instrumentation_reads_no_clock(monkeypatch):
+    calls = []
+    perf_counter = time.perf_counter
+
+    def counting():
+        calls.append(1)
+        return perf_counter()
+    monkeypatch.setattr(time, "perf_counter", counting)
+
+    agent = QLearningAgent(episodes=3, time_steps_per_episode=10, rng=0)
+    agent.train()
+    assert agent.stats.count == 3
+    assert not calls
+
+    agent.enable_instrumentation()
+    agent.episodes = 4
+    agent.train(start_episode=4)
+    assert calls  # The same counter sees the instrumented run
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from src.agent.linear_agent import FEATURE_NAMES, LinearQAgent, LinearQFunction, cluster_features
+from src.env.vector_env import VectorCloudEnvironment
+
+NUM_BINS = 5
+
+# --- Helpers ---
+
+def drifted_replicas(num_envs=6, steps=15):
+    """Replicas after workload drift (some hosts overcommitted) and idle ticks."""
+    venv = VectorCloudEnvironment(num_envs, num_hosts=10, num_vms=15, rng=3)
+    rng = np.random.default_rng(0)
+    for _ in range(steps):
+        venv.update_vm_workloads(rng)
+        bins = venv.get_host_bins(NUM_BINS)
+        src, vm, dst, valid = venv.select_migrations(np.full(num_envs, 1), np.full(num_envs, 0), NUM_BINS, bins)
+        venv.migrate(src, vm, dst, valid)
+        venv.tick_idle_counters()
+    return venv
+
+
+def replica_features(venv):
+    return cluster_features(venv.get_host_bins(NUM_BINS), venv.get_cpu_utilizations(), venv.get_mem_utilizations(),
+                            venv.host_vm_count, venv.host_idle_steps, NUM_BINS)
+
+# --- Features ---
+
+def test_features_are_bounded():
+    venv = drifted_replicas()
+    features = replica_features(venv)
+    assert features.shape == (venv.num_envs, NUM_BINS + len(FEATURE_NAMES))
+    assert venv.get_cpu_utilizations().max() > 1  # Overcommitted hosts are part of the check
+    assert venv.host_idle_steps.max() > 10
+    assert features.min() >= 0 and features.max() <= 1
+    np.testing.assert_allclose(features[:, :NUM_BINS].sum(axis=1), 1.0)
+    np.testing.assert_array_equal(features[:, -1], 1.0)
+
+    empty = cluster_features(np.zeros(4, dtype=np.int64), np.zeros(4), np.zeros(4), np.zeros(4, dtype=np.int64),
+                             np.full(4, 50), NUM_BINS)
+    assert empty.min() >= 0 and empty.max() <= 1
+    overcommitted = cluster_features(np.full(2, NUM_BINS - 1), np.array([1.6, 1.2]), np.array([1.1, 0.9]),
+                                     np.ones(2, dtype=np.int64), np.zeros(2), NUM_BINS)
+    assert overcommitted.max() <= 1
+    assert overcommitted[NUM_BINS + FEATURE_NAMES.index("avg_cpu")] == 1.0
+
+
+def test_agent_state_matches_vectorized_features():
+    agent = LinearQAgent(num_hosts=10, num_vms=15, rng=4)
+    agent.env.reset()
+    venv = VectorCloudEnvironment(2, rng=1, base_env=agent.env)
+    np.testing.assert_allclose(agent._vector_states(venv, venv.get_host_bins(NUM_BINS))[0], agent.get_state())
+
+# --- Updates ---
+
+def test_semi_gradient_step_moves_q_toward_target():
+    q = LinearQFunction(NUM_BINS, np.random.default_rng(1).normal(size=(20, NUM_BINS + len(FEATURE_NAMES))))
+    state = replica_features(drifted_replicas())[0]
+    action = q.actions[3]
+    old = q.get(state, action)
+    target = old + 40.0
+    q.set(state, action, old + 0.25 * (target - old))
+    assert q.get(state, action) == pytest.approx(old + 10.0)
+
+    other = q.actions[4]
+    before = q.get(state, other)
+    q.update(state[None], np.array([q.action_index[other]]), np.array([before - 8.0]), 0.5)
+    assert q.get(state, other) == pytest.approx(before - 4.0)
+
+
+def test_batched_update_equals_per_replica_updates():
+    agent = LinearQAgent(rng=0, gamma=0.9)
+    agent.alpha = 0.3
+    q = agent.q_table
+    q.weights = np.random.default_rng(2).normal(size=q.weights.shape)
+    initial = q.weights.copy()
+
+    venv = drifted_replicas()
+    states = replica_features(venv)
+    next_states = states[::-1].copy()
+    bin_from = np.array([1, 2, 1, 3, 1, 0])
+    bin_to = np.array([0, 1, 0, 4, 0, 2])  # Replicas 0, 2 and 4 share an action
+    rewards = np.array([5.0, -2.0, 1.0, 0.0, -7.0, 3.0])
+    agent._batch_q_update(states, bin_from, bin_to, rewards, next_states)
+
+    # Each replica's own update from the same starting weights; an action shared by several
+    # replicas takes the mean of their steps
+    deltas = {}
+    for k in range(len(states)):
+        single = LinearQFunction(NUM_BINS, initial.copy())
+        action = (int(bin_from[k]), int(bin_to[k]))
+        old = single.get(states[k], action)
+        target = rewards[k] + agent.gamma * single.max_value(next_states[k])
+        single.set(states[k], action, old + agent.alpha * (target - old))
+        deltas.setdefault(q.action_index[action], []).append(single.weights - initial)
+    expected = initial + sum(np.mean(steps, axis=0) for steps in deltas.values())
+    np.testing.assert_allclose(q.weights, expected, rtol=1e-12, atol=1e-12)
@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.env.placement import PlacementEngine
+
+# --- Brute-force reference ---
+
+def reference(free_cpu, free_mem, cpu, mem, strategy):
+    fitting = [h for h in range(len(free_cpu)) if free_cpu[h] >= cpu and free_mem[h] >= mem]
+    if not fitting:
+        return -1
+    if strategy == "first_fit":
+        return fitting[0]
+    scored = [(free_cpu[h] + free_mem[h], h) for h in fitting]
+    return (min(scored) if strategy == "best_fit" else max(scored))[1]
+
+
+def random_capacity(rng):
+    if rng.random() < 0.05:
+        return -math.inf, -math.inf  # Offline host
+    if rng.random() < 0.5:
+        return float(rng.integers(0, 60)), float(rng.integers(0, 120))
+    return float(rng.uniform(0, 60)), float(rng.uniform(0, 120))
+
+# --- Strategies against the reference ---
+
+@pytest.mark.parametrize("num_hosts", [1, 7, 64, 300])
+@pytest.mark.parametrize("seed", range(3))
+def test_strategies_match_brute_force(num_hosts, seed):
+    rng = np.random.default_rng(seed)
+    free_cpu = rng.integers(0, 60, num_hosts).astype(float).tolist()
+    free_mem = rng.integers(0, 120, num_hosts).astype(float).tolist()
+    engine = PlacementEngine(free_cpu, free_mem)
+    for _ in range(3000):
+        if rng.random() < 0.5:
+            host = int(rng.integers(num_hosts))
+            free_cpu[host], free_mem[host] = random_capacity(rng)
+            engine.update(host, free_cpu[host], free_mem[host])
+        else:
+            cpu, mem = float(rng.integers(0, 50)), float(rng.integers(0, 100))
+            strategy = PlacementEngine.STRATEGIES[rng.integers(3)]
+            assert engine.find_host(cpu, mem, strategy) == reference(free_cpu, free_mem, cpu, mem, strategy)
+
+
+def test_blocks_split_and_merge_under_skewed_updates():
+    # Pile every host into a narrow score range and back out again, so blocks overflow and empty
+    num_hosts = 400
+    rng = np.random.default_rng(0)
+    free_cpu = [50.0] * num_hosts
+    free_mem = [100.0] * num_hosts
+    engine = PlacementEngine(free_cpu, free_mem)
+    engine.find_host(1.0, 1.0, "best_fit")
+    for phase in range(2):
+        for host in rng.permutation(num_hosts).tolist():
+            free_cpu[host] = float(rng.integers(0, 3)) if phase == 0 else float(rng.integers(0, 60))
+            free_mem[host] = float(rng.integers(0, 3)) if phase == 0 else float(rng.integers(0, 120))
+            engine.update(host, free_cpu[host], free_mem[host])
+            cpu, mem = float(rng.integers(0, 40)), float(rng.integers(0, 80))
+            for strategy in ("best_fit", "worst_fit"):
+                assert engine.find_host(cpu, mem, strategy) == reference(free_cpu, free_mem, cpu, mem, strategy)
+    assert sum(len(block) for block in engine._blocks) == num_hosts
+
+
+def test_snapshot_restore_round_trip():
+    rng = np.random.default_rng(5)
+    free_cpu = rng.integers(0, 60, 100).astype(float).tolist()
+    free_mem = rng.integers(0, 120, 100).astype(float).tolist()
+    engine = PlacementEngine(free_cpu, free_mem)
+    engine.find_host(10.0, 10.0, "best_fit")
+    saved = engine.snapshot()
+    saved_cpu, saved_mem = free_cpu.copy(), free_mem.copy()
+    for _ in range(200):
+        host = int(rng.integers(100))
+        free_cpu[host], free_mem[host] = random_capacity(rng)
+        engine.update(host, free_cpu[host], free_mem[host])
+    for _ in range(2):
+        engine.restore(saved)
+        for strategy in PlacementEngine.STRATEGIES:
+            for cpu, mem in ((5.0, 5.0), (30.0, 60.0), (55.0, 110.0)):
+                assert engine.find_host(cpu, mem, strategy) == reference(saved_cpu, saved_mem, cpu, mem, strategy)
+        # Mutating after a restore must not leak into the snapshot
+        engine.update(0, 0.0, 0.0)
+
+
+def test_unknown_strategy_is_rejected():
+    engine = PlacementEngine([10.0], [10.0])
+    with pytest.raises(ValueError):
+        engine.find_host(1.0, 1.0, "random_fit")
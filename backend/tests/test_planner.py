@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from src.agent import planner
+from src.agent.planner import plan_consolidation
+from src.env.cloud_env import CloudEnvironment
+
+
+def spread_cluster(seed=0, hosts=60, vms=90):
+    env = CloudEnvironment(num_hosts=hosts, num_vms=vms, rng=seed)
+    env.reset("worst_fit")  # Spreads VMs, leaving underloaded hosts to drain
+    return env
+
+
+def assert_unchanged(env, snapshot, rng_state):
+    for name, arr in snapshot['arrays'].items():
+        assert np.array_equal(getattr(env, name), arr), name
+    assert [[vm.id for vm in host.vms] for host in env.hosts] == snapshot['layout']
+    assert env.rng.bit_generator.state == rng_state
+    assert not env._history
+
+
+def capture(env):
+    snapshot = env.snapshot()
+    snapshot['layout'] = [[vm.id for vm in host.vms] for host in env.hosts]
+    return snapshot, env.rng.bit_generator.state
+
+# --- Plans ---
+
+@pytest.mark.parametrize("seed", range(3))
+def test_plan_leaves_the_environment_untouched(seed):
+    env = spread_cluster(seed)
+    state = capture(env)
+    plan = plan_consolidation(env, drain_below=0.4)
+    assert plan["migrations"]
+    assert_unchanged(env, *state)
+    assert plan["before"] == env.get_metrics()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_applied_plan_drains_hosts_within_thresholds(seed):
+    env = spread_cluster(seed)
+    plan = plan_consolidation(env, drain_below=0.4, apply=True)
+    assert env.get_metrics() == pytest.approx(plan["after"])
+    assert plan["after"]["active_hosts"] == plan["before"]["active_hosts"] - len(plan["drained_hosts"])
+    assert all(env.host_vm_count[host] == 0 for host in plan["drained_hosts"])
+    destinations = sorted({m["dst"] for m in plan["migrations"]})
+    assert (env.get_cpu_utilizations()[destinations] <= env.overload_threshold + 1e-9).all()
+    assert not env._history
+
+# --- Limits ---
+
+def test_max_migrations_stops_after_the_last_full_host():
+    env = spread_cluster()
+    full = plan_consolidation(env, drain_below=0.4)
+    limit = len(full["migrations"]) // 2
+    plan = plan_consolidation(env, drain_below=0.4, max_migrations=limit)
+    assert plan["stopped_by"] == "max_migrations"
+    assert 0 < len(plan["migrations"]) <= limit
+    assert plan["migrations"] == full["migrations"][:len(plan["migrations"])]
+    assert {m["src"] for m in plan["migrations"]} == set(plan["drained_hosts"])
+
+
+def test_max_migrated_mem_caps_moved_memory():
+    env = spread_cluster()
+    full = plan_consolidation(env, drain_below=0.4)
+    cap = full["migrated_mem"] / 3
+    plan = plan_consolidation(env, drain_below=0.4, max_migrated_mem=cap)
+    assert plan["stopped_by"] == "max_migrated_mem"
+    assert plan["migrated_mem"] == pytest.approx(sum(m["mem"] for m in plan["migrations"]))
+    assert 0 < plan["migrated_mem"] <= cap
+
+
+def test_time_budget_cutoff_leaves_env_untouched():
+    env = spread_cluster()
+    state = capture(env)
+    plan = plan_consolidation(env, drain_below=0.4, time_budget=0.0, apply=True)
+    assert plan["stopped_by"] == "time_budget"
+    assert plan["migrations"] == [] and plan["after"] == plan["before"]
+    assert_unchanged(env, *state)
+
+
+def test_failure_mid_plan_leaves_env_untouched(monkeypatch):
+    env = spread_cluster()
+    state = capture(env)
+    calls = []
+    pick = planner._pick_destination
+
+    def failing(*args):
+        calls.append(1)
+        if len(calls) == 5:
+            raise RuntimeError("boom")
+        return pick(*args)
+    monkeypatch.setattr(planner, "_pick_destination", failing)
+    with pytest.raises(RuntimeError):
+        plan_consolidation(env, drain_below=0.4, apply=True)
+    assert_unchanged(env, *state)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from src.env.cloud_env import CloudEnvironment
+from src.env.power import SPECPOWER_TABLES, LinearPowerModel, SpecPowerModel, make_power_model, stack_power_models
+from src.env.vector_env import VectorCloudEnvironment
+
+# --- Models ---
+
+def test_linear_model_weights_cpu_and_memory():
+    model = LinearPowerModel()
+    assert model.power(0.0, 0.0) == 150.0
+    assert model.power(1.0, 1.0) == 250.0
+    assert model.power(0.5, 0.0) == pytest.approx(185.0)
+    hetero = LinearPowerModel(idle=np.array([100.0, 200.0]), peak=np.array([200.0, 400.0]))
+    np.testing.assert_allclose(hetero.power(np.array([0.5, 0.5]), np.array([0.5, 0.5])), [150.0, 300.0])
+    np.testing.assert_allclose(hetero.power(np.array([1.0]), np.array([1.0]), np.array([1])), [400.0])
+    np.testing.assert_allclose(hetero.idle_power([1, 0]), [200.0, 100.0])
+
+
+def test_specpower_interpolates_between_load_points():
+    table = SPECPOWER_TABLES["ibm_x3550_m3_x5675"]
+    model = SpecPowerModel(["ibm_x3550_m3_x5675"])
+    assert model.power(0.0, 0.0) == table[0]
+    assert model.power(0.25, 0.0) == pytest.approx((table[2] + table[3]) / 2)
+    assert model.power(1.0, 0.0) == table[-1]
+    assert model.power(1.7, 0.0) == table[-1]  # Overcommit draws full power
+    assert model.power(0.5, 1.0) == model.power(0.5, 0.0)  # Memory does not count
+
+
+def test_specpower_types_follow_capacity():
+    model = SpecPowerModel.by_capacity([120, 80, 100, 90], ["hp_proliant_ml110_g4", "ibm_x3550_m3_x5670"], boot_watts=60.0)
+    assert [model.type_names[t] for t in model.host_types] == [
+        "ibm_x3550_m3_x5670", "hp_proliant_ml110_g4", "ibm_x3550_m3_x5670", "hp_proliant_ml110_g4"]
+    np.testing.assert_allclose(model.booting_power([0, 1]), [60.0, 60.0])
+
+
+def test_stacked_models_index_hosts_per_cluster():
+    models = [make_power_model("specpower", np.array(cpu, dtype=float)) for cpu in ([80, 120, 100, 90], [120, 80, 90, 100])]
+    stacked = stack_power_models(models, 4)
+    util = np.random.default_rng(0).random((2, 4))
+    expected = np.stack([m.power(u, u) for m, u in zip(models, util)])
+    np.testing.assert_allclose(stacked.power(util, util, np.arange(8).reshape(2, 4)), expected)
+    linear = stack_power_models([LinearPowerModel(idle=np.array([1.0, 2.0])), LinearPowerModel()], 2)
+    np.testing.assert_allclose(linear.idle_power(np.arange(4)), [1.0, 2.0, 150.0, 150.0])
+    with pytest.raises(ValueError):
+        stack_power_models([LinearPowerModel(), models[0]], 4)
+
+# --- Energy ---
+
+def test_energy_integrates_the_draw_of_every_step():
+    env = CloudEnvironment(num_hosts=6, num_vms=10, rng=0, power_model="specpower", step_seconds=60.0)
+    expected = 0.0
+    for _ in range(5):
+        expected += env.get_total_power() * 60.0 / 3600.0
+        env.tick_idle_counters()
+        env.update_vm_workloads()
+    assert env.energy_wh == pytest.approx(expected)
+    assert env.get_metrics()['energy_wh'] == env.energy_wh
+    env.reset(use_cache=False)
+    assert env.energy_wh == 0.0
+
+
+@pytest.mark.parametrize("power_model", ["linear", "specpower"])
+def test_vectorized_energy_matches_scalar_replicas(power_model):
+    num_envs = 4
+    venv = VectorCloudEnvironment(num_envs, num_hosts=10, num_vms=15, rng=3, power_model=power_model)
+    envs = [CloudEnvironment(num_hosts=10, num_vms=15, rng=child, power_model=power_model)
+            for child in np.random.default_rng(3).spawn(num_envs)]
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        bin_from = rng.integers(5, size=num_envs)
+        bin_to = (bin_from + rng.integers(1, 5, size=num_envs)) % 5  # Actions never stay in one bin
+        src, vm, dst, valid = venv.select_migrations(bin_from, bin_to, 5)
+        _, predicted = venv.evaluate(src, vm, dst, valid)
+        moved = venv.migrate(src, vm, dst, valid)
+        for i, env in enumerate(envs):
+            if moved[i]:
+                assert env.migrate_vm(env.get_vm(int(vm[i])), env.hosts[int(dst[i])])
+        metrics = venv.get_metrics()
+        np.testing.assert_allclose(predicted['total_power_consumption'], metrics['total_power_consumption'])
+        np.testing.assert_allclose(metrics['total_power_consumption'], [env.get_total_power() for env in envs])
+        venv.tick_idle_counters()
+        for env in envs:
+            env.tick_idle_counters()
+    np.testing.assert_allclose(venv.get_metrics()['energy_wh'], [env.energy_wh for env in envs])
@@ -0,0 +1,89 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from src.agent.q_table import QTable, convert_json_q_table
+from src.agent.q_learning import QLearningAgent
+
+LEGACY_TABLE = os.path.join(os.path.dirname(__file__), "..", "q_table_consolidated.json")
+
+
+def random_table(seed, num_bins=5, states=300, dtype=np.float64):
+    rng = np.random.default_rng(seed)
+    table = QTable(num_bins, capacity=4, dtype=dtype)
+    for _ in range(states * 3):
+        state = tuple(rng.integers(0, 6, num_bins).tolist())
+        action = table.actions[rng.integers(len(table.actions))]
+        table.set(state, action, float(rng.normal(0, 100)))
+    table.set((9,) * num_bins, table.actions[0], 0.0)  # A learned 0.0 is not "missing"
+    return table
+
+
+def assert_tables_equal(a, b):
+    assert a.num_bins == b.num_bins
+    assert len(a) == len(b)
+    assert dict(a.items()) == dict(b.items())
+    for state, _ in a.items():
+        assert a.best_action(state) == b.best_action(state)
+        assert a.max_value(state) == b.max_value(state)
+
+# --- Binary round trip ---
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_npz_round_trip(tmp_path, dtype):
+    table = random_table(0, dtype=dtype)
+    path = tmp_path / "table.npz"
+    table.save(path)
+    loaded = QTable.load(path)
+    assert loaded.values.dtype == np.dtype(dtype)
+    assert_tables_equal(table, loaded)
+    # Row order is preserved, so row indices stay meaningful (e.g. for replay buffers)
+    for state in list(table._rows)[:20]:
+        assert loaded.row(state) == table.row(state)
+
+
+def test_visited_mask_survives_round_trip(tmp_path):
+    table = QTable(3)
+    table.set((1, 1, 1), (0, 1), 0.0)
+    table.save(tmp_path / "t.npz")
+    loaded = QTable.load(tmp_path / "t.npz")
+    assert loaded.best_action((1, 1, 1)) == (0, 1)
+    assert loaded.max_value((1, 1, 1)) == 0.0
+    assert loaded.best_action((2, 2, 2)) is None
+    assert loaded.get((1, 1, 1), (1, 0)) == 0.0
+
+
+def test_empty_table_round_trip(tmp_path):
+    QTable(4).save(tmp_path / "empty.npz")
+    loaded = QTable.load(tmp_path / "empty.npz")
+    assert len(loaded) == 0
+    assert loaded.num_bins == 4
+    loaded.set((1, 0, 0, 0), (0, 1), 1.0)
+    assert len(loaded) == 1
+
+# --- Legacy JSON ---
+
+def test_convert_legacy_json_matches_source(tmp_path):
+    with open(LEGACY_TABLE) as f:
+        legacy = json.load(f)
+    table = convert_json_q_table(LEGACY_TABLE, tmp_path / "converted.npz")
+    assert table.to_dict() == legacy
+    assert_tables_equal(table, QTable.load(tmp_path / "converted.npz"))
+
+
+def test_json_and_npz_agree_on_greedy_actions(tmp_path):
+    table = random_table(1)
+    with open(tmp_path / "t.json", "w") as f:
+        json.dump(table.to_dict(), f)
+    assert_tables_equal(table, QTable.from_json(tmp_path / "t.json"))
+
+
+def test_agent_falls_back_to_legacy_json(tmp_path):
+    table = random_table(2)
+    with open(tmp_path / "q.json", "w") as f:
+        json.dump(table.to_dict(), f)
+    agent = QLearningAgent(num_hosts=4, num_vms=4, rng=0)
+    agent.load_q_table(str(tmp_path / "q.npz"))
+    assert_tables_equal(table, agent.q_table)
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from src.agent.q_learning import QLearningAgent
+from src.agent.q_table import QTable
+from src.agent.replay import ReplayBuffer
+
+# --- Helpers ---
+
+def stored(buffer):
+    """Transitions oldest first, as (state, action, reward, next_state) rows."""
+    order = (buffer._next - len(buffer) + np.arange(len(buffer))) % buffer.capacity
+    return list(zip(buffer.states[order].tolist(), buffer.actions[order].tolist(),
+                    buffer.rewards[order].tolist(), buffer.next_states[order].tolist()))
+
+
+def as_tuples(buffer, q_table):
+    """Transitions with their rows replaced by the state tuples they stand for."""
+    return [(tuple(q_table.states[s].tolist()), a, r, tuple(q_table.states[n].tolist())) for s, a, r, n in stored(buffer)]
+
+# --- Ring Buffer ---
+
+def test_ring_buffer_overwrites_the_oldest():
+    buffer = ReplayBuffer(capacity=4, rng=0)
+    for i in range(6):
+        buffer.add(i, i % 3, float(i), i + 1)
+    assert len(buffer) == 4 and buffer._next == 2
+    assert stored(buffer) == [(i, i % 3, float(i), i + 1) for i in range(2, 6)]
+
+    buffer.add_batch(np.array([6, 7, 8]), np.array([0, 1, 2]), np.array([6.0, 7.0, 8.0]), np.array([7, 8, 9]))
+    assert [t[0] for t in stored(buffer)] == [5, 6, 7, 8]
+
+    # A batch larger than the buffer keeps its newest transitions
+    buffer.add_batch(np.arange(10, 20), np.zeros(10, dtype=np.int64), np.zeros(10), np.arange(11, 21))
+    assert len(buffer) == 4
+    assert [t[0] for t in stored(buffer)] == [16, 17, 18, 19]
+    slots = buffer.sample(50)[0]
+    assert slots.min() >= 0 and slots.max() < 4
+
+# --- Persistence ---
+
+def test_save_load_round_trip_maps_state_tuples(tmp_path):
+    agent = QLearningAgent(episodes=3, time_steps_per_episode=8, rng=5)
+    agent.enable_replay(capacity=16, batch_size=4, prioritized=True)
+    agent.train()
+    assert len(agent.replay) == 16 and agent.replay._next != 0  # Wrapped around
+    agent.replay.update_priorities(np.arange(4), np.array([3.0, -1.0, 0.5, 2.0]))
+    path = str(tmp_path / "buffer.npz")
+    agent.replay.save(path, agent.q_table)
+
+    # A table that already holds other states in other rows
+    table = QTable(agent.num_bins)
+    for state in [(9, 0, 0, 0, 0), (0, 9, 0, 0, 0)]:
+        table.row(state, create=True)
+    loaded = ReplayBuffer.load(path, table, prioritized=True)
+    assert as_tuples(loaded, table) == as_tuples(agent.replay, agent.q_table)
+    order = (agent.replay._next + np.arange(16)) % 16
+    np.testing.assert_array_equal(loaded.priorities[:16], agent.replay.priorities[order])
+    assert loaded._max_priority == max(1.0, agent.replay.priorities.max())
+
+    smaller = ReplayBuffer.load(path, QTable(agent.num_bins), capacity=5)
+    assert len(smaller) == 5 and stored(smaller)[-1][1:3] == stored(agent.replay)[-1][1:3]
+    with pytest.raises(ValueError, match="num_bins"):
+        ReplayBuffer.load(path, QTable(agent.num_bins + 1))
+
+# --- Prioritized Sampling ---
+
+def test_prioritized_sampling_and_weights():
+    buffer = ReplayBuffer(capacity=8, prioritized=True, alpha=0.5, beta=0.4, rng=1)
+    for i in range(4):
+        buffer.add(i, 0, 0.0, i)
+    np.testing.assert_array_equal(buffer.priorities[:4], 1.0)  # New transitions get the current maximum
+    buffer.priorities[:4] = [1.0, 4.0, 9.0, 16.0]
+
+    slots, states, _, _, _, weights = buffer.sample(40000)
+    probs = np.array([1.0, 2.0, 3.0, 4.0]) / 10.0  # priority ** alpha, normalized
+    np.testing.assert_allclose(np.bincount(slots, minlength=4) / len(slots), probs, atol=0.01)
+    np.testing.assert_array_equal(states, slots)
+    expected = (4 * probs[slots]) ** -0.4
+    np.testing.assert_allclose(weights, expected / expected.max())
+    assert weights.max() == 1.0 and weights[slots == 0].min() == 1.0  # The rarest transition weighs most
+
+    buffer.update_priorities(np.array([0, 2]), np.array([-24.0, 0.0]))
+    assert buffer.priorities[0] == pytest.approx(24.0 + buffer.eps)
+    assert buffer.priorities[2] == pytest.approx(buffer.eps)
+    buffer.add(4, 0, 0.0, 4)
+    assert buffer.priorities[4] == pytest.approx(24.0 + buffer.eps)
+
+    uniform = ReplayBuffer(capacity=8, rng=1)
+    uniform.add(0, 0, 0.0, 0)
+    assert uniform.sample(3)[-1] is None
+    uniform.update_priorities(np.array([0]), np.array([5.0]))
+    assert uniform.priorities[0] == 1.0
+
+# --- Offline Training ---
+
+def test_train_offline_learns_without_touching_the_env(tmp_path):
+    recorder = QLearningAgent(episodes=4, time_steps_per_episode=10, rng=3)
+    recorder.enable_replay(capacity=200)
+    recorder.train()
+    path = str(tmp_path / "buffer.npz")
+    recorder.replay.save(path, recorder.q_table)
+
+    agent = QLearningAgent(episodes=4, time_steps_per_episode=10, rng=8)
+    with pytest.raises(ValueError, match="replay buffer"):
+        agent.train_offline(1)
+    agent.enable_replay(batch_size=8)
+    agent.replay = ReplayBuffer.load(path, agent.q_table, rng=agent.replay.rng)
+    env_before = agent.env.snapshot()
+    env_rng = agent.env.rng.bit_generator.state
+    values_before = agent.q_table.values.copy()
+
+    agent.train_offline(100)
+    assert (agent.q_table.values != values_before).any()
+    assert agent.q_table.visited.any()
+    for name, array in env_before['arrays'].items():
+        np.testing.assert_array_equal(getattr(agent.env, name), array, err_msg=name)
+    assert agent.env.rng.bit_generator.state == env_rng
+    assert agent.env.energy_wh == env_before['scalars']['energy_wh']
+    assert agent.stats.count == 0
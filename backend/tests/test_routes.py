@@ -0,0 +1,192 @@
+import json
+import time
+import multiprocessing
+
+from src.agent.q_learning import QLearningAgent
+from src.api.jobs import EventLog, EVENT_CAPACITY
+
+TINY_TRAINING = {"episodes": 3, "time_steps": 5, "seed": 1}
+
+# --- Background jobs ---
+
+def test_training_job_completes_and_is_served(api, wait_for_job):
+    client, routes = api
+    response = client.post("/api/jobs", json={"type": "train", "params": TINY_TRAINING})
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+
+    status = wait_for_job(client, job_id)
+    assert status["state"] == "completed"
+    assert job_id in [job["job_id"] for job in client.get("/api/jobs").get_json()["jobs"]]
+
+    result = client.get(f"/api/jobs/{job_id}/result")
+    assert result.status_code == 200
+    body = result.get_json()
+    assert body["episodes_completed"] == 3
+    assert len(body["episode_rewards"]) == 3
+
+    # The finished job replaces the served agent (listeners run right after completion)
+    deadline = time.monotonic() + 10
+    while routes.agent.stats.count != 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    curve = client.get("/api/learning-curve").get_json()
+    assert curve["total_episodes"] == 3
+    assert curve["episode_rewards"] == body["episode_rewards"]
+
+
+def wait_for_adoption(routes, previous, timeout=10):
+    """Wait until a finished training job has replaced the served agent `previous`."""
+    deadline = time.monotonic() + timeout
+    while routes.agent is previous:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    return routes.agent
+
+
+def expected_health(seed):
+    env = QLearningAgent(rng=seed).env
+    return [[round(cpu * 100), round(ram * 100), round(power, 1)] for cpu, ram, power in zip(
+        env.get_cpu_utilizations(), env.get_mem_utilizations(), env.get_host_powers())]
+
+
+def test_served_cluster_follows_the_trained_agent(api, wait_for_job):
+    client, routes = api
+    previous = routes.agent
+    job_id = client.post("/api/jobs", json={"type": "train", "params": {"episodes": 2, "time_steps": 3}}).get_json()["job_id"]
+    wait_for_job(client, job_id)
+    seed = client.get(f"/api/jobs/{job_id}/result").get_json()["seed"]  # Resolved by the job when not given
+    served = wait_for_adoption(routes, previous)
+    assert routes.agent_seed == seed
+    health = [[s["cpu"], s["ram"], s["power"]] for s in client.get("/api/server-health").get_json()["servers"]]
+    assert health == expected_health(seed)
+
+    # /run-single keeps training the served agent: same cluster, its Q-table as the starting point
+    states = set(served.q_table.to_dict())
+    job_id = client.post("/api/run-single").get_json()["job_id"]
+    params = client.get(f"/api/jobs/{job_id}").get_json()["params"]
+    assert (params["seed"], params["episodes"], params["time_steps"]) == (seed, 2, 3)
+    assert wait_for_job(client, job_id)["state"] == "completed"
+    continued = wait_for_adoption(routes, served)
+    assert states <= set(continued.q_table.to_dict())
+    assert [[s["cpu"], s["ram"], s["power"]] for s in client.get("/api/server-health").get_json()["servers"]] == health
+
+
+def test_batch_job_returns_every_run(api, wait_for_job):
+    client, _ = api
+    response = client.post("/api/batch", json={"runs": 2, "episodes": 2, "time_steps": 3, "seed": 0})
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    assert wait_for_job(client, job_id)["state"] == "completed"
+    body = client.get(f"/api/jobs/{job_id}/result").get_json()
+    assert len(body["results"]) == 2
+    assert body["seed"] == 0
+
+
+def test_running_job_can_be_cancelled(api, wait_for_job):
+    client, _ = api
+    job_id = client.post("/api/jobs", json={"type": "train", "params": {"episodes": 100000, "time_steps": 5}}).get_json()["job_id"]
+    deadline = time.monotonic() + 30
+    while client.get(f"/api/jobs/{job_id}").get_json()["progress"].get("episode", 0) < 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert client.delete(f"/api/jobs/{job_id}").status_code == 202
+    status = wait_for_job(client, job_id)
+    assert status["state"] == "cancelled"
+    assert client.delete(f"/api/jobs/{job_id}").status_code == 404
+
+
+def test_unknown_jobs_and_types(api):
+    client, _ = api
+    assert client.post("/api/jobs", json={"type": "bogus"}).status_code == 400
+    for url in ("/api/jobs/nope", "/api/jobs/nope/result", "/api/jobs/nope/stream"):
+        assert client.get(url).status_code == 404
+    assert client.delete("/api/jobs/nope").status_code == 404
+
+# --- Event streams ---
+
+def parse_sse(text):
+    """[(id or None, event name, data)] of a server-sent event stream."""
+    frames = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            frames.append((int(fields["id"]) if "id" in fields else None, fields["event"], json.loads(fields["data"])))
+    return frames
+
+
+def test_event_log_drops_oldest_and_keeps_cursors_valid():
+    manager = multiprocessing.Manager()
+    try:
+        log = EventLog(manager, capacity=5)
+        for start in range(0, 12, 3):
+            log.extend([{"episode": i} for i in range(start, start + 3)])
+        first, events = log.read(0)
+        assert first == 7
+        assert [e["episode"] for e in events] == [7, 8, 9, 10, 11]
+        assert log.read(9) == (9, [{"episode": 9}, {"episode": 10}, {"episode": 11}])
+        assert log.read(12) == (12, [])
+    finally:
+        manager.shutdown()
+
+
+def test_stream_replays_episodes_then_done(api):
+    client, _ = api
+    job_id = client.post("/api/jobs", json={"type": "train", "params": {"episodes": 30, "time_steps": 3}}).get_json()["job_id"]
+    frames = parse_sse(client.get(f"/api/jobs/{job_id}/stream?poll=0.05").get_data(as_text=True))
+    episodes = [f for f in frames if f[1] == "episode"]
+    assert [f[0] for f in episodes] == list(range(30))
+    assert [f[2]["episode"] for f in episodes] == list(range(1, 31))
+    assert frames[-1][1] == "done" and frames[-1][2]["state"] == "completed"
+
+    sampled = parse_sse(client.get(f"/api/jobs/{job_id}/stream?every=10&poll=0.05").get_data(as_text=True))
+    assert [f[2]["episode"] for f in sampled if f[1] == "episode"] == [10, 20, 30]
+
+    resumed = parse_sse(client.get(f"/api/jobs/{job_id}/stream?poll=0.05", headers={"Last-Event-ID": "25"}).get_data(as_text=True))
+    assert [f[0] for f in resumed if f[1] == "episode"] == [26, 27, 28, 29]
+
+
+def test_stream_starts_at_oldest_kept_event(api, wait_for_job):
+    client, routes = api
+    routes.jobs.event_capacity = 10
+    try:
+        job_id = client.post("/api/jobs", json={"type": "train", "params": {"episodes": 30, "time_steps": 3}}).get_json()["job_id"]
+    finally:
+        routes.jobs.event_capacity = EVENT_CAPACITY
+    wait_for_job(client, job_id)
+    frames = parse_sse(client.get(f"/api/jobs/{job_id}/stream?poll=0.05").get_data(as_text=True))
+    episodes = [f for f in frames if f[1] == "episode"]
+    assert [f[0] for f in episodes] == list(range(20, 30))
+    assert [f[2]["episode"] for f in episodes] == list(range(21, 31))
+
+# --- Policy ---
+
+# Host bins (5 bins): h0 -> 0, h1 and h3 -> 2, h2 -> 4, i.e. state (1, 0, 2, 0, 1)
+SNAPSHOT = {"hosts": [{"id": f"h{i}", "total_cpu": 100, "cpu_util": util} for i, util in enumerate((0.1, 0.5, 0.9, 0.5))]}
+STATE = (1, 0, 2, 0, 1)
+
+
+def test_policy_reload_serves_the_updated_table(api, monkeypatch):
+    client, routes = api
+    fresh = QLearningAgent(num_hosts=0, num_vms=0)
+    monkeypatch.setattr(routes, "agent", fresh)
+    monkeypatch.setattr(routes, "policy", routes.policy)  # Restored after the test
+    fresh.q_table.set(STATE, (0, 2), 1.0)
+    assert client.post("/api/policy/reload").get_json()["states"] == 1
+    assert client.post("/api/policy/recommend", json=SNAPSHOT).get_json()["migrations"][0]["src"] == "h0"
+
+    fresh.q_table.set(STATE, (4, 2), 5.0)
+    assert client.post("/api/policy/recommend", json=SNAPSHOT).get_json()["migrations"][0]["src"] == "h0"
+    client.post("/api/policy/reload")
+    migration = client.post("/api/policy/recommend", json=SNAPSHOT).get_json()["migrations"][0]
+    assert (migration["src"], migration["action"]) == ("h2", [4, 2])
+
+
+def test_policy_recommend_rejects_malformed_snapshots(api):
+    client, _ = api
+    for body in ({"snapshots": "h0"}, {"snapshots": [SNAPSHOT, 3]}, {"snapshots": {"hosts": []}},
+                 {"hosts": []}, {"hosts": SNAPSHOT["hosts"], "max_migrations": "2"}):
+        response = client.post("/api/policy/recommend", json=body)
+        assert response.status_code == 400, body
+        assert response.get_json()["error"].startswith("Invalid snapshot")
+    results = client.post("/api/policy/recommend", json={"snapshots": [SNAPSHOT, {"hosts": []}]}).get_json()["results"]
+    assert "state" in results[0] and "error" in results[1]
@@ -0,0 +1,68 @@
+import multiprocessing
+
+import numpy as np
+
+from src.agent.q_table import QTable
+from src.agent.shared_q_table import SharedQTable, EMPTY
+
+NUM_WORKERS = 4
+COMMON = [(i % 7, i // 7 % 7, i // 49, 1, 2) for i in range(300)]
+
+
+def own_states(worker):
+    return [(worker, 9, i % 11, i // 11, 3) for i in range(200)]
+
+
+def insert_states(path, lock, worker):
+    table = SharedQTable(path, mode="r+", lock=lock)
+    for state in COMMON + own_states(worker):
+        table.set(state, (1, 0), float(sum(state)))
+    for state in own_states(worker):
+        table.set(state, (0, 1), float(worker))
+    table.flush()
+
+# --- Concurrent inserts ---
+
+def test_concurrent_inserts_claim_each_state_once(tmp_path):
+    path = str(tmp_path / "shared")
+    lock = multiprocessing.Lock()
+    SharedQTable.create(path, num_bins=5, capacity=4096, lock=lock)
+    workers = [multiprocessing.Process(target=insert_states, args=(path, lock, w)) for w in range(NUM_WORKERS)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+
+    table = SharedQTable(path, mode="r")
+    expected = COMMON + [s for w in range(NUM_WORKERS) for s in own_states(w)]
+    assert len(table) == len(expected)
+    claimed = table.keys[table.keys[:, 0] != EMPTY]
+    assert len(claimed) == len(expected)
+    assert len({tuple(key) for key in claimed.tolist()}) == len(expected)  # No state claimed twice
+    for state in expected:
+        assert table.get(state, (1, 0)) == float(sum(state))
+    for w in range(NUM_WORKERS):
+        for state in own_states(w):
+            assert table.get(state, (0, 1)) == float(w)
+
+
+def test_read_only_view_sees_writer_updates(tmp_path):
+    path = str(tmp_path / "shared")
+    writer = SharedQTable.create(path, num_bins=3, capacity=64)
+    reader = SharedQTable(path, mode="r")
+    assert reader.best_action((1, 1, 1)) is None
+    writer.set((1, 1, 1), (2, 0), 5.0)
+    writer.set((1, 1, 1), (0, 2), 7.0)
+    assert reader.best_action((1, 1, 1)) == (0, 2)
+    assert len(reader) == 1
+
+
+def test_seed_from_and_export_to_q_table(tmp_path):
+    rng = np.random.default_rng(0)
+    table = QTable(4)
+    for _ in range(200):
+        table.set(tuple(rng.integers(0, 5, 4).tolist()), table.actions[rng.integers(12)], float(rng.normal()))
+    shared = SharedQTable.create(str(tmp_path / "shared"), num_bins=4, capacity=512, initial=table)
+    assert dict(shared.items()) == dict(table.items())
+    assert dict(shared.to_q_table().items()) == dict(table.items())
@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+from sweep import SweepStore, make_trials, parse_space, rung_budgets, run_sweep
+
+# --- Helpers ---
+
+def small_trials(num_trials=4):
+    trials = make_trials(parse_space(["alpha=uniform:0.05:0.5"]), num_samples=num_trials, seed=3)
+    return [{**t, "episodes": 9, "time_steps": 5} for t in trials]
+
+
+def read_records(store_dir):
+    with open(os.path.join(store_dir, "results.jsonl")) as f:
+        return [json.loads(line) for line in f]
+
+
+def checkpoint_times(store_dir):
+    folder = os.path.join(store_dir, "checkpoints")
+    return {name: os.stat(os.path.join(folder, name)).st_mtime_ns for name in os.listdir(folder)}
+
+# --- Budgets and Selection ---
+
+def test_rung_budgets():
+    assert rung_budgets(90, 3, 3) == [10, 30, 90]
+    assert rung_budgets(100, 3, 3) == [12, 34, 100]
+    assert rung_budgets(5, 3, 3) == [1, 2, 5]
+    assert rung_budgets(2000, 1, 3) == [2000]
+
+
+def test_halving_keeps_the_top_trials(tmp_path):
+    trials = small_trials(6)
+    df = run_sweep(str(tmp_path), trials, rungs=3, eta=2, window=3, max_workers=2)
+
+    by_rung = {}
+    for record in read_records(tmp_path):
+        by_rung.setdefault(record["rung"], []).append(record)
+        assert record["episodes"] == rung_budgets(9, 3, 2)[record["rung"]]
+    assert [len(by_rung[r]) for r in range(3)] == [6, 3, 1]
+    for rung in (0, 1):
+        ranked = sorted(by_rung[rung], key=lambda r: r["score"], reverse=True)
+        survivors = {r["trial"] for r in ranked[:len(ranked) // 2]}
+        assert {r["trial"] for r in by_rung[rung + 1]} == survivors
+
+    assert len(df) == 6
+    assert df.loc[0, "trial"] == by_rung[2][0]["trial"]
+    assert list(df["rung"]) == sorted(df["rung"], reverse=True)
+
+# --- Resume ---
+
+def test_resume_skips_finished_pairs(tmp_path):
+    store_dir = str(tmp_path)
+    trials = small_trials()
+    first = run_sweep(store_dir, trials, rungs=2, eta=2, window=3, max_workers=2)
+    records = read_records(store_dir)
+    times = checkpoint_times(store_dir)
+
+    # Everything finished: nothing is trained again
+    again = run_sweep(store_dir, trials, rungs=2, eta=2, window=3, max_workers=2)
+    assert read_records(store_dir) == records
+    assert checkpoint_times(store_dir) == times
+    assert again.equals(first)
+
+    # Interrupted after a checkpoint but before its result: only that pair runs again
+    lost = records[-1]
+    with open(os.path.join(store_dir, "results.jsonl"), "w") as f:
+        f.writelines(json.dumps(r) + "\n" for r in records[:-1])
+    resumed = run_sweep(store_dir, trials, rungs=2, eta=2, window=3, max_workers=2)
+    assert read_records(store_dir) == records[:-1] + [lost]
+    changed = {name for name, t in checkpoint_times(store_dir).items() if times[name] != t}
+    assert changed == {f"{lost['trial']}.pkl"}
+    assert resumed.equals(first)
+
+
+def test_different_sweep_in_the_same_store_raises(tmp_path):
+    trials = small_trials()
+    SweepStore(str(tmp_path), {"trials": trials, "rungs": 2, "eta": 2, "window": 3}).close()
+    SweepStore(str(tmp_path), {"trials": trials, "rungs": 2, "eta": 2, "window": 3}).close()
+    with pytest.raises(ValueError, match="different sweep"):
+        SweepStore(str(tmp_path), {"trials": trials, "rungs": 3, "eta": 2, "window": 3})
+
+
+def test_torn_line_is_skipped(tmp_path):
+    spec = {"trials": [], "rungs": 1, "eta": 3, "window": 3}
+    store = SweepStore(str(tmp_path), spec)
+    store.record({"trial": "t0000", "rung": 0, "score": 1.5})
+    store.close()
+    with open(os.path.join(tmp_path, "results.jsonl"), "a") as f:
+        f.write('{"trial": "t0001", "rung": 0, "sc')
+
+    store = SweepStore(str(tmp_path), spec)
+    assert set(store.results) == {("t0000", 0)}
+    store.record({"trial": "t0002", "rung": 0, "score": 2.5})
+    store.close()
+    store = SweepStore(str(tmp_path), spec)
+    assert set(store.results) == {("t0000", 0), ("t0002", 0)}
+    store.close()
@@ -0,0 +1,153 @@
+import asyncio
+import json
+
+import numpy as np
+
+from src.api.telemetry import HOST_FIELDS, FrameEncoder, TelemetryServer
+
+# --- Helpers ---
+
+class StubEnv:
+    """Just the reads FrameEncoder makes, backed by arrays a test sets directly."""
+
+    def __init__(self, num_hosts=4):
+        self.cpu = np.linspace(0.1, 0.4, num_hosts)
+        self.mem = np.linspace(0.2, 0.5, num_hosts)
+        self.power = np.full(num_hosts, 180.0)
+        self.host_vm_count = np.ones(num_hosts, dtype=np.int64)
+        self.host_online = np.ones(num_hosts, dtype=bool)
+
+    def get_cpu_utilizations(self):
+        return self.cpu.copy()
+
+    def get_mem_utilizations(self):
+        return self.mem.copy()
+
+    def get_host_powers(self):
+        return self.power.copy()
+
+    def get_metrics(self):
+        active = self.host_vm_count > 0
+        return {
+            "total_power_consumption": float(self.power.sum()),
+            "energy_wh": 0.0,
+            "active_hosts": int(active.sum()),
+            "avg_cpu_utilization": float(self.cpu[active].mean()),
+            "avg_mem_utilization": float(self.mem[active].mean()),
+            "sla_violations": 0,
+        }
+
+
+def apply_frame(state, frame):
+    """A dashboard client: start from a snapshot, then apply each delta in seq order."""
+    if frame["type"] == "snapshot":
+        state = {}
+    else:
+        assert frame["seq"] == state["seq"] + 1, "delta skipped a frame"
+        state = dict(state)
+    hosts = frame["hosts"]
+    for k, host_id in enumerate(hosts["id"]):
+        state[host_id] = {field: hosts[field][k] for field in HOST_FIELDS}
+    state["seq"] = frame["seq"]
+    return state
+
+
+def drain(queue):
+    messages = []
+    while not queue.empty():
+        messages.append(json.loads(queue.get_nowait()))
+    return messages
+
+# --- Frames ---
+
+def test_first_frame_and_snapshot_cover_every_host():
+    env = StubEnv()
+    encoder = FrameEncoder(precision=2)
+    frame = encoder.update(env)
+    assert frame["type"] == "delta" and frame["seq"] == 1
+    assert frame["hosts"]["id"] == [0, 1, 2, 3]
+
+    snapshot = encoder.snapshot()
+    assert snapshot["type"] == "snapshot" and snapshot["seq"] == 1
+    assert snapshot["hosts"]["cpu"] == np.round(env.cpu, 2).tolist()
+    assert snapshot["hosts"]["vms"] == [1, 1, 1, 1]
+    assert snapshot["hosts"]["online"] == [True] * 4
+    assert snapshot["totals"]["active_hosts"] == 4 and snapshot["totals"]["power"] == 720.0
+    json.dumps(snapshot)  # Plain Python values only
+
+
+def test_delta_holds_hosts_whose_rounded_values_moved():
+    env = StubEnv()
+    encoder = FrameEncoder(precision=2)
+    encoder.update(env)
+
+    env.cpu[0] += 0.001   # 0.1 -> 0.101: same at two decimals
+    env.power[1] += 0.04  # Power is rounded to 0.1 W
+    assert encoder.update(env)["hosts"]["id"] == []
+
+    env.cpu[0] += 0.01
+    env.mem[2] = 0.9
+    env.power[3] += 0.5
+    frame = encoder.update(env)
+    assert frame["seq"] == 3
+    assert frame["hosts"]["id"] == [0, 2, 3]
+    assert frame["hosts"]["cpu"] == [0.11, round(env.cpu[2], 2), round(env.cpu[3], 2)]
+    assert frame["hosts"]["mem"][1] == 0.9
+
+    # Empty hosts report zero utilization whatever the arrays say; online changes count too
+    env.host_vm_count[1] = 0
+    env.host_online[3] = False
+    frame = encoder.update(env)
+    assert frame["hosts"]["id"] == [1, 3]
+    assert frame["hosts"]["cpu"][0] == 0.0 and frame["hosts"]["vms"][0] == 0
+    assert frame["hosts"]["online"] == [True, False]
+    assert frame["totals"]["active_hosts"] == 3
+
+
+def test_changes_between_frames_are_coalesced():
+    env = StubEnv()
+    encoder = FrameEncoder(precision=2)
+    encoder.update(env)
+
+    env.cpu[1] = 0.8
+    env.cpu[1] = 0.2  # Back to where it was at the last frame
+    env.mem[2] = 0.6
+    env.mem[2] = 0.7
+    frame = encoder.update(env)
+    assert frame["hosts"]["id"] == [2]
+    assert frame["hosts"]["mem"] == [0.7]
+    assert frame["seq"] == 2
+
+# --- Server ---
+
+def connect(server):
+    """Register a client the way TelemetryServer.handle does: its snapshot first, then deltas."""
+    queue = asyncio.Queue(maxsize=server.queue_size)
+    queue.put_nowait(server._snapshot_message())
+    server.clients[object()] = queue
+    return queue
+
+
+def test_slow_client_skips_to_a_snapshot():
+    env = StubEnv(num_hosts=6)
+    server = TelemetryServer(env, queue_size=2, precision=2)
+    fast, slow = connect(server), connect(server)
+    fast_state = None
+
+    for step in range(5):
+        env.cpu[step] += 0.2
+        env.host_vm_count[5] = step % 2
+        server.broadcast()
+        for frame in drain(fast):
+            fast_state = apply_frame(fast_state, frame)
+
+    frames = drain(slow)
+    assert [f["type"] for f in frames] == ["snapshot", "delta"]  # The backlog was replaced, not appended to
+    slow_state = None
+    for frame in frames:
+        slow_state = apply_frame(slow_state, frame)
+
+    expected = apply_frame(None, server.encoder.snapshot())
+    assert slow_state == fast_state == expected
+    assert expected["seq"] == 6
+    assert server._snapshot_message() is server._snapshot_message()  # Encoded once per frame
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from src.agent.q_learning import QLearningAgent
+from src.env.cloud_env import CloudEnvironment
+from src.env.power import SpecPowerModel
+from src.env.vector_env import VectorCloudEnvironment
+
+LAYOUT = ("host_free_cpu", "host_free_mem", "host_vm_count", "vm_cpu", "vm_mem", "vm_host")
+
+# --- Helpers ---
+
+def greedy_agent(seed, **kwargs):
+    """An agent that never explores, so train() and train_vectorized() take the same actions."""
+    agent = QLearningAgent(rng=seed, **kwargs)
+    agent.max_epsilon = agent.min_epsilon = agent.epsilon = 0.0
+    return agent
+
+
+def layout(venv):
+    return {name: getattr(venv, name).copy() for name in LAYOUT}
+
+# --- Replicas ---
+
+def test_base_env_is_replica_zero_in_its_initial_layout():
+    env = CloudEnvironment(num_hosts=10, num_vms=15, rng=4)
+    env.reset()
+    initial = env.snapshot()
+    vm = next(vm for vm in env.vms if vm.assigned_host is not None)
+    env.migrate_vm(vm, next(h for h in env.hosts if h.id != vm.assigned_host and h.can_host(vm)))
+    env.tick_idle_counters()
+
+    venv = VectorCloudEnvironment(3, rng=1, base_env=env)
+    assert (venv.num_hosts, venv.num_vms) == (10, 15)
+    np.testing.assert_array_equal(venv.host_total_cpu[0], env.host_total_cpu)
+    for name in LAYOUT:
+        np.testing.assert_array_equal(getattr(venv, name)[0], initial['arrays'][name][:15], err_msg=name)
+    assert not np.array_equal(venv.host_total_cpu[1], venv.host_total_cpu[2])
+    assert env.energy_wh > 0  # The base environment itself is left as it was
+
+
+def test_generated_replicas_follow_the_base_power_model():
+    env = CloudEnvironment(num_hosts=8, num_vms=12, rng=2, power_model="specpower")
+    venv = VectorCloudEnvironment(3, rng=5, base_env=env)
+    assert isinstance(venv.power_model, SpecPowerModel)
+    for r in range(3):
+        expected = SpecPowerModel.by_capacity(venv.host_total_cpu[r], env.power_model.type_names)
+        np.testing.assert_array_equal(venv.power_model.host_types[venv.host_index[r]], expected.host_types)
+
+
+def test_reset_restores_every_replica_layout_and_demands():
+    venv = VectorCloudEnvironment(4, num_hosts=10, num_vms=15, rng=9)
+    initial = layout(venv)
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        bins = venv.get_host_bins(5)
+        src, vm, dst, valid = venv.select_migrations(np.full(4, 1), np.full(4, 2), 5, bins, rng=rng)
+        venv.migrate(src, vm, dst, valid)
+        venv.update_vm_workloads(rng)
+        venv.tick_idle_counters()
+    assert any(not np.array_equal(getattr(venv, name), initial[name]) for name in LAYOUT)
+    assert venv.energy_wh.min() > 0
+
+    venv.reset()
+    for name in LAYOUT:
+        np.testing.assert_array_equal(getattr(venv, name), initial[name], err_msg=name)
+    assert not venv.host_idle_steps.any()
+    assert not venv.energy_wh.any()
+
+    # The restored arrays are copies: stepping again leaves the initial layout intact
+    venv.update_vm_workloads(rng)
+    venv.reset()
+    np.testing.assert_array_equal(venv.vm_cpu, initial["vm_cpu"])
+
+# --- Training ---
+
+@pytest.mark.parametrize("seed", [0, 7])
+def test_single_replica_training_matches_train(seed):
+    # Exploration samples candidates in a different order (batched), so parity is checked on
+    # the greedy policy; unseen states still fall back to the same random valid action.
+    scalar = greedy_agent(seed, num_hosts=16, num_vms=24, episodes=25, time_steps_per_episode=15)
+    scalar.train()
+    vector = greedy_agent(seed, num_hosts=16, num_vms=24, episodes=25, time_steps_per_episode=15)
+    vector.train_vectorized(num_envs=1)
+
+    for key in ("reward", "energy_wh", "migrations", "sla_violations"):
+        episodes, values = scalar.stats.history(key)
+        np.testing.assert_array_equal(vector.stats.history(key)[0], episodes)
+        np.testing.assert_allclose(vector.stats.history(key)[1], values, rtol=1e-6, err_msg=key)
+    assert scalar.stats.last("migrations") > 0
+
+    expected = dict(scalar.q_table.items())
+    actual = dict(vector.q_table.items())
+    assert actual.keys() == expected.keys()
+    for state, values in expected.items():
+        assert actual[state] == pytest.approx(values, rel=1e-6), state
+    assert (vector.alpha, vector.epsilon) == (scalar.alpha, scalar.epsilon)
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.env.cloud_env import CloudEnvironment
+from src.env.workload import TraceReplayer, read_long_trace, read_per_vm_dir, replay_trace
+
+
+def make_trace(seed, steps=40, max_vms=12):
+    """Long-format trace with uneven step sizes, including one step larger than most chunks."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for t in range(steps):
+        size = 25 if t == 7 else int(rng.integers(1, max_vms))
+        for vm in rng.choice(30, size=size, replace=size > 30).tolist():
+            rows.append((t * 300, f"vm{vm}", float(rng.uniform(0, 40)), float(rng.uniform(0, 60))))
+    return pd.DataFrame(rows, columns=["timestamp", "vm_id", "cpu", "mem"])
+
+
+def reference_steps(frame):
+    """Steps of the whole frame read at once (the trace as written, not the generator's floats)."""
+    return [(t, g["vm_id"].tolist(), g["cpu"].tolist(), g["mem"].tolist())
+            for t, g in frame.groupby("timestamp", sort=False)]
+
+
+def as_lists(steps):
+    return [(t, list(vms), cpu.tolist(), None if mem is None else mem.tolist()) for t, vms, cpu, mem in steps]
+
+# --- Chunked readers ---
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 7, 25, 26, 100_000])
+def test_chunk_boundaries_never_split_a_step(tmp_path, chunksize):
+    path = tmp_path / "trace.csv"
+    make_trace(0).to_csv(path, index=False)
+    assert as_lists(read_long_trace(str(path), chunksize=chunksize)) == reference_steps(pd.read_csv(path))
+
+
+def test_single_timestamp_trace(tmp_path):
+    frame = pd.DataFrame({"timestamp": [5] * 10, "vm_id": [f"v{i}" for i in range(10)],
+                          "cpu": np.arange(10.0), "mem": np.arange(10.0)})
+    frame.to_csv(tmp_path / "t.csv", index=False)
+    assert as_lists(read_long_trace(str(tmp_path / "t.csv"), chunksize=3)) == reference_steps(frame)
+
+
+def test_json_lines_and_renamed_columns_without_memory(tmp_path):
+    frame = make_trace(1).drop(columns="mem").rename(columns={"timestamp": "ts", "vm_id": "machine"})
+    frame.to_json(tmp_path / "t.jsonl", orient="records", lines=True)
+    frame = pd.read_json(tmp_path / "t.jsonl", lines=True)
+    steps = as_lists(read_long_trace(str(tmp_path / "t.jsonl"), chunksize=4, columns={"time": "ts", "vm": "machine"}))
+    expected = [(t, g["machine"].tolist(), g["cpu"].tolist(), None) for t, g in frame.groupby("ts", sort=False)]
+    assert steps == expected
+
+
+def test_per_vm_dir_reads_in_lockstep(tmp_path):
+    for name, values in (("a", [1, 2, 3]), ("b", [4, 5, 6, 7])):
+        (tmp_path / name).write_text("\n".join(map(str, values)) + "\n")
+    steps = as_lists(read_per_vm_dir(str(tmp_path)))
+    assert steps == [(0, ["a", "b"], [1.0, 4.0], None), (1, ["a", "b"], [2.0, 5.0], None), (2, ["a", "b"], [3.0, 6.0], None)]
+
+# --- Replay ---
+
+def test_replay_does_not_depend_on_chunk_size(tmp_path):
+    frame = make_trace(2, steps=60)
+    path = tmp_path / "trace.csv"
+    frame.to_csv(path, index=False)
+    summaries = []
+    for chunksize in (3, 100_000):
+        env = CloudEnvironment(num_hosts=6, num_vms=0, rng=0)
+        summaries.append(replay_trace(env, TraceReplayer(read_long_trace(str(path), chunksize=chunksize)), "best_fit"))
+    assert summaries[0] == summaries[1]
+    assert summaries[0]["steps"] == 60
+
+
+def test_replayer_matches_trace_vms_to_environment_vms():
+    steps = [(0, np.array(["x", "y"]), np.array([10.0, 20.0]), None),
+             (1, np.array(["y", "z", "y"]), np.array([5.0, 7.0, 6.0]), None)]
+    env = CloudEnvironment(num_hosts=3, num_vms=1, rng=0)
+    replayer = TraceReplayer(steps, cpu_scale=2.0)
+    assert replayer.apply(env)
+    assert [vm.cpu_req for vm in env.vms] == [20.0, 40.0]  # x took the existing VM, y was added
+    assert replayer.apply(env)
+    assert [vm.cpu_req for vm in env.vms] == [20.0, 12.0, 14.0]  # Last sample of y wins
+    assert not replayer.apply(env)
+    assert replayer.exhausted
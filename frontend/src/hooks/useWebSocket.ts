@@ -1,39 +1,104 @@
 import { useState, useEffect, useRef } from 'react';
 
+// Frames sent by the backend telemetry server (backend/src/api/telemetry.py)
+interface HostColumns {
+  id: number[];
+  cpu: number[];
+  mem: number[];
+  power: number[];
+  vms: number[];
+  online: boolean[];
+}
+
+interface TelemetryFrame {
+  type: 'snapshot' | 'delta';
+  seq: number;
+  timestamp: number;
+  hosts: HostColumns;
+  totals: {
+    power: number;
+    energy_wh: number;
+    active_hosts: number;
+    active_vms: number;
+  };
+  training: { episode: number; episodes: number; progress: number } | null;
+}
+
+const RECONNECT_DELAY_MS = 2000;
+
 export const useWebSocket = (url: string) => {
   const [isConnected, setIsConnected] = useState(false);
   const [data, setData] = useState<any>(null);
-  const intervalRef = useRef<NodeJS.Timeout | null>(null);
+  const hostsRef = useRef<HostColumns | null>(null);
+  const seqRef = useRef(0);
 
   useEffect(() => {
-    // Simulate WebSocket connection with intervals
-    setIsConnected(true);
-    
-    intervalRef.current = setInterval(() => {
-      // Generate mock real-time data
-      const mockData = {
-        timestamp: new Date().toISOString(),
-        servers: Array.from({ length: 6 }, (_, i) => ({
-          id: `server-${i + 1}`,
-          cpuUsage: Math.floor(Math.random() * 100),
-          ramUsage: Math.floor(Math.random() * 100),
-          energyConsumption: Math.floor(Math.random() * 500) + 100,
+    let socket: WebSocket | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    let closed = false;
+
+    const applyFrame = (frame: TelemetryFrame) => {
+      if (frame.type === 'snapshot') {
+        hostsRef.current = frame.hosts;
+      } else {
+        const hosts = hostsRef.current;
+        if (!hosts || frame.seq !== seqRef.current + 1) {
+          // Missed a frame: reconnecting makes the server start over with a snapshot
+          socket?.close();
+          return;
+        }
+        frame.hosts.id.forEach((host, i) => {
+          hosts.cpu[host] = frame.hosts.cpu[i];
+          hosts.mem[host] = frame.hosts.mem[i];
+          hosts.power[host] = frame.hosts.power[i];
+          hosts.vms[host] = frame.hosts.vms[i];
+          hosts.online[host] = frame.hosts.online[i];
+        });
+      }
+      seqRef.current = frame.seq;
+
+      const hosts = hostsRef.current!;
+      setData({
+        timestamp: new Date(frame.timestamp * 1000).toISOString(),
+        servers: hosts.id.map((host) => ({
+          id: `server-${host + 1}`,
+          cpuUsage: Math.round(hosts.cpu[host] * 100),
+          ramUsage: Math.round(hosts.mem[host] * 100),
+          energyConsumption: Math.round(hosts.power[host]),
+          vmCount: hosts.vms[host],
+          online: hosts.online[host],
         })),
-        totalEnergy: Math.floor(Math.random() * 2000) + 1000,
-        activeVMs: Math.floor(Math.random() * 50) + 20,
-        learningProgress: Math.min(100, Math.floor(Math.random() * 100) + 75),
+        totalEnergy: Math.round(frame.totals.power),
+        energyWh: frame.totals.energy_wh,
+        activeHosts: frame.totals.active_hosts,
+        activeVMs: frame.totals.active_vms,
+        learningProgress: frame.training ? Math.round(frame.training.progress * 100) : 0,
+      });
+    };
+
+    const connect = () => {
+      socket = new WebSocket(url);
+      socket.onopen = () => setIsConnected(true);
+      socket.onmessage = (event) => applyFrame(JSON.parse(event.data));
+      socket.onclose = () => {
+        setIsConnected(false);
+        hostsRef.current = null;
+        if (!closed) {
+          reconnectTimer = setTimeout(connect, RECONNECT_DELAY_MS);
+        }
       };
-      
-      setData(mockData);
-    }, 2000);
+    };
+
+    connect();
 
     return () => {
-      setIsConnected(false);
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current);
+      closed = true;
+      if (reconnectTimer) {
+        clearTimeout(reconnectTimer);
       }
+      socket?.close();
     };
   }, [url]);
 
   return { isConnected, data };
-};
\ No newline at end of file
+};